@@ -0,0 +1,103 @@
+"""
+数据权限查询条件构建性能对比
+
+对比旧的“拼接Python源码字符串 + DAO中eval()”方式与GetDataScope直接返回缓存查询条件的方式，
+分别统计用户列表与部门列表接口构建查询语句的耗时（不连接数据库）。
+
+运行方式（在ruoyi-fastapi-backend目录下）：python -m benchmarks.data_scope_benchmark
+"""
+
+import sys
+import timeit
+
+sys.argv = sys.argv[:1]
+
+from sqlalchemy import and_, func, or_, select  # noqa: E402, F401
+from module_admin.aspect.data_scope import GetDataScope  # noqa: E402
+from module_admin.entity.do.dept_do import SysDept  # noqa: E402
+from module_admin.entity.do.role_do import SysRoleDept  # noqa: E402, F401
+from module_admin.entity.do.user_do import SysUser  # noqa: E402
+from module_admin.entity.vo.user_vo import CurrentUserModel  # noqa: E402
+
+ROUNDS = 20000
+
+
+def legacy_data_scope_sql(current_user: CurrentUserModel, query_alias: str):
+    """
+    旧版GetDataScope.__call__的实现，返回需要eval的Python源码字符串
+    """
+    user_id = current_user.user.user_id
+    dept_id = current_user.user.dept_id
+    custom_data_scope_role_id_list = [item.role_id for item in current_user.user.role if item.data_scope == '2']
+    param_sql_list = []
+    for role in current_user.user.role:
+        if current_user.user.admin or role.data_scope == '1':
+            param_sql_list = ['1 == 1']
+            break
+        elif role.data_scope == '2':
+            param_sql_list.append(
+                f"{query_alias}.dept_id.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_({custom_data_scope_role_id_list}))) if hasattr({query_alias}, 'dept_id') else 1 == 0"
+            )
+        elif role.data_scope == '3':
+            param_sql_list.append(
+                f"{query_alias}.dept_id == {dept_id} if hasattr({query_alias}, 'dept_id') else 1 == 0"
+            )
+        elif role.data_scope == '4':
+            param_sql_list.append(
+                f"{query_alias}.dept_id.in_(select(SysDept.dept_id).where(or_(SysDept.dept_id == {dept_id}, func.find_in_set({dept_id}, SysDept.ancestors)))) if hasattr({query_alias}, 'dept_id') else 1 == 0"
+            )
+        elif role.data_scope == '5':
+            param_sql_list.append(
+                f"{query_alias}.user_id == {user_id} if hasattr({query_alias}, 'user_id') else 1 == 0"
+            )
+        else:
+            param_sql_list.append('1 == 0')
+    param_sql_list = list(dict.fromkeys(param_sql_list))
+    return f'or_({", ".join(param_sql_list)})'
+
+
+def user_list_query(data_scope_clause):
+    return (
+        select(SysUser, SysDept)
+        .where(SysUser.del_flag == '0', data_scope_clause)
+        .join(
+            SysDept,
+            and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
+            isouter=True,
+        )
+        .order_by(SysUser.user_id)
+        .distinct()
+    )
+
+
+def dept_list_query(data_scope_clause):
+    return select(SysDept).where(SysDept.del_flag == '0', data_scope_clause).order_by(SysDept.order_num).distinct()
+
+
+def main():
+    current_user = CurrentUserModel(
+        permissions=[],
+        roles=[],
+        user=dict(
+            userId=100,
+            deptId=103,
+            role=[dict(roleId=2, dataScope='2'), dict(roleId=3, dataScope='4'), dict(roleId=4, dataScope='5')],
+        ),
+    )
+    cases = [('用户列表', 'SysUser', user_list_query), ('部门列表', 'SysDept', dept_list_query)]
+    print(f'每项执行{ROUNDS}次')
+    for name, query_alias, build_query in cases:
+        get_data_scope = GetDataScope(query_alias)
+        legacy_cost = timeit.timeit(
+            lambda: build_query(eval(legacy_data_scope_sql(current_user, query_alias))), number=ROUNDS
+        )
+        compiled_cost = timeit.timeit(lambda: build_query(get_data_scope(current_user)), number=ROUNDS)
+        print(
+            f'{name}: eval方式 {legacy_cost / ROUNDS * 1e6:.1f}μs/次, '
+            f'缓存查询条件方式 {compiled_cost / ROUNDS * 1e6:.1f}μs/次, '
+            f'提升 {legacy_cost / compiled_cost:.1f}倍'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -75,12 +75,47 @@ class HttpStatusConstant:
     WARN = 601
 
 
+class CacheConstant:
+    """
+    本地缓存常量
+
+    SYNC_CHANNEL: 本地缓存失效通知的Redis发布订阅频道
+    SYNC_ALL: 失效通知中表示清空全部缓存的标识
+    TOPIC_PRINCIPAL: 登录用户信息缓存主题
+    TOPIC_DICT: 字典数据缓存主题
+    TOPIC_CONFIG: 参数配置缓存主题
+    TOPIC_ROUTER: 用户路由信息缓存主题
+    """
+
+    SYNC_CHANNEL = 'local_cache_sync'
+    SYNC_ALL = '*'
+    TOPIC_PRINCIPAL = 'user_principal'
+    TOPIC_DICT = 'sys_dict'
+    TOPIC_CONFIG = 'sys_config'
+    TOPIC_ROUTER = 'sys_router'
+
+
+class LogConstant:
+    """
+    日志常量
+
+    PARAM_MAX_LENGTH: 操作日志请求参数、返回参数及错误消息的最大长度，与日志表字段长度一致
+    TRUNCATED_SUFFIX: 参数超出最大长度被截断时追加的后缀
+    """
+
+    PARAM_MAX_LENGTH = 2000
+    TRUNCATED_SUFFIX = '...(已截断)'
+
+
 class JobConstant:
     """
     定时任务常量
 
     JOB_ERROR_LIST: 定时任务禁止调用模块及违规字符串列表
     JOB_WHITE_LIST: 定时任务允许调用模块列表
+    TOPIC_SCHEDULER: 定时任务变更转发至调度主节点的消息主题
+    SCHEDULER_ACTION_SYNC: 调度主节点按数据库重新加载任务的指令
+    SCHEDULER_ACTION_RUN: 调度主节点立即执行一次任务的指令
     """
 
     JOB_ERROR_LIST = [
@@ -129,6 +164,9 @@ class JobConstant:
         ' ',
     ]
     JOB_WHITE_LIST = ['module_task']
+    TOPIC_SCHEDULER = 'sys_job_scheduler'
+    SCHEDULER_ACTION_SYNC = 'sync'
+    SCHEDULER_ACTION_RUN = 'run'
 
 
 class MenuConstant:
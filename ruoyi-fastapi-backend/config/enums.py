@@ -29,6 +29,28 @@ class BusinessType(Enum):
     CLEAN = 9
 
 
+class ExportFormat(Enum):
+    """
+    数据导出格式
+
+    EXCEL: Excel文件
+    CSV: CSV文件
+    NDJSON: 每行一个JSON对象的文本文件
+    """
+
+    EXCEL = 'excel'
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+
+    @property
+    def media_type(self):
+        return {
+            'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            'csv': 'text/csv; charset=utf-8',
+            'ndjson': 'application/x-ndjson; charset=utf-8',
+        }.get(self.value)
+
+
 class RedisInitKeyConfig(Enum):
     """
     系统内置Redis键名
@@ -43,9 +65,22 @@ class RedisInitKeyConfig(Enum):
         return self.value.get('remark')
 
     ACCESS_TOKEN = {'key': 'access_token', 'remark': '登录令牌信息'}
+    ONLINE_SESSION = {'key': 'online_session', 'remark': '在线会话信息'}
+    ONLINE_SESSION_INDEX = {'key': 'online_session_index', 'remark': '在线会话索引'}
     SYS_DICT = {'key': 'sys_dict', 'remark': '数据字典'}
     SYS_CONFIG = {'key': 'sys_config', 'remark': '配置信息'}
+    SYS_ROUTER = {'key': 'sys_router', 'remark': '用户路由信息'}
+    SYS_ROUTER_VERSION = {'key': 'sys_router_version', 'remark': '菜单版本号'}
+    SYS_CACHE_WARMUP_LOCK = {'key': 'sys_cache_warmup_lock', 'remark': '缓存预热锁'}
+    SYS_CACHE_WARMUP_VERSION = {'key': 'sys_cache_warmup_version', 'remark': '缓存预热版本号'}
+    SYS_DEPT_CLOSURE_LOCK = {'key': 'sys_dept_closure_lock', 'remark': '部门层级关系重建锁'}
+    SYS_SCHEDULER_LEADER = {'key': 'sys_scheduler_leader', 'remark': '定时任务调度主节点锁'}
+    SYS_JOB_METRICS_SAMPLES = {'key': 'sys_job_metrics_samples', 'remark': '定时任务最近执行耗时及延迟'}
+    SYS_JOB_METRICS_COUNT = {'key': 'sys_job_metrics_count', 'remark': '定时任务累计执行次数'}
     CAPTCHA_CODES = {'key': 'captcha_codes', 'remark': '图片验证码'}
     ACCOUNT_LOCK = {'key': 'account_lock', 'remark': '用户锁定'}
     PASSWORD_ERROR_COUNT = {'key': 'password_error_count', 'remark': '密码错误次数'}
+    LOGIN_IP_LOCK = {'key': 'login_ip_lock', 'remark': '登录IP锁定'}
+    LOGIN_IP_ERROR_COUNT = {'key': 'login_ip_error_count', 'remark': '登录IP密码错误次数'}
     SMS_CODE = {'key': 'sms_code', 'remark': '短信验证码'}
+    USER_PRINCIPAL = {'key': 'user_principal', 'remark': '登录用户信息'}
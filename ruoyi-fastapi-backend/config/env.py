@@ -3,7 +3,7 @@ import os
 import sys
 from dotenv import load_dotenv
 from functools import lru_cache
-from pydantic import computed_field
+from pydantic import computed_field, field_validator
 from pydantic_settings import BaseSettings
 from typing import Literal
 
@@ -20,9 +20,20 @@ class AppSettings(BaseSettings):
     app_port: int = 9099
     app_version: str = '1.0.0'
     app_reload: bool = True
-    app_ip_location_query: bool = True
+    app_ip_location_query: Literal['offline', 'online', 'disabled'] = 'offline'
+    app_ip_location_db_path: str = 'assets/ip2region/ip2region.xdb'
+    app_ip_location_api_url: str = 'https://qifu-api.baidubce.com/ip/geo/v1/district'
+    app_ip_location_api_timeout: float = 3
     app_same_time_login: bool = True
 
+    @field_validator('app_ip_location_query', mode='before')
+    @classmethod
+    def parse_ip_location_query(cls, value):
+        # 兼容旧版本的布尔值配置，true对应离线查询，false对应关闭查询
+        if isinstance(value, bool) or str(value).lower() in ('true', 'false'):
+            return 'offline' if str(value).lower() == 'true' else 'disabled'
+        return value
+
 
 class JwtSettings(BaseSettings):
     """
@@ -33,6 +44,7 @@ class JwtSettings(BaseSettings):
     jwt_algorithm: str = 'HS256'
     jwt_expire_minutes: int = 1440
     jwt_redis_expire_minutes: int = 30
+    jwt_redis_refresh_threshold_minutes: int = 20
 
 
 class DataBaseSettings(BaseSettings):
@@ -72,6 +84,98 @@ class RedisSettings(BaseSettings):
     redis_database: int = 2
 
 
+class CacheSettings(BaseSettings):
+    """
+    本地缓存配置
+    """
+
+    cache_principal_local_max_size: int = 2048
+    cache_principal_local_expire_seconds: int = 60
+    cache_principal_redis_expire_minutes: int = 30
+    cache_page_total_max_size: int = 1024
+    cache_page_total_expire_seconds: int = 60
+    cache_ip_location_max_size: int = 10000
+    cache_ip_location_expire_seconds: int = 86400
+    cache_dict_local_max_size: int = 1024
+    cache_dict_local_expire_seconds: int = 300
+    cache_token_local_max_size: int = 4096
+    cache_token_local_expire_seconds: int = 300
+    cache_router_local_max_size: int = 256
+    cache_router_local_expire_seconds: int = 300
+    cache_router_redis_expire_minutes: int = 1440
+    cache_warmup_lock_seconds: int = 60
+    cache_warmup_valid_seconds: int = 60
+    cache_monitor_scan_count: int = 1000
+    cache_monitor_scan_limit: int = 20000
+    cache_monitor_memory_samples: int = 20
+
+
+class LoginLimitSettings(BaseSettings):
+    """
+    登录失败限制配置
+    """
+
+    login_limit_user_max_attempts: int = 5
+    login_limit_user_window_seconds: int = 600
+    login_limit_user_lock_seconds: int = 600
+    login_limit_ip_max_attempts: int = 20
+    login_limit_ip_window_seconds: int = 600
+    login_limit_ip_lock_seconds: int = 600
+
+
+class PasswordSettings(BaseSettings):
+    """
+    密码加密配置
+    """
+
+    password_hash_max_workers: int = 4
+    password_hash_max_queue_size: int = 256
+
+
+class CaptchaSettings(BaseSettings):
+    """
+    验证码配置
+    """
+
+    captcha_pool_size: int = 64
+    captcha_pool_refill_batch_size: int = 8
+
+
+class LogQueueSettings(BaseSettings):
+    """
+    日志写后队列配置
+    """
+
+    log_queue_enabled: bool = True
+    log_queue_max_size: int = 10000
+    log_queue_batch_size: int = 500
+    log_queue_flush_interval: float = 1
+    log_queue_full_policy: Literal['block', 'drop', 'spill'] = 'spill'
+    log_queue_spill_path: str = 'logs/spill'
+
+
+class SchedulerSettings(BaseSettings):
+    """
+    定时任务调度配置
+    """
+
+    scheduler_leader_lease_seconds: int = 30
+    scheduler_leader_renew_interval: float = 10
+    scheduler_log_events: str = 'executed,error,missed,max_instances'
+    scheduler_group_max_concurrency: str = ''
+    scheduler_metrics_window: int = 200
+    scheduler_metrics_expire_days: int = 7
+
+
+class ServerMonitorSettings(BaseSettings):
+    """
+    服务监控配置
+    """
+
+    server_monitor_sample_interval: float = 5
+    server_monitor_history_size: int = 720
+
+
 class GenSettings:
     """
     代码生成配置
@@ -185,6 +289,62 @@ class GetConfig:
         # 实例化Redis配置模型
         return RedisSettings()
 
+    @lru_cache()
+    def get_cache_config(self):
+        """
+        获取本地缓存配置
+        """
+        # 实例化本地缓存配置模型
+        return CacheSettings()
+
+    @lru_cache()
+    def get_login_limit_config(self):
+        """
+        获取登录失败限制配置
+        """
+        # 实例化登录失败限制配置模型
+        return LoginLimitSettings()
+
+    @lru_cache()
+    def get_password_config(self):
+        """
+        获取密码加密配置
+        """
+        # 实例化密码加密配置模型
+        return PasswordSettings()
+
+    @lru_cache()
+    def get_captcha_config(self):
+        """
+        获取验证码配置
+        """
+        # 实例化验证码配置模型
+        return CaptchaSettings()
+
+    @lru_cache()
+    def get_log_queue_config(self):
+        """
+        获取日志写后队列配置
+        """
+        # 实例化日志写后队列配置模型
+        return LogQueueSettings()
+
+    @lru_cache()
+    def get_scheduler_config(self):
+        """
+        获取定时任务调度配置
+        """
+        # 实例化定时任务调度配置模型
+        return SchedulerSettings()
+
+    @lru_cache()
+    def get_server_monitor_config(self):
+        """
+        获取服务监控配置
+        """
+        # 实例化服务监控配置模型
+        return ServerMonitorSettings()
+
     @lru_cache()
     def get_gen_config(self):
         """
@@ -247,6 +407,20 @@ JwtConfig = get_config.get_jwt_config()
 DataBaseConfig = get_config.get_database_config()
 # Redis配置
 RedisConfig = get_config.get_redis_config()
+# 本地缓存配置
+CacheConfig = get_config.get_cache_config()
+# 登录失败限制配置
+LoginLimitConfig = get_config.get_login_limit_config()
+# 密码加密配置
+PasswordConfig = get_config.get_password_config()
+# 验证码配置
+CaptchaConfig = get_config.get_captcha_config()
+# 日志写后队列配置
+LogQueueConfig = get_config.get_log_queue_config()
+# 定时任务调度配置
+SchedulerConfig = get_config.get_scheduler_config()
+# 服务监控配置
+ServerMonitorConfig = get_config.get_server_monitor_config()
 # 代码生成配置
 GenConfig = get_config.get_gen_config()
 # 上传配置
@@ -1,9 +1,15 @@
+import asyncio
+import time
+from datetime import datetime
 from redis import asyncio as aioredis
 from redis.exceptions import AuthenticationError, TimeoutError, RedisError
 from config.database import AsyncSessionLocal
-from config.env import RedisConfig
+from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig, RedisConfig
 from module_admin.service.config_service import ConfigService
 from module_admin.service.dict_service import DictDataService
+from module_admin.service.online_service import OnlineService
+from utils.lock_util import RedisLock
 from utils.log_util import logger
 
 
@@ -54,6 +60,67 @@ class RedisUtil:
         await app.state.redis.close()
         logger.info('关闭redis连接成功')
 
+    @classmethod
+    async def init_sys_cache(cls, redis):
+        """
+        应用启动时预热字典、参数配置及在线会话索引缓存，多worker部署时仅由获得分布式锁的worker预热，其余worker等待预热完成
+
+        :param redis: redis对象
+        :return:
+        """
+        if not await redis.exists(RedisInitKeyConfig.SYS_CACHE_WARMUP_VERSION.key):
+            lock = RedisLock(redis, RedisInitKeyConfig.SYS_CACHE_WARMUP_LOCK.key, CacheConfig.cache_warmup_lock_seconds)
+            if await lock.acquire():
+                try:
+                    await cls.__warm_up_sys_cache(redis)
+                finally:
+                    await lock.release()
+                return
+            logger.info('其他worker正在预热缓存，等待预热完成...')
+            if not await cls.__wait_sys_cache_warmup(redis, lock):
+                # 预热的worker异常退出或超时，由当前worker重新预热
+                logger.warning('其他worker未能完成缓存预热，当前worker重新预热缓存')
+                await cls.__warm_up_sys_cache(redis)
+                return
+        # 缓存已由其他worker预热，仅加载当前进程的参数配置快照
+        await ConfigService.reload_config_snapshot_services(redis)
+
+    @classmethod
+    async def __warm_up_sys_cache(cls, redis):
+        """
+        预热字典、参数配置及在线会话索引缓存，完成后写入预热版本号
+
+        :param redis: redis对象
+        :return:
+        """
+        await cls.init_sys_dict(redis)
+        await cls.init_sys_config(redis)
+        await cls.init_online_session_index(redis)
+        await redis.set(
+            RedisInitKeyConfig.SYS_CACHE_WARMUP_VERSION.key,
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            ex=CacheConfig.cache_warmup_valid_seconds,
+        )
+        logger.info('缓存预热成功')
+
+    @classmethod
+    async def __wait_sys_cache_warmup(cls, redis, lock: RedisLock):
+        """
+        等待其他worker完成缓存预热
+
+        :param redis: redis对象
+        :param lock: 缓存预热锁
+        :return: 是否已预热完成
+        """
+        deadline = time.monotonic() + CacheConfig.cache_warmup_lock_seconds
+        while time.monotonic() < deadline:
+            if await redis.exists(RedisInitKeyConfig.SYS_CACHE_WARMUP_VERSION.key):
+                return True
+            if not await lock.locked():
+                break
+            await asyncio.sleep(0.2)
+        return bool(await redis.exists(RedisInitKeyConfig.SYS_CACHE_WARMUP_VERSION.key))
+
     @classmethod
     async def init_sys_dict(cls, redis):
         """
@@ -75,3 +142,13 @@ class RedisUtil:
         """
         async with AsyncSessionLocal() as session:
             await ConfigService.init_cache_sys_config_services(session, redis)
+
+    @classmethod
+    async def init_online_session_index(cls, redis):
+        """
+        应用启动时为已有登录令牌补充在线会话索引
+
+        :param redis: redis对象
+        :return:
+        """
+        await OnlineService.init_online_session_index_services(redis)
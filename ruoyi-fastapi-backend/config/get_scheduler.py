@@ -1,6 +1,20 @@
+import asyncio
 import json
-from apscheduler.events import EVENT_ALL
+import sys
+import time
+from apscheduler.events import (
+    EVENT_ALL,
+    EVENT_JOB_ADDED,
+    EVENT_JOB_ERROR,
+    EVENT_JOB_EXECUTED,
+    EVENT_JOB_MAX_INSTANCES,
+    EVENT_JOB_MISSED,
+    EVENT_JOB_MODIFIED,
+    EVENT_JOB_REMOVED,
+    EVENT_JOB_SUBMITTED,
+)
 from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.base import run_coroutine_job, run_job
 from apscheduler.executors.pool import ProcessPoolExecutor
 from apscheduler.jobstores.memory import MemoryJobStore
 from apscheduler.jobstores.redis import RedisJobStore
@@ -9,17 +23,27 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.combining import OrTrigger
 from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.date import DateTrigger
-from asyncio import iscoroutinefunction
-from datetime import datetime, timedelta
+from apscheduler.util import iscoroutinefunction_partial
+from collections import defaultdict
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
 from sqlalchemy.engine import create_engine
-from sqlalchemy.orm import sessionmaker
-from typing import Union
+from typing import Dict, List, Optional, Set, Union
+from config.constant import JobConstant
 from config.database import AsyncSessionLocal, quote_plus
-from config.env import DataBaseConfig, RedisConfig
+from config.enums import RedisInitKeyConfig
+from config.env import DataBaseConfig, RedisConfig, SchedulerConfig
 from module_admin.dao.job_dao import JobDao
 from module_admin.entity.vo.job_vo import JobLogModel, JobModel
-from module_admin.service.job_log_service import JobLogService
+from module_admin.service.job_log_service import JobLogQueueService
+from module_admin.service.job_metrics_service import JobMetricsService
+from utils.cache_util import CacheSyncUtil
+from utils.lock_util import RedisLock
 from utils.log_util import logger
+from utils.task_registry_util import TaskRegistryUtil
 import module_task  # noqa: F401
 
 
@@ -82,6 +106,76 @@ class MyCronTrigger(CronTrigger):
                     diff += 1
 
 
+# 重写AsyncIO执行器
+class MyAsyncIOExecutor(AsyncIOExecutor):
+    """
+    按任务组限制同时执行的任务数，并为每次执行事件记录实际开始及结束时间
+    """
+
+    def _do_submit_job(self, job, run_times):
+        def callback(f):
+            self._pending_futures.discard(f)
+            try:
+                events = f.result()
+            except BaseException:
+                self._run_job_error(job.id, *sys.exc_info()[1:])
+            else:
+                self._run_job_success(job.id, events)
+
+        f = self._eventloop.create_task(self.__run_job(job, run_times))
+        f.add_done_callback(callback)
+        self._pending_futures.add(f)
+
+    async def __run_job(self, job, run_times):
+        events = []
+        async with SchedulerUtil.get_job_group_semaphore(job._jobstore_alias):
+            # 逐个计划执行时间分别执行，以便记录每次执行的实际开始及结束时间
+            for run_time in run_times:
+                run_start_time = datetime.now(timezone.utc)
+                if iscoroutinefunction_partial(job.func):
+                    run_events = await run_coroutine_job(job, job._jobstore_alias, [run_time], self._logger.name)
+                else:
+                    run_events = await self._eventloop.run_in_executor(
+                        None, run_job, job, job._jobstore_alias, [run_time], self._logger.name
+                    )
+                events.extend(SchedulerUtil.mark_job_run_time(run_events, run_start_time))
+        return events
+
+
+# 重写进程池执行器
+class MyProcessPoolExecutor(ProcessPoolExecutor):
+    """
+    按任务组限制提交至进程池的任务数，并为每次执行事件记录提交及结束时间，执行结果在事件循环中分发
+    """
+
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        self._eventloop = scheduler._eventloop
+
+    def _do_submit_job(self, job, run_times):
+        def callback(f):
+            try:
+                events = f.result()
+            except BaseException:
+                self._run_job_error(job.id, *sys.exc_info()[1:])
+            else:
+                self._run_job_success(job.id, events)
+
+        self._eventloop.create_task(self.__run_job(job, run_times)).add_done_callback(callback)
+
+    async def __run_job(self, job, run_times):
+        async with SchedulerUtil.get_job_group_semaphore(job._jobstore_alias):
+            run_start_time = datetime.now(timezone.utc)
+            try:
+                future = self._pool.submit(run_job, job, job._jobstore_alias, run_times, self._logger.name)
+            except BrokenProcessPool:
+                self._logger.warning('Process pool is broken; replacing pool with a fresh instance')
+                self._pool = self._pool.__class__(self._pool._max_workers, **self.pool_kwargs)
+                future = self._pool.submit(run_job, job, job._jobstore_alias, run_times, self._logger.name)
+            events = await asyncio.wrap_future(future)
+        return SchedulerUtil.mark_job_run_time(events, run_start_time)
+
+
 SQLALCHEMY_DATABASE_URL = (
     f'mysql+pymysql://{DataBaseConfig.db_username}:{quote_plus(DataBaseConfig.db_password)}@'
     f'{DataBaseConfig.db_host}:{DataBaseConfig.db_port}/{DataBaseConfig.db_database}'
@@ -99,7 +193,6 @@ engine = create_engine(
     pool_recycle=DataBaseConfig.db_pool_recycle,
     pool_timeout=DataBaseConfig.db_pool_timeout,
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 job_stores = {
     'default': MemoryJobStore(),
     'sqlalchemy': SQLAlchemyJobStore(url=SQLALCHEMY_DATABASE_URL, engine=engine),
@@ -113,43 +206,199 @@ job_stores = {
         )
     ),
 }
-executors = {'default': AsyncIOExecutor(), 'processpool': ProcessPoolExecutor(5)}
+executors = {'default': MyAsyncIOExecutor(), 'processpool': MyProcessPoolExecutor(5)}
 job_defaults = {'coalesce': False, 'max_instance': 1}
 scheduler = AsyncIOScheduler()
 scheduler.configure(jobstores=job_stores, executors=executors, job_defaults=job_defaults)
+# 可记录定时任务日志的调度事件，配置名称与APScheduler事件的映射
+job_log_events = {
+    'all': EVENT_ALL,
+    'executed': EVENT_JOB_EXECUTED,
+    'error': EVENT_JOB_ERROR,
+    'missed': EVENT_JOB_MISSED,
+    'max_instances': EVENT_JOB_MAX_INSTANCES,
+    'submitted': EVENT_JOB_SUBMITTED,
+    'added': EVENT_JOB_ADDED,
+    'modified': EVENT_JOB_MODIFIED,
+    'removed': EVENT_JOB_REMOVED,
+}
 
 
 class SchedulerUtil:
     """
-    定时任务相关方法
+    定时任务相关方法，多worker部署时通过Redis锁选举调度主节点，仅主节点运行调度器，其余worker作为备用节点在锁过期后接管
     """
 
+    _leader_lock: Optional[RedisLock] = None
+    _election_task: Optional[asyncio.Task] = None
+    _is_leader = False
+    _last_renewed = 0.0
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _background_tasks: Set[asyncio.Task] = set()
+    _log_event_mask = 0
+    _misfire_counts: Dict[str, int] = defaultdict(int)
+    _group_max_concurrency: Optional[Dict[str, int]] = None
+    _group_semaphores: Dict[str, asyncio.Semaphore] = {}
+
     @classmethod
-    async def init_system_scheduler(cls):
+    async def init_system_scheduler(cls, redis: aioredis.Redis):
         """
-        应用启动时初始化定时任务
+        应用启动时参与调度主节点选举，当选后初始化定时任务
 
+        :param redis: redis对象
         :return:
         """
         logger.info('开始启动定时任务...')
-        scheduler.start()
+        cls._loop = asyncio.get_running_loop()
+        cls._leader_lock = RedisLock(
+            redis, RedisInitKeyConfig.SYS_SCHEDULER_LEADER.key, SchedulerConfig.scheduler_leader_lease_seconds
+        )
+        await cls.__elect_leader()
+        if not cls._is_leader:
+            logger.info('其他worker已是调度主节点，当前worker作为备用节点')
+        cls._election_task = asyncio.create_task(cls.__keep_election())
+
+    @classmethod
+    async def close_system_scheduler(cls):
+        """
+        应用关闭时关闭定时任务，主节点主动释放锁以便备用节点尽快接管
+
+        :return:
+        """
+        if cls._election_task is not None:
+            cls._election_task.cancel()
+            try:
+                await cls._election_task
+            except asyncio.CancelledError:
+                pass
+            cls._election_task = None
+        if scheduler.running:
+            scheduler.shutdown()
+        if cls._is_leader:
+            cls._is_leader = False
+            try:
+                await cls._leader_lock.release()
+            except RedisError as e:
+                logger.error(f'调度主节点锁释放失败，详细错误信息：{e}')
+        logger.info('关闭定时任务成功')
+
+    @classmethod
+    async def publish_scheduler_job_action(
+        cls, job_id: Union[str, int], action: str = JobConstant.SCHEDULER_ACTION_SYNC
+    ):
+        """
+        将定时任务变更转发至调度主节点，需在数据库事务提交后调用
+
+        :param job_id: 任务id
+        :param action: 调度指令，sync按数据库重新加载任务，run立即执行一次任务
+        :return:
+        """
+        await CacheSyncUtil.publish(JobConstant.TOPIC_SCHEDULER, json.dumps(dict(job_id=str(job_id), action=action)))
+
+    @classmethod
+    async def handle_scheduler_job_action(cls, payload: str):
+        """
+        调度主节点处理其他worker转发的定时任务变更，备用节点忽略
+
+        :param payload: 消息内容
+        :return:
+        """
+        if not cls._is_leader:
+            return
+        message = json.loads(payload)
+        job_id = message.get('job_id')
+        cls.remove_scheduler_job(job_id=job_id)
+        async with AsyncSessionLocal() as session:
+            job = await JobDao.get_job_detail_by_id(session, job_id=int(job_id))
+        if not job:
+            return
+        if message.get('action') == JobConstant.SCHEDULER_ACTION_RUN:
+            cls.execute_scheduler_job_once(job_info=job)
+        elif job.status == '0':
+            cls.add_scheduler_job(job_info=job)
+
+    @classmethod
+    async def __keep_election(cls):
+        """
+        持续为主节点续期或由备用节点竞选主节点
+
+        :return:
+        """
+        while True:
+            await asyncio.sleep(SchedulerConfig.scheduler_leader_renew_interval)
+            try:
+                await cls.__elect_leader()
+            except Exception as e:
+                logger.exception(e)
+
+    @classmethod
+    async def __elect_leader(cls):
+        """
+        主节点续期，续期失败时降为备用节点；备用节点尝试获取锁，获取成功时当选主节点
+
+        :return:
+        """
+        try:
+            if cls._is_leader:
+                if await cls._leader_lock.extend():
+                    cls._last_renewed = time.monotonic()
+                else:
+                    await cls.__step_down('调度主节点锁已被其他worker获取')
+            elif await cls._leader_lock.acquire():
+                cls._last_renewed = time.monotonic()
+                await cls.__take_leadership()
+        except RedisError as e:
+            logger.error(f'调度主节点选举失败，详细错误信息：{e}')
+            # 无法续期时锁可能已过期并被其他worker获取，租期到期前主动停止调度
+            if (
+                cls._is_leader
+                and time.monotonic() - cls._last_renewed >= SchedulerConfig.scheduler_leader_lease_seconds
+            ):
+                await cls.__step_down('调度主节点锁续期超时')
+
+    @classmethod
+    async def __take_leadership(cls):
+        """
+        当选主节点后按数据库重新加载全部定时任务并启动调度器
+
+        :return:
+        """
+        if not scheduler.running:
+            cls._log_event_mask = cls.__get_job_log_event_mask()
+            # 执行结果事件始终需要监听，用于记录执行指标
+            scheduler.add_listener(
+                cls.scheduler_event_listener,
+                cls._log_event_mask | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED,
+            )
+            # 调度器未启动时只能查找到待添加的任务，需先以暂停状态启动，才能移除持久化任务存储中已有的同名任务
+            scheduler.start(paused=True)
+        else:
+            # 内存任务存储中可能残留上次担任主节点时的任务
+            scheduler.remove_all_jobs(jobstore='default')
         async with AsyncSessionLocal() as session:
             job_list = await JobDao.get_job_list_for_scheduler(session)
             for item in job_list:
                 cls.remove_scheduler_job(job_id=str(item.job_id))
-                cls.add_scheduler_job(item)
-        scheduler.add_listener(cls.scheduler_event_listener, EVENT_ALL)
-        logger.info('系统初始定时任务加载成功')
+                try:
+                    cls.add_scheduler_job(item)
+                except Exception as e:
+                    logger.error(f'定时任务{item.job_name}加载失败，详细错误信息：{e}')
+        scheduler.resume()
+        cls._is_leader = True
+        logger.info('当前worker当选调度主节点，系统初始定时任务加载成功')
 
     @classmethod
-    async def close_system_scheduler(cls):
+    async def __step_down(cls, reason: str):
         """
-        应用关闭时关闭定时任务
+        降为备用节点并暂停调度器
 
+        :param reason: 降级原因
         :return:
         """
-        scheduler.shutdown()
-        logger.info('关闭定时任务成功')
+        cls._is_leader = False
+        if scheduler.running:
+            scheduler.pause()
+        logger.warning(f'{reason}，当前worker降为备用节点并暂停定时任务')
 
     @classmethod
     def get_scheduler_job(cls, job_id: Union[str, int]):
@@ -171,12 +420,9 @@ class SchedulerUtil:
         :param job_info: 任务对象信息
         :return:
         """
-        job_func = eval(job_info.invoke_target)
-        job_executor = job_info.job_executor
-        if iscoroutinefunction(job_func):
-            job_executor = 'default'
+        job_func, job_executor = cls.__get_job_task(job_info)
         scheduler.add_job(
-            func=eval(job_info.invoke_target),
+            func=job_func,
             trigger=MyCronTrigger.from_crontab(job_info.cron_expression),
             args=job_info.job_args.split(',') if job_info.job_args else None,
             kwargs=json.loads(job_info.job_kwargs) if job_info.job_kwargs else None,
@@ -197,15 +443,12 @@ class SchedulerUtil:
         :param job_info: 任务对象信息
         :return:
         """
-        job_func = eval(job_info.invoke_target)
-        job_executor = job_info.job_executor
-        if iscoroutinefunction(job_func):
-            job_executor = 'default'
+        job_func, job_executor = cls.__get_job_task(job_info)
         job_trigger = DateTrigger()
         if job_info.status == '0':
             job_trigger = OrTrigger(triggers=[DateTrigger(), MyCronTrigger.from_crontab(job_info.cron_expression)])
         scheduler.add_job(
-            func=eval(job_info.invoke_target),
+            func=job_func,
             trigger=job_trigger,
             args=job_info.job_args.split(',') if job_info.job_args else None,
             kwargs=json.loads(job_info.job_kwargs) if job_info.job_kwargs else None,
@@ -218,6 +461,23 @@ class SchedulerUtil:
             executor=job_executor,
         )
 
+    @classmethod
+    def __get_job_task(cls, job_info: JobModel):
+        """
+        根据调用目标字符串从任务注册表获取任务函数，并确定实际使用的任务执行器
+
+        :param job_info: 任务对象信息
+        :return: 任务函数及任务执行器
+        """
+        task = TaskRegistryUtil.get_task(job_info.invoke_target)
+        if task is None:
+            raise ValueError(f'调用目标{job_info.invoke_target}未注册为定时任务')
+        job_executor = job_info.job_executor
+        # 异步函数及无法序列化的函数不能在进程池中执行
+        if job_executor == 'processpool' and (task.is_async or not task.picklable):
+            job_executor = 'default'
+        return task.func, job_executor
+
     @classmethod
     def remove_scheduler_job(cls, job_id: Union[str, int]):
         """
@@ -230,6 +490,40 @@ class SchedulerUtil:
         if query_job:
             scheduler.remove_job(job_id=str(job_id))
 
+    @classmethod
+    def get_job_group_semaphore(cls, job_group: str):
+        """
+        获取任务组的并发限制信号量，未配置并发限制的任务组不限制
+
+        :param job_group: 任务组名
+        :return: 信号量或空上下文
+        """
+        semaphore = cls._group_semaphores.get(job_group)
+        if semaphore is None:
+            if cls._group_max_concurrency is None:
+                cls._group_max_concurrency = cls.__get_group_max_concurrency()
+            max_concurrency = cls._group_max_concurrency.get(job_group)
+            if not max_concurrency:
+                return nullcontext()
+            semaphore = cls._group_semaphores.setdefault(job_group, asyncio.Semaphore(max_concurrency))
+        return semaphore
+
+    @classmethod
+    def mark_job_run_time(cls, events: List, run_start_time: datetime):
+        """
+        为执行成功及执行异常事件记录实际开始及结束时间
+
+        :param events: 执行器返回的调度事件列表
+        :param run_start_time: 实际开始执行时间
+        :return: 调度事件列表
+        """
+        run_end_time = datetime.now(timezone.utc)
+        for event in events:
+            if event.code in (EVENT_JOB_EXECUTED, EVENT_JOB_ERROR):
+                event.run_start_time = run_start_time
+                event.run_end_time = run_end_time
+        return events
+
     @classmethod
     def scheduler_event_listener(cls, event):
         # 获取事件类型和任务ID
@@ -242,8 +536,20 @@ class SchedulerUtil:
             status = '1'
         if hasattr(event, 'job_id'):
             job_id = event.job_id
+            # 获取计划执行时间、实际开始及结束时间，计算执行耗时及延迟
+            scheduled_run_time = getattr(event, 'scheduled_run_time', None)
+            run_start_time = getattr(event, 'run_start_time', None)
+            run_end_time = getattr(event, 'run_end_time', None)
+            run_duration = run_delay = misfire_count = None
+            if event.code == EVENT_JOB_MISSED:
+                cls._misfire_counts[job_id] += 1
+            if run_start_time and run_end_time:
+                run_duration = int((run_end_time - run_start_time).total_seconds() * 1000)
+                run_delay = max(int((run_start_time - scheduled_run_time).total_seconds() * 1000), 0)
+                misfire_count = cls._misfire_counts.pop(job_id, 0)
+            job_log = None
             query_job = cls.get_scheduler_job(job_id=job_id)
-            if query_job:
+            if query_job and event.code & cls._log_event_mask:
                 query_job_info = query_job.__getstate__()
                 # 获取任务名称
                 job_name = query_job_info.get('name')
@@ -272,8 +578,119 @@ class SchedulerUtil:
                     jobMessage=job_message,
                     status=status,
                     exceptionInfo=exception_info,
+                    scheduledTime=cls.__to_local_time(scheduled_run_time),
+                    runStartTime=cls.__to_local_time(run_start_time),
+                    runEndTime=cls.__to_local_time(run_end_time),
+                    runDuration=run_duration,
+                    runDelay=run_delay,
+                    misfireCount=misfire_count,
                     createTime=datetime.now(),
                 )
-                session = SessionLocal()
-                JobLogService.add_job_log_services(session, job_log)
-                session.close()
+            # 进程池执行器在其他线程中分发事件，统一交由事件循环放入写后队列，监听器中不执行数据库操作
+            if cls._loop is not None and not cls._loop.is_closed():
+                cls._loop.call_soon_threadsafe(
+                    cls.__handle_job_event, job_id, event.code, status, run_duration, run_delay, job_log
+                )
+
+    @classmethod
+    def __handle_job_event(
+        cls,
+        job_id: str,
+        event_code: int,
+        status: str,
+        run_duration: Optional[int],
+        run_delay: Optional[int],
+        job_log: Optional[JobLogModel],
+    ):
+        """
+        在事件循环中记录定时任务执行指标并将定时任务日志放入写后队列
+
+        :param job_id: 任务id
+        :param event_code: 调度事件类型
+        :param status: 执行状态（0正常 1失败）
+        :param run_duration: 执行耗时（毫秒）
+        :param run_delay: 开始执行延迟（毫秒）
+        :param job_log: 定时任务日志对象，无需记录日志时为None
+        :return:
+        """
+        if job_log is not None:
+            cls.__create_background_task(JobLogQueueService.add_job_log_services(job_log))
+        redis = cls._leader_lock.redis if cls._leader_lock else None
+        if redis is None:
+            return
+        if event_code == EVENT_JOB_MISSED:
+            cls.__create_background_task(JobMetricsService.record_job_misfire_services(redis, job_id))
+        elif run_duration is not None:
+            cls.__create_background_task(
+                JobMetricsService.record_job_run_services(redis, job_id, status, run_duration, run_delay)
+            )
+
+    @classmethod
+    def __create_background_task(cls, coro):
+        """
+        创建后台任务并保留任务引用，避免任务完成前被回收
+
+        :param coro: 协程对象
+        :return:
+        """
+        task = asyncio.create_task(coro)
+        cls._background_tasks.add(task)
+        task.add_done_callback(cls.__on_background_task_done)
+
+    @classmethod
+    def __on_background_task_done(cls, task: asyncio.Task):
+        """
+        后台任务结束时释放任务引用并记录异常
+
+        :param task: 后台任务
+        :return:
+        """
+        cls._background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f'定时任务日志或执行指标记录失败，详细错误信息：{task.exception()}')
+
+    @staticmethod
+    def __to_local_time(value: Optional[datetime]):
+        """
+        将带时区的时间转换为本地时区的不带时区时间，与日志表其余时间字段保持一致
+
+        :param value: 带时区的时间
+        :return: 本地时区的不带时区时间
+        """
+        return value.astimezone().replace(tzinfo=None) if value else None
+
+    @classmethod
+    def __get_group_max_concurrency(cls) -> Dict[str, int]:
+        """
+        解析各任务组同时执行的最大任务数配置
+
+        :return: 任务组名与最大任务数的映射
+        """
+        group_max_concurrency = {}
+        for item in SchedulerConfig.scheduler_group_max_concurrency.split(','):
+            if ':' not in item:
+                continue
+            job_group, max_concurrency = item.rsplit(':', 1)
+            group_max_concurrency[job_group.strip()] = int(max_concurrency)
+        return group_max_concurrency
+
+    @classmethod
+    def __get_job_log_event_mask(cls):
+        """
+        根据配置获取需要记录定时任务日志的调度事件掩码
+
+        :return: 调度事件掩码
+        """
+        event_mask = 0
+        for event_name in SchedulerConfig.scheduler_log_events.split(','):
+            event_name = event_name.strip().lower()
+            if not event_name:
+                continue
+            if event_name not in job_log_events:
+                logger.warning(f'未知的定时任务日志事件{event_name}，已忽略')
+                continue
+            event_mask |= job_log_events[event_name]
+        return event_mask
+
+
+CacheSyncUtil.register(JobConstant.TOPIC_SCHEDULER, SchedulerUtil.handle_scheduler_job_action)
@@ -1,25 +1,31 @@
 import inspect
 import json
 import os
-import requests
+import re
 import time
 from datetime import datetime
-from fastapi import Request
-from fastapi.responses import JSONResponse, ORJSONResponse, UJSONResponse
-from functools import lru_cache, wraps
+from fastapi import Request, UploadFile
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, UJSONResponse
+from functools import wraps
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Callable, Literal, Optional
 from user_agents import parse
+from config.constant import HttpStatusConstant, LogConstant
 from config.enums import BusinessType
-from config.env import AppConfig
 from exceptions.exception import LoginException, ServiceException, ServiceWarning
 from module_admin.entity.vo.log_vo import LogininforModel, OperLogModel
-from module_admin.service.log_service import LoginLogService, OperationLogService
+from module_admin.service.log_service import LogQueueService
 from module_admin.service.login_service import LoginService
+from utils.ip_util import IpLocationUtil
 from utils.log_util import logger
 from utils.response_util import ResponseUtil
 
 
+# 匹配ResponseUtil生成的JSON响应体头部的code及msg
+RESPONSE_HEAD_PATTERN = re.compile(r'\{"code":(-?\d+),"msg":("(?:[^"\\]|\\.)*")')
+
+
 class Log:
     """
     日志装饰器
@@ -44,26 +50,19 @@ class Log:
         self.log_type = log_type
 
     def __call__(self, func):
+        # 在装饰时预先计算被装饰函数的路径及参数取值方法，避免每次请求重复反射
+        func_path = get_function_path(func)
+        get_request = get_function_parameter_getter(func, Request)
+        get_query_db = get_function_parameter_getter(func, AsyncSession)
+        body_model_names = get_function_parameters_name_by_subclass(func, BaseModel)
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
             start_time = time.time()
-            # 获取被装饰函数的文件路径
-            file_path = inspect.getfile(func)
-            # 获取项目根路径
-            project_root = os.getcwd()
-            # 处理文件路径，去除项目根路径部分
-            relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.').replace('/', '.')
-            # 获取当前被装饰函数所在路径
-            func_path = f'{relative_path}{func.__name__}()'
-            # method 字段长度限制为 100，超过则截断（保留后面部分，因为包含函数名）
-            if len(func_path) > 100:
-                func_path = '...' + func_path[-97:]
             # 获取上下文信息
-            request_name_list = get_function_parameters_name_by_type(func, Request)
-            request = get_function_parameters_value_by_name(func, request_name_list[0], *args, **kwargs)
+            request = get_request(args, kwargs)
             token = request.headers.get('Authorization')
-            session_name_list = get_function_parameters_name_by_type(func, AsyncSession)
-            query_db = get_function_parameters_value_by_name(func, session_name_list[0], *args, **kwargs)
+            query_db = get_query_db(args, kwargs)
             request_method = request.method
             operator_type = 0
             user_agent = request.headers.get('User-Agent')
@@ -75,29 +74,9 @@ class Log:
             oper_url = request.url.path
             # 获取请求的ip及ip归属区域
             oper_ip = request.headers.get('X-Forwarded-For')
-            oper_location = '内网IP'
-            if AppConfig.app_ip_location_query:
-                oper_location = get_ip_location(oper_ip)
-            # 根据不同的请求类型使用不同的方法获取请求参数
-            content_type = request.headers.get('Content-Type')
-            if content_type and (
-                'multipart/form-data' in content_type or 'application/x-www-form-urlencoded' in content_type
-            ):
-                payload = await request.form()
-                oper_param = '\n'.join([f'{key}: {value}' for key, value in payload.items()])
-            else:
-                payload = await request.body()
-                # 通过 request.path_params 直接访问路径参数
-                path_params = request.path_params
-                oper_param = {}
-                if payload:
-                    oper_param.update(json.loads(str(payload, 'utf-8')))
-                if path_params:
-                    oper_param.update(path_params)
-                oper_param = json.dumps(oper_param, ensure_ascii=False)
-            # 日志表请求参数字段长度最大为2000，因此在此处判断长度
-            if len(oper_param) > 2000:
-                oper_param = '请求参数过长'
+            oper_location = await IpLocationUtil.get_ip_location(oper_ip)
+            # 获取请求参数，超出日志表字段长度时截断
+            oper_param = await get_request_param(request)
 
             # 获取操作时间
             oper_time = datetime.now()
@@ -140,29 +119,17 @@ class Log:
             request_from_redoc = (
                 request.headers.get('referer').endswith('redoc') if request.headers.get('referer') else False
             )
-            # 根据响应结果的类型使用不同的方法获取响应结果参数
-            if (
-                isinstance(result, JSONResponse)
-                or isinstance(result, ORJSONResponse)
-                or isinstance(result, UJSONResponse)
-            ):
-                result_dict = json.loads(str(result.body, 'utf-8'))
-            else:
-                if request_from_swagger or request_from_redoc:
-                    result_dict = {}
-                else:
-                    if result.status_code == 200:
-                        result_dict = {'code': result.status_code, 'message': '获取成功'}
-                    else:
-                        result_dict = {'code': result.status_code, 'message': '获取失败'}
-            json_result = json.dumps(result_dict, ensure_ascii=False)
+            # 获取响应结果参数，JSON响应仅解析一次
+            result_code, result_msg, json_result = get_response_result(
+                result, request_from_swagger or request_from_redoc
+            )
             # 根据响应结果获取响应状态及异常信息
             status = 1
             error_msg = ''
-            if result_dict.get('code') == 200:
+            if result_code == HttpStatusConstant.SUCCESS:
                 status = 0
             else:
-                error_msg = result_dict.get('msg')
+                error_msg = truncate_log_param(result_msg)
             # 根据日志类型向对应的日志表插入数据
             if self.log_type == 'login':
                 # 登录请求来自于api文档时不记录登录日志，其余情况则记录
@@ -174,24 +141,25 @@ class Log:
                     login_log['loginTime'] = oper_time
                     login_log['userName'] = user_name
                     login_log['status'] = str(status)
-                    login_log['msg'] = result_dict.get('msg')
+                    login_log['msg'] = result_msg
 
-                    await LoginLogService.add_login_log_services(query_db, LogininforModel(**login_log))
+                    await LogQueueService.add_login_log_services(query_db, LogininforModel(**login_log))
             else:
-                current_user = await LoginService.get_current_user(request, token, query_db)
+                # 优先复用本次请求鉴权时已获取的当前用户信息
+                current_user = getattr(request.state, 'current_user', None)
+                if current_user is None:
+                    current_user = await LoginService.get_current_user(request, token, query_db)
                 oper_name = current_user.user.user_name
                 dept_name = current_user.user.dept.dept_name if current_user.user.dept else None
                 
                 # 动态调整 title：如果是保存拓扑且有 versionId，记录为"工程管理-版本"
                 log_title = self.title
-                if self.title == '工程管理-拓扑' and oper_param:
-                    try:
-                        param_dict = json.loads(oper_param) if isinstance(oper_param, str) else {}
-                        if param_dict.get('versionId') or param_dict.get('version_id'):
+                if self.title == '工程管理-拓扑':
+                    for name in body_model_names:
+                        if getattr(kwargs.get(name), 'version_id', None):
                             log_title = '工程管理-版本'
-                    except Exception:
-                        pass
-                
+                            break
+
                 operation_log = OperLogModel(
                     title=log_title,
                     businessType=self.business_type,
@@ -210,66 +178,145 @@ class Log:
                     operTime=oper_time,
                     costTime=int(cost_time),
                 )
-                await OperationLogService.add_operation_log_services(query_db, operation_log)
+                await LogQueueService.add_operation_log_services(query_db, operation_log)
 
             return result
 
         return wrapper
 
 
-@lru_cache()
-def get_ip_location(oper_ip: str):
+def get_function_path(func: Callable):
     """
-    查询ip归属区域
+    获取函数所在路径
 
-    :param oper_ip: 需要查询的ip
-    :return: ip归属区域
+    :param func: 函数
+    :return: 函数所在路径，格式为 模块路径.函数名()
     """
-    oper_location = '内网IP'
-    try:
-        if oper_ip != '127.0.0.1' and oper_ip != 'localhost':
-            oper_location = '未知'
-            ip_result = requests.get(f'https://qifu-api.baidubce.com/ip/geo/v1/district?ip={oper_ip}')
-            if ip_result.status_code == 200:
-                prov = ip_result.json().get('data').get('prov')
-                city = ip_result.json().get('data').get('city')
-                if prov or city:
-                    oper_location = f'{prov}-{city}'
-    except Exception as e:
-        oper_location = '未知'
-        print(e)
-    return oper_location
-
-
-def get_function_parameters_name_by_type(func: Callable, param_type: Any):
+    # 获取被装饰函数的文件路径
+    file_path = inspect.getfile(func)
+    # 获取项目根路径
+    project_root = os.getcwd()
+    # 处理文件路径，去除项目根路径部分
+    relative_path = os.path.relpath(file_path, start=project_root)[0:-2].replace('\\', '.').replace('/', '.')
+    # 获取当前被装饰函数所在路径
+    func_path = f'{relative_path}{func.__name__}()'
+    # method 字段长度限制为 100，超过则截断（保留后面部分，因为包含函数名）
+    if len(func_path) > 100:
+        func_path = '...' + func_path[-97:]
+    return func_path
+
+
+def get_function_parameter_getter(func: Callable, param_type: Any):
     """
-    获取函数指定类型的参数名称
+    获取函数第一个指定类型参数的取值方法
 
     :param func: 函数
-    :param arg_type: 参数类型
-    :return: 函数指定类型的参数名称
+    :param param_type: 参数类型
+    :return: 参数取值方法，接收调用时的位置参数元组及关键字参数字典，返回参数值
     """
-    # 获取函数的参数信息
-    parameters = inspect.signature(func).parameters
-    # 找到指定类型的参数名称
-    parameters_name_list = []
-    for name, param in parameters.items():
+    for index, param in enumerate(inspect.signature(func).parameters.values()):
         if param.annotation == param_type:
-            parameters_name_list.append(name)
-    return parameters_name_list
+            name = param.name
+            default = None if param.default is inspect.Parameter.empty else param.default
+
+            def get_parameter_value(args: tuple, kwargs: dict):
+                if name in kwargs:
+                    return kwargs[name]
+                if index < len(args):
+                    return args[index]
+                return default
+
+            return get_parameter_value
+    raise TypeError(f'{func.__name__}缺少{param_type.__name__}类型的参数')
 
 
-def get_function_parameters_value_by_name(func: Callable, name: str, *args, **kwargs):
+def get_function_parameters_name_by_subclass(func: Callable, base_type: type):
     """
-    获取函数指定参数的值
+    获取函数类型为指定类子类的参数名称
 
     :param func: 函数
-    :param name: 参数名
-    :return: 参数值
+    :param base_type: 基类
+    :return: 函数类型为指定类子类的参数名称
     """
-    # 获取参数值
-    bound_parameters = inspect.signature(func).bind(*args, **kwargs)
-    bound_parameters.apply_defaults()
-    parameters_value = bound_parameters.arguments.get(name)
+    return [
+        name
+        for name, param in inspect.signature(func).parameters.items()
+        if inspect.isclass(param.annotation) and issubclass(param.annotation, base_type)
+    ]
 
-    return parameters_value
+
+def truncate_log_param(param: Optional[str]):
+    """
+    截断超出日志表字段长度的参数
+
+    :param param: 参数
+    :return: 截断后的参数
+    """
+    if param and len(param) > LogConstant.PARAM_MAX_LENGTH:
+        return param[: LogConstant.PARAM_MAX_LENGTH - len(LogConstant.TRUNCATED_SUFFIX)] + LogConstant.TRUNCATED_SUFFIX
+    return param
+
+
+async def get_request_param(request: Request):
+    """
+    获取用于记录日志的请求参数，文件仅记录文件名，超长的请求体不做解析直接截断
+
+    :param request: Request对象
+    :return: 请求参数
+    """
+    content_type = request.headers.get('Content-Type')
+    if content_type and ('multipart/form-data' in content_type or 'application/x-www-form-urlencoded' in content_type):
+        payload = await request.form()
+        return truncate_log_param(
+            '\n'.join(
+                [
+                    f'{key}: {value.filename if isinstance(value, UploadFile) else value}'
+                    for key, value in payload.multi_items()
+                ]
+            )
+        )
+    payload = await request.body()
+    # 请求体超出日志表字段长度时解析后也会被截断，因此只解码需要保留的部分
+    if len(payload) > LogConstant.PARAM_MAX_LENGTH:
+        return truncate_log_param(payload[: LogConstant.PARAM_MAX_LENGTH * 4].decode('utf-8', errors='ignore'))
+    # 通过 request.path_params 直接访问路径参数
+    path_params = request.path_params
+    oper_param = {}
+    if payload:
+        try:
+            body = json.loads(payload)
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            return truncate_log_param(payload.decode('utf-8', errors='ignore'))
+        oper_param.update(body)
+    if path_params:
+        oper_param.update(path_params)
+    return truncate_log_param(json.dumps(oper_param, ensure_ascii=False))
+
+
+def get_response_result(result: Response, request_from_doc: bool):
+    """
+    获取用于记录日志的响应结果，JSON响应优先从响应体头部直接读取状态码及提示信息，避免完整解析大响应体
+
+    :param result: 响应对象
+    :param request_from_doc: 请求是否来自api文档
+    :return: 响应状态码，响应提示信息，响应结果参数
+    """
+    if isinstance(result, (JSONResponse, ORJSONResponse, UJSONResponse)):
+        json_result = result.body.decode('utf-8')
+        # ResponseUtil生成的响应体均以code及msg开头
+        match = RESPONSE_HEAD_PATTERN.match(json_result)
+        if match:
+            result_code, result_msg = int(match.group(1)), json.loads(match.group(2))
+        else:
+            result_dict = json.loads(json_result)
+            result_code, result_msg = result_dict.get('code'), result_dict.get('msg')
+        return result_code, result_msg, truncate_log_param(json_result)
+    if request_from_doc:
+        return None, None, '{}'
+    if result.status_code == 200:
+        result_dict = {'code': result.status_code, 'message': '获取成功'}
+    else:
+        result_dict = {'code': result.status_code, 'message': '获取失败'}
+    return result.status_code, None, json.dumps(result_dict, ensure_ascii=False)
@@ -1,12 +1,17 @@
 from fastapi import Depends
-from typing import Optional
+from functools import lru_cache
+from sqlalchemy import ColumnElement, false, or_, select, true
+from typing import Optional, Tuple
+from config.database import Base
+from module_admin.entity.do.dept_do import SysDeptClosure
+from module_admin.entity.do.role_do import SysRoleDept
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.login_service import LoginService
 
 
 class GetDataScope:
     """
-    获取当前用户数据权限对应的查询sql语句
+    获取当前用户数据权限对应的查询条件
     """
 
     DATA_SCOPE_ALL = '1'
@@ -23,7 +28,7 @@ class GetDataScope:
         dept_alias: Optional[str] = 'dept_id',
     ):
         """
-        获取当前用户数据权限对应的查询sql语句
+        获取当前用户数据权限对应的查询条件
 
         :param query_alias: 所要查询表对应的sqlalchemy模型名称，默认为''
         :param db_alias: orm对象别名，默认为'db'
@@ -35,41 +40,92 @@ class GetDataScope:
         self.user_alias = user_alias
         self.dept_alias = dept_alias
 
-    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
-        user_id = current_user.user.user_id
-        dept_id = current_user.user.dept_id
+    def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)) -> ColumnElement:
+        role_scope_list = tuple(sorted({(role.role_id, role.data_scope) for role in current_user.user.role}))
+        data_scope_set = {data_scope for _, data_scope in role_scope_list}
+        # 仅在数据权限与部门/用户相关时才将其纳入缓存键，使相同角色组合的用户共享同一查询条件
+        dept_id = (
+            current_user.user.dept_id
+            if data_scope_set & {self.DATA_SCOPE_DEPT, self.DATA_SCOPE_DEPT_AND_CHILD}
+            else None
+        )
+        user_id = current_user.user.user_id if self.DATA_SCOPE_SELF in data_scope_set else None
+
+        return self.build_data_scope_clause(
+            self.query_alias,
+            self.user_alias,
+            self.dept_alias,
+            bool(current_user.user.admin),
+            role_scope_list,
+            dept_id,
+            user_id,
+        )
+
+    @classmethod
+    @lru_cache(maxsize=1024)
+    def build_data_scope_clause(
+        cls,
+        query_alias: str,
+        user_alias: str,
+        dept_alias: str,
+        is_admin: bool,
+        role_scope_list: Tuple[Tuple[int, str], ...],
+        dept_id: Optional[int],
+        user_id: Optional[int],
+    ) -> ColumnElement:
+        """
+        根据角色数据权限构建查询条件，相同参数的构建结果会被缓存复用
+
+        :param query_alias: 所要查询表对应的sqlalchemy模型名称
+        :param user_alias: 用户id字段别名
+        :param dept_alias: 部门id字段别名
+        :param is_admin: 是否为超级管理员
+        :param role_scope_list: 按角色id排序的(角色id, 数据权限)列表
+        :param dept_id: 当前用户部门id
+        :param user_id: 当前用户id
+        :return: 数据权限对应的查询条件
+        """
+        if is_admin or any(data_scope == cls.DATA_SCOPE_ALL for _, data_scope in role_scope_list):
+            return true()
+        query_model = cls.get_query_model(query_alias)
+        dept_column = getattr(query_model, dept_alias, None)
+        user_column = getattr(query_model, user_alias, None)
         custom_data_scope_role_id_list = [
-            item.role_id for item in current_user.user.role if item.data_scope == self.DATA_SCOPE_CUSTOM
+            role_id for role_id, data_scope in role_scope_list if data_scope == cls.DATA_SCOPE_CUSTOM
         ]
-        param_sql_list = []
-        for role in current_user.user.role:
-            if current_user.user.admin or role.data_scope == self.DATA_SCOPE_ALL:
-                param_sql_list = ['1 == 1']
-                break
-            elif role.data_scope == self.DATA_SCOPE_CUSTOM:
-                if len(custom_data_scope_role_id_list) > 1:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_({custom_data_scope_role_id_list}))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-                else:
-                    param_sql_list.append(
-                        f"{self.query_alias}.{self.dept_alias}.in_(select(SysRoleDept.dept_id).where(SysRoleDept.role_id == {role.role_id})) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                    )
-            elif role.data_scope == self.DATA_SCOPE_DEPT:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias} == {dept_id} if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
-                )
-            elif role.data_scope == self.DATA_SCOPE_DEPT_AND_CHILD:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.dept_alias}.in_(select(SysDept.dept_id).where(or_(SysDept.dept_id == {dept_id}, func.find_in_set({dept_id}, SysDept.ancestors)))) if hasattr({self.query_alias}, '{self.dept_alias}') else 1 == 0"
+        clause_list = []
+        if custom_data_scope_role_id_list:
+            clause_list.append(
+                dept_column.in_(
+                    select(SysRoleDept.dept_id).where(SysRoleDept.role_id.in_(custom_data_scope_role_id_list))
                 )
-            elif role.data_scope == self.DATA_SCOPE_SELF:
-                param_sql_list.append(
-                    f"{self.query_alias}.{self.user_alias} == {user_id} if hasattr({self.query_alias}, '{self.user_alias}') else 1 == 0"
-                )
-            else:
-                param_sql_list.append('1 == 0')
-        param_sql_list = list(dict.fromkeys(param_sql_list))
-        param_sql = f"or_({', '.join(param_sql_list)})"
+                if dept_column is not None
+                else false()
+            )
+        data_scope_set = {data_scope for _, data_scope in role_scope_list}
+        if cls.DATA_SCOPE_DEPT in data_scope_set:
+            clause_list.append(dept_column == dept_id if dept_column is not None else false())
+        if cls.DATA_SCOPE_DEPT_AND_CHILD in data_scope_set:
+            clause_list.append(
+                dept_column.in_(select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id))
+                if dept_column is not None
+                else false()
+            )
+        if cls.DATA_SCOPE_SELF in data_scope_set:
+            clause_list.append(user_column == user_id if user_column is not None else false())
+
+        return or_(false(), *clause_list)
+
+    @classmethod
+    def get_query_model(cls, query_alias: str):
+        """
+        根据sqlalchemy模型名称获取模型类
+
+        :param query_alias: sqlalchemy模型名称
+        :return: 模型类，不存在时返回None
+        """
+        for mapper in Base.registry.mappers:
+            if mapper.class_.__name__ == query_alias:
+                return mapper.class_
 
-        return param_sql
+        return None
@@ -3,6 +3,7 @@ from typing import List, Union
 from exceptions.exception import PermissionException
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.login_service import LoginService
+from utils.permission_util import PermissionIndex
 
 
 class CheckUserInterfaceAuth:
@@ -19,21 +20,18 @@ class CheckUserInterfaceAuth:
         """
         self.perm = perm
         self.is_strict = is_strict
+        # 注册路由时预先将权限标识分段，校验时直接在当前用户的权限标识索引中查找
+        perm_list = [perm] if isinstance(perm, str) else perm
+        self.compiled_perms = [PermissionIndex.compile_permission(perm_str) for perm_str in perm_list]
 
     def __call__(self, current_user: CurrentUserModel = Depends(LoginService.get_current_user)):
-        user_auth_list = current_user.permissions
-        if '*:*:*' in user_auth_list:
-            return True
-        if isinstance(self.perm, str):
-            if self.perm in user_auth_list:
+        permission_index = current_user.permission_index
+        if self.is_strict:
+            if all(permission_index.has_permission(compiled_perm) for compiled_perm in self.compiled_perms):
+                return True
+        else:
+            if any(permission_index.has_permission(compiled_perm) for compiled_perm in self.compiled_perms):
                 return True
-        if isinstance(self.perm, list):
-            if self.is_strict:
-                if all([perm_str in user_auth_list for perm_str in self.perm]):
-                    return True
-            else:
-                if any([perm_str in user_auth_list for perm_str in self.perm]):
-                    return True
         raise PermissionException(data='', message='该用户无此接口权限')
 
 
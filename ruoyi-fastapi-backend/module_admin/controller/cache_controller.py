@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, Request
-from typing import List
+from fastapi import APIRouter, Depends, Query, Request
+from typing import List, Optional
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
-from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheMonitorModel
+from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheKeyPageQueryModel, CacheMonitorModel, CacheStatsModel
 from module_admin.service.cache_service import CacheService
 from module_admin.service.login_service import LoginService
 from utils.log_util import logger
+from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
 
 
@@ -35,17 +36,36 @@ async def get_monitor_cache_name(request: Request):
     return ResponseUtil.success(data=cache_name_list_result)
 
 
+@cacheController.get(
+    '/getStats',
+    response_model=CacheStatsModel,
+    dependencies=[Depends(CheckUserInterfaceAuth('monitor:cache:list'))],
+)
+async def get_monitor_cache_stats(request: Request):
+    # 获取抽样统计数据
+    cache_stats_result = await CacheService.get_cache_monitor_cache_stats_services(request)
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=cache_stats_result)
+
+
 @cacheController.get(
     '/getKeys/{cache_name}',
-    response_model=List[str],
+    response_model=PageResponseModel,
     dependencies=[Depends(CheckUserInterfaceAuth('monitor:cache:list'))],
 )
-async def get_monitor_cache_key(request: Request, cache_name: str):
-    # 获取全量数据
-    cache_key_list_result = await CacheService.get_cache_monitor_cache_key_services(request, cache_name)
+async def get_monitor_cache_key(
+    request: Request,
+    cache_name: str,
+    cache_key_page_query: CacheKeyPageQueryModel = Depends(CacheKeyPageQueryModel.as_query),
+):
+    # 获取分页数据
+    cache_key_page_query_result = await CacheService.get_cache_monitor_cache_key_services(
+        request, cache_name, cache_key_page_query
+    )
     logger.info('获取成功')
 
-    return ResponseUtil.success(data=cache_key_list_result)
+    return ResponseUtil.success(model_content=cache_key_page_query_result)
 
 
 @cacheController.get(
@@ -74,8 +94,12 @@ async def clear_monitor_cache_name(request: Request, cache_name: str):
 @cacheController.delete(
     '/clearCacheKey/{cache_key}', dependencies=[Depends(CheckUserInterfaceAuth('monitor:cache:list'))]
 )
-async def clear_monitor_cache_key(request: Request, cache_key: str):
-    clear_cache_key_result = await CacheService.clear_cache_monitor_cache_key_services(request, cache_key)
+async def clear_monitor_cache_key(
+    request: Request,
+    cache_key: str,
+    cache_name: Optional[str] = Query(default=None, alias='cacheName', description='缓存名称'),
+):
+    clear_cache_key_result = await CacheService.clear_cache_monitor_cache_key_services(request, cache_key, cache_name)
     logger.info(clear_cache_key_result.message)
 
     return ResponseUtil.success(msg=clear_cache_key_result.message)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Request
 from config.enums import RedisInitKeyConfig
 from module_admin.entity.vo.login_vo import CaptchaCode
 from module_admin.service.captcha_service import CaptchaService
+from module_admin.service.config_service import ConfigService
 from utils.response_util import ResponseUtil
 from utils.log_util import logger
 
@@ -13,17 +14,9 @@ captchaController = APIRouter()
 
 @captchaController.get('/captchaImage')
 async def get_captcha_image(request: Request):
-    captcha_enabled = (
-        True
-        if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.captchaEnabled')
-        == 'true'
-        else False
-    )
-    register_enabled = (
-        True
-        if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.registerUser') == 'true'
-        else False
-    )
+    config_snapshot = ConfigService.get_config_snapshot()
+    captcha_enabled = config_snapshot.captcha_enabled
+    register_enabled = config_snapshot.register_enabled
     session_id = str(uuid.uuid4())
     captcha_result = await CaptchaService.create_captcha_image_service()
     image = captcha_result[0]
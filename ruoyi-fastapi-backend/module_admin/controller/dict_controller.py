@@ -1,9 +1,9 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from config.enums import BusinessType
+from config.enums import BusinessType, ExportFormat
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
@@ -18,7 +18,6 @@ from module_admin.entity.vo.dict_vo import (
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.dict_service import DictDataService, DictTypeService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -124,16 +123,14 @@ async def query_detail_system_dict_type(request: Request, dict_id: int, query_db
 async def export_system_dict_type_list(
     request: Request,
     dict_type_page_query: DictTypePageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    dict_type_query_result = await DictTypeService.get_dict_type_list_services(
-        query_db, dict_type_page_query, is_page=False
-    )
-    dict_type_export_result = await DictTypeService.export_dict_type_list_services(dict_type_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    dict_type_export_result = await DictTypeService.export_dict_type_list_services(dict_type_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(dict_type_export_result))
+    return ResponseUtil.streaming(data=dict_type_export_result, media_type=export_format.media_type)
 
 
 @dictController.get('/data/type/{dict_type}')
@@ -147,6 +144,19 @@ async def query_system_dict_type_data(request: Request, dict_type: str, query_db
     return ResponseUtil.success(data=dict_data_query_result)
 
 
+@dictController.get('/data/types')
+async def query_system_dict_types_data(
+    request: Request, dict_types: str = Query(alias='dictTypes', description='字典类型，多个以逗号分隔')
+):
+    # 一次请求批量获取多个字典类型的全量数据
+    dict_data_query_result = await DictDataService.query_dict_data_map_from_cache_services(
+        request.app.state.redis, [dict_type for dict_type in dict_types.split(',') if dict_type]
+    )
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=dict_data_query_result)
+
+
 @dictController.get(
     '/data/list', response_model=PageResponseModel, dependencies=[Depends(CheckUserInterfaceAuth('system:dict:list'))]
 )
@@ -227,13 +237,11 @@ async def query_detail_system_dict_data(request: Request, dict_code: int, query_
 async def export_system_dict_data_list(
     request: Request,
     dict_data_page_query: DictDataPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    dict_data_query_result = await DictDataService.get_dict_data_list_services(
-        query_db, dict_data_page_query, is_page=False
-    )
-    dict_data_export_result = await DictDataService.export_dict_data_list_services(dict_data_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    dict_data_export_result = await DictDataService.export_dict_data_list_services(dict_data_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(dict_data_export_result))
+    return ResponseUtil.streaming(data=dict_data_export_result, media_type=export_format.media_type)
@@ -1,8 +1,9 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.enums import BusinessType
+from typing import Optional
+from config.enums import BusinessType, ExportFormat
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
@@ -16,9 +17,9 @@ from module_admin.entity.vo.job_vo import (
 )
 from module_admin.entity.vo.user_vo import CurrentUserModel
 from module_admin.service.job_log_service import JobLogService
+from module_admin.service.job_metrics_service import JobMetricsService
 from module_admin.service.job_service import JobService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -42,6 +43,28 @@ async def get_system_job_list(
     return ResponseUtil.success(model_content=notice_page_query_result)
 
 
+@jobController.get('/job/metrics', dependencies=[Depends(CheckUserInterfaceAuth('monitor:job:list'))])
+async def get_system_job_metrics(
+    request: Request,
+    job_ids: Optional[str] = Query(default=None, alias='jobIds', description='逗号分隔的任务ID，不传时获取全部任务'),
+    query_db: AsyncSession = Depends(get_db),
+):
+    job_metrics_result = await JobMetricsService.get_job_metrics_services(query_db, request.app.state.redis, job_ids)
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=job_metrics_result)
+
+
+@jobController.get(
+    '/job/tasks', dependencies=[Depends(CheckUserInterfaceAuth(['monitor:job:add', 'monitor:job:edit']))]
+)
+async def get_system_job_task_list(request: Request):
+    job_task_list_result = JobService.get_job_task_list_services()
+    logger.info('获取成功')
+
+    return ResponseUtil.success(data=job_task_list_result)
+
+
 @jobController.post('/job', dependencies=[Depends(CheckUserInterfaceAuth('monitor:job:add'))])
 @ValidateFields(validate_model='add_job')
 @Log(title='定时任务', business_type=BusinessType.INSERT)
@@ -133,14 +156,14 @@ async def query_detail_system_job(request: Request, job_id: int, query_db: Async
 async def export_system_job_list(
     request: Request,
     job_page_query: JobPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    job_query_result = await JobService.get_job_list_services(query_db, job_page_query, is_page=False)
-    job_export_result = await JobService.export_job_list_services(request, job_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    job_export_result = await JobService.export_job_list_services(request, job_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_export_result))
+    return ResponseUtil.streaming(data=job_export_result, media_type=export_format.media_type)
 
 
 @jobController.get(
@@ -184,11 +207,11 @@ async def delete_system_job_log(request: Request, job_log_ids: str, query_db: As
 async def export_system_job_log_list(
     request: Request,
     job_log_page_query: JobLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    job_log_query_result = await JobLogService.get_job_log_list_services(query_db, job_log_page_query, is_page=False)
-    job_log_export_result = await JobLogService.export_job_log_list_services(request, job_log_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    job_log_export_result = await JobLogService.export_job_log_list_services(request, job_log_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(job_log_export_result))
+    return ResponseUtil.streaming(data=job_log_export_result, media_type=export_format.media_type)
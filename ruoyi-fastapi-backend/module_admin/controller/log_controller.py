@@ -1,6 +1,6 @@
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.enums import BusinessType
+from config.enums import BusinessType, ExportFormat
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
@@ -13,7 +13,6 @@ from module_admin.entity.vo.log_vo import (
 )
 from module_admin.service.log_service import LoginLogService, OperationLogService
 from module_admin.service.login_service import LoginService
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -67,18 +66,16 @@ async def delete_system_operation_log(request: Request, oper_ids: str, query_db:
 async def export_system_operation_log_list(
     request: Request,
     operation_log_page_query: OperLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    operation_log_query_result = await OperationLogService.get_operation_log_list_services(
-        query_db, operation_log_page_query, is_page=False
-    )
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
     operation_log_export_result = await OperationLogService.export_operation_log_list_services(
-        request, operation_log_query_result
+        request, operation_log_page_query, export_format
     )
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(operation_log_export_result))
+    return ResponseUtil.streaming(data=operation_log_export_result, media_type=export_format.media_type)
 
 
 @logController.get(
@@ -138,13 +135,11 @@ async def unlock_system_user(request: Request, user_name: str, query_db: AsyncSe
 async def export_system_login_log_list(
     request: Request,
     login_log_page_query: LoginLogPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    login_log_query_result = await LoginLogService.get_login_log_list_services(
-        query_db, login_log_page_query, is_page=False
-    )
-    login_log_export_result = await LoginLogService.export_login_log_list_services(login_log_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    login_log_export_result = await LoginLogService.export_login_log_list_services(login_log_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(login_log_export_result))
+    return ResponseUtil.streaming(data=login_log_export_result, media_type=export_format.media_type)
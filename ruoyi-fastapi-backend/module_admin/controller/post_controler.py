@@ -1,8 +1,8 @@
 from datetime import datetime
-from fastapi import APIRouter, Depends, Form, Request
+from fastapi import APIRouter, Depends, Form, Query, Request
 from pydantic_validation_decorator import ValidateFields
 from sqlalchemy.ext.asyncio import AsyncSession
-from config.enums import BusinessType
+from config.enums import BusinessType, ExportFormat
 from config.get_db import get_db
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
@@ -10,7 +10,6 @@ from module_admin.service.login_service import LoginService
 from module_admin.service.post_service import PostService
 from module_admin.entity.vo.post_vo import DeletePostModel, PostModel, PostPageQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
-from utils.common_util import bytes2file_response
 from utils.log_util import logger
 from utils.page_util import PageResponseModel
 from utils.response_util import ResponseUtil
@@ -95,11 +94,11 @@ async def query_detail_system_post(request: Request, post_id: int, query_db: Asy
 async def export_system_post_list(
     request: Request,
     post_page_query: PostPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
 ):
-    # 获取全量数据
-    post_query_result = await PostService.get_post_list_services(query_db, post_page_query, is_page=False)
-    post_export_result = await PostService.export_post_list_services(post_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    post_export_result = await PostService.export_post_list_services(post_page_query, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(post_export_result))
+    return ResponseUtil.streaming(data=post_export_result, media_type=export_format.media_type)
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
+from typing import Optional
 from module_admin.aspect.interface_auth import CheckUserInterfaceAuth
 from module_admin.entity.vo.server_vo import ServerMonitorModel
 from module_admin.service.login_service import LoginService
@@ -13,9 +14,14 @@ serverController = APIRouter(prefix='/monitor/server', dependencies=[Depends(Log
 @serverController.get(
     '', response_model=ServerMonitorModel, dependencies=[Depends(CheckUserInterfaceAuth('monitor:server:list'))]
 )
-async def get_monitor_server_info(request: Request):
-    # 获取全量数据
-    server_info_query_result = await ServerService.get_server_monitor_info()
+async def get_monitor_server_info(
+    request: Request,
+    history: Optional[int] = Query(
+        default=None, ge=0, description='需要返回的历史数据时间范围（单位：秒），不传时仅返回最近一次采集结果'
+    ),
+):
+    # 获取最近一次后台采集的数据
+    server_info_query_result = await ServerService.get_server_monitor_info(history)
     logger.info('获取成功')
 
     return ResponseUtil.success(data=server_info_query_result)
@@ -1,11 +1,12 @@
 import os
 from datetime import datetime
 from fastapi import APIRouter, Depends, File, Form, Query, Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Literal, Optional, Union
 from pydantic_validation_decorator import ValidateFields
 from config.get_db import get_db
-from config.enums import BusinessType
+from config.enums import BusinessType, ExportFormat
 from config.env import UploadConfig
 from module_admin.annotation.log_annotation import Log
 from module_admin.aspect.data_scope import GetDataScope
@@ -44,7 +45,9 @@ userController = APIRouter(prefix='/system/user', dependencies=[Depends(LoginSer
 
 @userController.get('/deptTree', dependencies=[Depends(CheckUserInterfaceAuth('system:user:list'))])
 async def get_system_dept_tree(
-    request: Request, query_db: AsyncSession = Depends(get_db), data_scope_sql: str = Depends(GetDataScope('SysDept'))
+    request: Request,
+    query_db: AsyncSession = Depends(get_db),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     dept_query_result = await DeptService.get_dept_tree_services(query_db, DeptModel(**{}), data_scope_sql)
     logger.info('获取成功')
@@ -59,7 +62,7 @@ async def get_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Depends(UserPageQueryModel.as_query),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     # 获取分页数据
     user_page_query_result = await UserService.get_user_list_services(
@@ -78,15 +81,15 @@ async def add_system_user(
     add_user: AddUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await DeptService.check_dept_data_scope_services(query_db, add_user.dept_id, dept_data_scope_sql)
         await RoleService.check_role_data_scope_services(
             query_db, ','.join([str(item) for item in add_user.role_ids]), role_data_scope_sql
         )
-    add_user.password = PwdUtil.get_password_hash(add_user.password)
+    add_user.password = await PwdUtil.get_password_hash_async(add_user.password)
     add_user.create_by = current_user.user.user_name
     add_user.create_time = datetime.now()
     add_user.update_by = current_user.user.user_name
@@ -105,9 +108,9 @@ async def edit_system_user(
     edit_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     await UserService.check_user_allowed_services(edit_user)
     if not current_user.user.admin:
@@ -131,7 +134,7 @@ async def delete_system_user(
     user_ids: str,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     user_id_list = user_ids.split(',') if user_ids else []
     if user_id_list:
@@ -157,14 +160,14 @@ async def reset_system_user_pwd(
     reset_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(reset_user)
     if not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, reset_user.user_id, data_scope_sql)
     edit_user = EditUserModel(
         userId=reset_user.user_id,
-        password=PwdUtil.get_password_hash(reset_user.password),
+        password=await PwdUtil.get_password_hash_async(reset_user.password),
         updateBy=current_user.user.user_name,
         updateTime=datetime.now(),
         type='pwd',
@@ -182,7 +185,7 @@ async def change_system_user_status(
     change_user: EditUserModel,
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     await UserService.check_user_allowed_services(change_user)
     if not current_user.user.admin:
@@ -223,7 +226,7 @@ async def query_detail_system_user(
     user_id: Optional[Union[int, Literal['']]] = '',
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
     if user_id and not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, user_id, data_scope_sql)
@@ -321,8 +324,8 @@ async def batch_import_system_user(
     update_support: bool = Query(alias='updateSupport'),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    dept_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    dept_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     batch_import_result = await UserService.batch_import_user_services(
         request, query_db, file, update_support, current_user, user_data_scope_sql, dept_data_scope_sql
@@ -345,17 +348,15 @@ async def export_system_user_template(request: Request, query_db: AsyncSession =
 async def export_system_user_list(
     request: Request,
     user_page_query: UserPageQueryModel = Form(),
+    export_format: ExportFormat = Query(default=ExportFormat.EXCEL, alias='exportFormat', description='导出格式'),
     query_db: AsyncSession = Depends(get_db),
-    data_scope_sql: str = Depends(GetDataScope('SysUser')),
+    data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
 ):
-    # 获取全量数据
-    user_query_result = await UserService.get_user_list_services(
-        query_db, user_page_query, data_scope_sql, is_page=False
-    )
-    user_export_result = await UserService.export_user_list_services(user_query_result)
+    # 分批读取数据并流式写入导出文件，不再一次性加载全量数据
+    user_export_result = await UserService.export_user_list_services(user_page_query, data_scope_sql, export_format)
     logger.info('导出成功')
 
-    return ResponseUtil.streaming(data=bytes2file_response(user_export_result))
+    return ResponseUtil.streaming(data=user_export_result, media_type=export_format.media_type)
 
 
 @userController.get(
@@ -385,8 +386,8 @@ async def update_system_role_user(
     role_ids: str = Query(alias='roleIds'),
     query_db: AsyncSession = Depends(get_db),
     current_user: CurrentUserModel = Depends(LoginService.get_current_user),
-    user_data_scope_sql: str = Depends(GetDataScope('SysUser')),
-    role_data_scope_sql: str = Depends(GetDataScope('SysDept')),
+    user_data_scope_sql: ColumnElement = Depends(GetDataScope('SysUser')),
+    role_data_scope_sql: ColumnElement = Depends(GetDataScope('SysDept')),
 ):
     if not current_user.user.admin:
         await UserService.check_user_data_scope_services(query_db, user_id, user_data_scope_sql)
@@ -1,9 +1,9 @@
-from sqlalchemy import bindparam, func, or_, select, update  # noqa: F401
+from sqlalchemy import bindparam, ColumnElement, delete, func, insert, literal, select, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlalchemy.util import immutabledict
 from typing import List
-from module_admin.entity.do.dept_do import SysDept
-from module_admin.entity.do.role_do import SysRoleDept  # noqa: F401
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.user_do import SysUser
 from module_admin.entity.vo.dept_vo import DeptModel
 
@@ -68,7 +68,7 @@ class DeptDao:
         return dept_info
 
     @classmethod
-    async def get_dept_info_for_edit_option(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_info_for_edit_option(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: ColumnElement):
         """
         获取部门编辑对应的在用部门列表信息
 
@@ -82,13 +82,12 @@ class DeptDao:
                 await db.execute(
                     select(SysDept)
                     .where(
-                        SysDept.dept_id != dept_info.dept_id,
                         ~SysDept.dept_id.in_(
-                            select(SysDept.dept_id).where(func.find_in_set(dept_info.dept_id, SysDept.ancestors))
+                            select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_info.dept_id)
                         ),
                         SysDept.del_flag == '0',
                         SysDept.status == '0',
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -110,13 +109,21 @@ class DeptDao:
         :return: 子部门信息列表
         """
         dept_result = (
-            (await db.execute(select(SysDept).where(func.find_in_set(dept_id, SysDept.ancestors)))).scalars().all()
+            (
+                await db.execute(
+                    select(SysDept)
+                    .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+                    .where(SysDeptClosure.ancestor_id == dept_id, SysDeptClosure.depth > 0)
+                )
+            )
+            .scalars()
+            .all()
         )
 
         return dept_result
 
     @classmethod
-    async def get_dept_list_for_tree(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: str):
+    async def get_dept_list_for_tree(cls, db: AsyncSession, dept_info: DeptModel, data_scope_sql: ColumnElement):
         """
         获取所有在用部门列表信息
 
@@ -133,7 +140,7 @@ class DeptDao:
                         SysDept.status == '0',
                         SysDept.del_flag == '0',
                         SysDept.dept_name.like(f'%{dept_info.dept_name}%') if dept_info.dept_name else True,
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -146,7 +153,7 @@ class DeptDao:
         return dept_result
 
     @classmethod
-    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_list(cls, db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement):
         """
         根据查询参数获取部门列表信息
 
@@ -164,7 +171,7 @@ class DeptDao:
                         SysDept.dept_id == page_object.dept_id if page_object.dept_id is not None else True,
                         SysDept.status == page_object.status if page_object.status else True,
                         SysDept.dept_name.like(f'%{page_object.dept_name}%') if page_object.dept_name else True,
-                        eval(data_scope_sql),
+                        data_scope_sql,
                     )
                     .order_by(SysDept.order_num)
                     .distinct()
@@ -224,6 +231,94 @@ class DeptDao:
             execution_options=immutabledict({'synchronize_session': None}),
         )
 
+    @classmethod
+    async def add_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        新增部门层级关系数据库操作
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :param parent_id: 父部门id
+        :return:
+        """
+        await db.execute(insert(SysDeptClosure).values(ancestor_id=dept_id, descendant_id=dept_id, depth=0))
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(SysDeptClosure.ancestor_id, literal(dept_id), SysDeptClosure.depth + 1).where(
+                    SysDeptClosure.descendant_id == parent_id
+                ),
+            )
+        )
+
+    @classmethod
+    async def move_dept_closure_dao(cls, db: AsyncSession, dept_id: int, parent_id: int):
+        """
+        将部门及其子部门移动到新的父部门下时更新部门层级关系数据库操作
+
+        :param db: orm对象
+        :param dept_id: 部门id
+        :param parent_id: 新的父部门id
+        :return:
+        """
+        subtree_dept_id_list = (
+            (await db.execute(select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == dept_id)))
+            .scalars()
+            .all()
+        )
+        # 断开子树与原祖先部门的关联，子树内部的层级关系保持不变
+        await db.execute(
+            delete(SysDeptClosure).where(
+                SysDeptClosure.descendant_id.in_(subtree_dept_id_list),
+                SysDeptClosure.ancestor_id.not_in(subtree_dept_id_list),
+            )
+        )
+        super_tree = aliased(SysDeptClosure)
+        sub_tree = aliased(SysDeptClosure)
+        await db.execute(
+            insert(SysDeptClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(super_tree.ancestor_id, sub_tree.descendant_id, super_tree.depth + sub_tree.depth + 1)
+                .select_from(super_tree)
+                .join(sub_tree, true())
+                .where(super_tree.descendant_id == parent_id, sub_tree.ancestor_id == dept_id),
+            )
+        )
+
+    @classmethod
+    async def count_dept_closure_dao(cls, db: AsyncSession):
+        """
+        获取部门层级关系数量
+
+        :param db: orm对象
+        :return: 部门层级关系数量
+        """
+        dept_closure_count = (await db.execute(select(func.count('*')).select_from(SysDeptClosure))).scalar()
+
+        return dept_closure_count
+
+    @classmethod
+    async def rebuild_dept_closure_dao(cls, db: AsyncSession):
+        """
+        根据部门祖级列表重建部门层级关系数据库操作
+
+        :param db: orm对象
+        :return:
+        """
+        dept_list = (await db.execute(select(SysDept.dept_id, SysDept.ancestors))).all()
+        dept_closure_list = []
+        for dept_id, ancestors in dept_list:
+            dept_closure_list.append({'ancestor_id': dept_id, 'descendant_id': dept_id, 'depth': 0})
+            # 祖级列表以根节点0开头，0不是实际存在的部门，不记录层级关系
+            ancestor_id_list = [
+                int(ancestor_id) for ancestor_id in (ancestors or '').split(',') if ancestor_id and ancestor_id != '0'
+            ]
+            for depth, ancestor_id in enumerate(reversed(ancestor_id_list), start=1):
+                dept_closure_list.append({'ancestor_id': ancestor_id, 'descendant_id': dept_id, 'depth': depth})
+        await db.execute(delete(SysDeptClosure))
+        if dept_closure_list:
+            await db.execute(insert(SysDeptClosure), dept_closure_list)
+
     @classmethod
     async def update_dept_status_normal_dao(cls, db: AsyncSession, dept_id_list: List):
         """
@@ -263,7 +358,13 @@ class DeptDao:
             await db.execute(
                 select(func.count('*'))
                 .select_from(SysDept)
-                .where(SysDept.status == '0', SysDept.del_flag == '0', func.find_in_set(dept_id, SysDept.ancestors))
+                .join(SysDeptClosure, SysDeptClosure.descendant_id == SysDept.dept_id)
+                .where(
+                    SysDeptClosure.ancestor_id == dept_id,
+                    SysDeptClosure.depth > 0,
+                    SysDept.status == '0',
+                    SysDept.del_flag == '0',
+                )
             )
         ).scalar()
 
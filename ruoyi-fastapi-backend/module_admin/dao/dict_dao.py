@@ -1,6 +1,7 @@
 from datetime import datetime, time
 from sqlalchemy import and_, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from module_admin.entity.do.dict_do import SysDictType, SysDictData
 from module_admin.entity.vo.dict_vo import DictDataModel, DictDataPageQueryModel, DictTypeModel, DictTypePageQueryModel
 from utils.page_util import PageUtil
@@ -62,14 +63,12 @@ class DictTypeDao:
         return list_format_datetime(dict_type_info)
 
     @classmethod
-    async def get_dict_type_list(cls, db: AsyncSession, query_object: DictTypePageQueryModel, is_page: bool = False):
+    def get_dict_type_list_query(cls, query_object: DictTypePageQueryModel):
         """
-        根据查询参数获取字典类型列表信息
+        根据查询参数构建字典类型列表查询语句
 
-        :param db: orm对象
         :param query_object: 查询参数对象
-        :param is_page: 是否开启分页
-        :return: 字典类型列表信息对象
+        :return: 字典类型列表查询语句
         """
         query = (
             select(SysDictType)
@@ -87,6 +86,20 @@ class DictTypeDao:
             .order_by(SysDictType.dict_id)
             .distinct()
         )
+
+        return query
+
+    @classmethod
+    async def get_dict_type_list(cls, db: AsyncSession, query_object: DictTypePageQueryModel, is_page: bool = False):
+        """
+        根据查询参数获取字典类型列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 字典类型列表信息对象
+        """
+        query = cls.get_dict_type_list_query(query_object)
         dict_type_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return dict_type_list
@@ -175,14 +188,12 @@ class DictDataDao:
         return dict_data_info
 
     @classmethod
-    async def get_dict_data_list(cls, db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False):
+    def get_dict_data_list_query(cls, query_object: DictDataPageQueryModel):
         """
-        根据查询参数获取字典数据列表信息
+        根据查询参数构建字典数据列表查询语句
 
-        :param db: orm对象
         :param query_object: 查询参数对象
-        :param is_page: 是否开启分页
-        :return: 字典数据列表信息对象
+        :return: 字典数据列表查询语句
         """
         query = (
             select(SysDictData)
@@ -194,6 +205,20 @@ class DictDataDao:
             .order_by(SysDictData.dict_sort)
             .distinct()
         )
+
+        return query
+
+    @classmethod
+    async def get_dict_data_list(cls, db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False):
+        """
+        根据查询参数获取字典数据列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 字典数据列表信息对象
+        """
+        query = cls.get_dict_data_list_query(query_object)
         dict_data_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return dict_data_list
@@ -228,6 +253,33 @@ class DictDataDao:
 
         return dict_data_list
 
+    @classmethod
+    async def get_dict_data_group_list(cls, db: AsyncSession, dict_types: Optional[List[str]] = None):
+        """
+        获取多个字典类型对应的字典数据信息
+
+        :param db: orm对象
+        :param dict_types: 字典类型列表，为空时获取全部字典类型
+        :return: 字典类型及字典数据列表，字典类型下没有字典数据时字典数据为None
+        """
+        dict_data_group_list = (
+            await db.execute(
+                select(SysDictType.dict_type, SysDictData)
+                .select_from(SysDictType)
+                .where(
+                    SysDictType.dict_type.in_(dict_types) if dict_types is not None else True, SysDictType.status == '0'
+                )
+                .join(
+                    SysDictData,
+                    and_(SysDictType.dict_type == SysDictData.dict_type, SysDictData.status == '0'),
+                    isouter=True,
+                )
+                .order_by(SysDictType.dict_type, SysDictData.dict_sort)
+            )
+        ).all()
+
+        return dict_data_group_list
+
     @classmethod
     async def add_dict_data_dao(cls, db: AsyncSession, dict_data: DictDataModel):
         """
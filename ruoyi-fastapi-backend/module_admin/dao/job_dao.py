@@ -1,5 +1,6 @@
 from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from module_admin.entity.do.job_do import SysJob
 from module_admin.entity.vo.job_vo import JobModel, JobPageQueryModel
 from utils.page_util import PageUtil
@@ -53,14 +54,12 @@ class JobDao:
         return job_info
 
     @classmethod
-    async def get_job_list(cls, db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False):
+    def get_job_list_query(cls, query_object: JobPageQueryModel):
         """
-        根据查询参数获取定时任务列表信息
+        根据查询参数构建定时任务列表查询语句
 
-        :param db: orm对象
         :param query_object: 查询参数对象
-        :param is_page: 是否开启分页
-        :return: 定时任务列表信息对象
+        :return: 定时任务列表查询语句
         """
         query = (
             select(SysJob)
@@ -72,6 +71,20 @@ class JobDao:
             .order_by(SysJob.job_id)
             .distinct()
         )
+
+        return query
+
+    @classmethod
+    async def get_job_list(cls, db: AsyncSession, query_object: JobPageQueryModel, is_page: bool = False):
+        """
+        根据查询参数获取定时任务列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 定时任务列表信息对象
+        """
+        query = cls.get_job_list_query(query_object)
         job_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return job_list
@@ -88,6 +101,29 @@ class JobDao:
 
         return job_list
 
+    @classmethod
+    async def get_job_list_by_ids(cls, db: AsyncSession, job_id_list: Optional[List[int]] = None):
+        """
+        根据定时任务id列表获取定时任务列表信息
+
+        :param db: orm对象
+        :param job_id_list: 定时任务id列表，为空时获取全部定时任务
+        :return: 定时任务列表信息对象
+        """
+        job_list = (
+            (
+                await db.execute(
+                    select(SysJob)
+                    .where(SysJob.job_id.in_(job_id_list) if job_id_list is not None else True)
+                    .order_by(SysJob.job_id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        return job_list
+
     @classmethod
     async def add_job_dao(cls, db: AsyncSession, job: JobModel):
         """
@@ -1,6 +1,7 @@
 from datetime import datetime, time
-from sqlalchemy import asc, delete, desc, select
+from sqlalchemy import asc, delete, desc, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
 from module_admin.entity.do.log_do import SysLogininfor, SysOperLog
 from module_admin.entity.vo.log_vo import LogininforModel, LoginLogPageQueryModel, OperLogModel, OperLogPageQueryModel
 from utils.common_util import SnakeCaseUtil
@@ -14,14 +15,12 @@ class OperationLogDao:
     """
 
     @classmethod
-    async def get_operation_log_list(cls, db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False):
+    def get_operation_log_order_by_column(cls, query_object: OperLogPageQueryModel):
         """
-        根据查询参数获取操作日志列表信息
+        根据查询参数获取操作日志列表排序条件
 
-        :param db: orm对象
         :param query_object: 查询参数对象
-        :param is_page: 是否开启分页
-        :return: 操作日志列表信息对象
+        :return: 操作日志列表排序条件
         """
         if query_object.is_asc == 'ascending':
             order_by_column = asc(getattr(SysOperLog, SnakeCaseUtil.camel_to_snake(query_object.order_by_column), None))
@@ -31,6 +30,18 @@ class OperationLogDao:
             )
         else:
             order_by_column = desc(SysOperLog.oper_time)
+
+        return order_by_column
+
+    @classmethod
+    def get_operation_log_list_query(cls, query_object: OperLogPageQueryModel):
+        """
+        根据查询参数构建操作日志列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 操作日志列表查询语句
+        """
+        order_by_column = cls.get_operation_log_order_by_column(query_object)
         query = (
             select(SysOperLog)
             .where(
@@ -48,7 +59,32 @@ class OperationLogDao:
             .distinct()
             .order_by(order_by_column)
         )
-        operation_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
+
+        return query
+
+    @classmethod
+    async def get_operation_log_list(cls, db: AsyncSession, query_object: OperLogPageQueryModel, is_page: bool = False):
+        """
+        根据查询参数获取操作日志列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 操作日志列表信息对象
+        """
+        query = cls.get_operation_log_list_query(query_object)
+        if is_page and query_object.cursor is not None:
+            order_by_column = cls.get_operation_log_order_by_column(query_object)
+            primary_key_column = (
+                asc(SysOperLog.oper_id) if query_object.is_asc == 'ascending' else desc(SysOperLog.oper_id)
+            )
+            operation_log_list = await PageUtil.cursor_paginate(
+                db, query, query_object.cursor, query_object.page_size, [order_by_column, primary_key_column]
+            )
+        else:
+            operation_log_list = await PageUtil.paginate(
+                db, query, query_object.page_num, query_object.page_size, is_page
+            )
 
         return operation_log_list
 
@@ -67,6 +103,20 @@ class OperationLogDao:
 
         return db_operation_log
 
+    @classmethod
+    async def add_operation_log_batch_dao(cls, db: AsyncSession, operation_log_list: List[OperLogModel]):
+        """
+        批量新增操作日志数据库操作
+
+        :param db: orm对象
+        :param operation_log_list: 操作日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysOperLog),
+            [operation_log.model_dump(exclude={'oper_id'}) for operation_log in operation_log_list],
+        )
+
     @classmethod
     async def delete_operation_log_dao(cls, db: AsyncSession, operation_log: OperLogModel):
         """
@@ -95,14 +145,12 @@ class LoginLogDao:
     """
 
     @classmethod
-    async def get_login_log_list(cls, db: AsyncSession, query_object: LoginLogPageQueryModel, is_page: bool = False):
+    def get_login_log_order_by_column(cls, query_object: LoginLogPageQueryModel):
         """
-        根据查询参数获取登录日志列表信息
+        根据查询参数获取登录日志列表排序条件
 
-        :param db: orm对象
         :param query_object: 查询参数对象
-        :param is_page: 是否开启分页
-        :return: 登录日志列表信息对象
+        :return: 登录日志列表排序条件
         """
         if query_object.is_asc == 'ascending':
             order_by_column = asc(
@@ -114,6 +162,18 @@ class LoginLogDao:
             )
         else:
             order_by_column = desc(SysLogininfor.login_time)
+
+        return order_by_column
+
+    @classmethod
+    def get_login_log_list_query(cls, query_object: LoginLogPageQueryModel):
+        """
+        根据查询参数构建登录日志列表查询语句
+
+        :param query_object: 查询参数对象
+        :return: 登录日志列表查询语句
+        """
+        order_by_column = cls.get_login_log_order_by_column(query_object)
         query = (
             select(SysLogininfor)
             .where(
@@ -130,7 +190,30 @@ class LoginLogDao:
             .distinct()
             .order_by(order_by_column)
         )
-        login_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
+
+        return query
+
+    @classmethod
+    async def get_login_log_list(cls, db: AsyncSession, query_object: LoginLogPageQueryModel, is_page: bool = False):
+        """
+        根据查询参数获取登录日志列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param is_page: 是否开启分页
+        :return: 登录日志列表信息对象
+        """
+        query = cls.get_login_log_list_query(query_object)
+        if is_page and query_object.cursor is not None:
+            order_by_column = cls.get_login_log_order_by_column(query_object)
+            primary_key_column = (
+                asc(SysLogininfor.info_id) if query_object.is_asc == 'ascending' else desc(SysLogininfor.info_id)
+            )
+            login_log_list = await PageUtil.cursor_paginate(
+                db, query, query_object.cursor, query_object.page_size, [order_by_column, primary_key_column]
+            )
+        else:
+            login_log_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return login_log_list
 
@@ -149,6 +232,19 @@ class LoginLogDao:
 
         return db_login_log
 
+    @classmethod
+    async def add_login_log_batch_dao(cls, db: AsyncSession, login_log_list: List[LogininforModel]):
+        """
+        批量新增登录日志数据库操作
+
+        :param db: orm对象
+        :param login_log_list: 登录日志对象列表
+        :return:
+        """
+        await db.execute(
+            insert(SysLogininfor), [login_log.model_dump(exclude={'info_id'}) for login_log in login_log_list]
+        )
+
     @classmethod
     async def delete_login_log_dao(cls, db: AsyncSession, login_log: LogininforModel):
         """
@@ -1,5 +1,7 @@
 from sqlalchemy import and_, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+from config.constant import MenuConstant
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.role_do import SysRole, SysRoleMenu
 from module_admin.entity.do.user_do import SysUser, SysUserRole
@@ -93,6 +95,30 @@ class MenuDao:
 
         return menu_query_all
 
+    @classmethod
+    async def get_router_menu_list_by_role_ids(cls, db: AsyncSession, role_id_list: List[int]):
+        """
+        根据角色id列表获取生成路由所需的在用目录及菜单列表信息
+
+        :param db: orm对象
+        :param role_id_list: 角色id列表
+        :return: 按显示顺序排列的目录及菜单列表信息
+        """
+        query = select(SysMenu).where(
+            SysMenu.status == '0', SysMenu.menu_type.in_([MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU])
+        )
+        if 1 not in role_id_list:
+            query = query.where(
+                SysMenu.menu_id.in_(
+                    select(SysRoleMenu.menu_id)
+                    .join(SysRole, SysRoleMenu.role_id == SysRole.role_id)
+                    .where(SysRole.role_id.in_(role_id_list), SysRole.status == '0', SysRole.del_flag == '0')
+                )
+            )
+        menu_query_all = (await db.execute(query.order_by(SysMenu.order_num, SysMenu.menu_id))).scalars().all()
+
+        return menu_query_all
+
     @classmethod
     async def get_menu_list(cls, db: AsyncSession, page_object: MenuQueryModel, user_id: int, role: list):
         """
@@ -1,5 +1,5 @@
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update  # noqa: F401
+from sqlalchemy import and_, ColumnElement, delete, desc, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from module_admin.entity.do.dept_do import SysDept
 from module_admin.entity.do.menu_do import SysMenu
@@ -125,17 +125,13 @@ class RoleDao:
         return role_info
 
     @classmethod
-    async def get_role_list(
-        cls, db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
-    ):
+    def get_role_list_query(cls, query_object: RolePageQueryModel, data_scope_sql: ColumnElement):
         """
-        根据查询参数获取角色列表信息
+        根据查询参数构建角色列表查询语句
 
-        :param db: orm对象
         :param query_object: 查询参数对象
         :param data_scope_sql: 数据权限对应的查询sql语句
-        :param is_page: 是否开启分页
-        :return: 角色列表信息对象
+        :return: 角色列表查询语句
         """
         query = (
             select(SysRole)
@@ -154,11 +150,28 @@ class RoleDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .order_by(SysRole.role_sort)
             .distinct()
         )
+
+        return query
+
+    @classmethod
+    async def get_role_list(
+        cls, db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: ColumnElement, is_page: bool = False
+    ):
+        """
+        根据查询参数获取角色列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param is_page: 是否开启分页
+        :return: 角色列表信息对象
+        """
+        query = cls.get_role_list_query(query_object, data_scope_sql)
         role_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return role_list
@@ -1,10 +1,13 @@
+import asyncio
 from datetime import datetime, time
-from sqlalchemy import and_, delete, desc, func, or_, select, update
+from sqlalchemy import and_, ColumnElement, delete, desc, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from module_admin.entity.do.dept_do import SysDept
+from typing import List, NamedTuple, Optional
+from config.env import DataBaseConfig
+from module_admin.entity.do.dept_do import SysDept, SysDeptClosure
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.do.post_do import SysPost
-from module_admin.entity.do.role_do import SysRole, SysRoleDept, SysRoleMenu  # noqa: F401
+from module_admin.entity.do.role_do import SysRole, SysRoleMenu
 from module_admin.entity.do.user_do import SysUser, SysUserPost, SysUserRole
 from module_admin.entity.vo.user_vo import (
     UserModel,
@@ -17,11 +20,26 @@ from module_admin.entity.vo.user_vo import (
 from utils.page_util import PageUtil
 
 
+class UserAggregate(NamedTuple):
+    """
+    用户聚合信息
+    """
+
+    user_basic_info: Optional[SysUser]
+    user_dept_info: Optional[SysDept]
+    user_role_info: List[SysRole]
+    user_post_info: List[SysPost]
+    user_perms: List[Optional[str]]
+
+
 class UserDao:
     """
     用户管理模块数据库操作层
     """
 
+    # 每次并发查询用户聚合信息最多额外占用3个连接，限制同时进行的并发查询数，额外占用的连接数不超过连接池的30%
+    _aggregate_semaphore = asyncio.Semaphore(max(DataBaseConfig.db_pool_size // 10, 1))
+
     @classmethod
     async def get_user_by_name(cls, db: AsyncSession, user_name: str):
         """
@@ -78,109 +96,13 @@ class UserDao:
     @classmethod
     async def get_user_by_id(cls, db: AsyncSession, user_id: int):
         """
-        根据user_id获取用户信息
+        根据user_id获取在用用户的信息
 
         :param db: orm对象
         :param user_id: 用户id
-        :return: 当前user_id的用户信息对象
+        :return: 当前user_id的用户聚合信息，包含用户、部门、角色、岗位及菜单权限标识
         """
-        query_user_basic_info = (
-            (
-                await db.execute(
-                    select(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .distinct()
-                )
-            )
-            .scalars()
-            .first()
-        )
-        query_user_dept_info = (
-            (
-                await db.execute(
-                    select(SysDept)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(
-                        SysDept,
-                        and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
-                    )
-                    .distinct()
-                )
-            )
-            .scalars()
-            .first()
-        )
-        query_user_role_info = (
-            (
-                await db.execute(
-                    select(SysRole)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                    .join(
-                        SysRole,
-                        and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
-                    )
-                    .distinct()
-                )
-            )
-            .scalars()
-            .all()
-        )
-        query_user_post_info = (
-            (
-                await db.execute(
-                    select(SysPost)
-                    .select_from(SysUser)
-                    .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserPost, SysUser.user_id == SysUserPost.user_id, isouter=True)
-                    .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'))
-                    .distinct()
-                )
-            )
-            .scalars()
-            .all()
-        )
-        role_id_list = [item.role_id for item in query_user_role_info]
-        if 1 in role_id_list:
-            query_user_menu_info = (
-                (await db.execute(select(SysMenu).where(SysMenu.status == '0').distinct())).scalars().all()
-            )
-        else:
-            query_user_menu_info = (
-                (
-                    await db.execute(
-                        select(SysMenu)
-                        .select_from(SysUser)
-                        .where(SysUser.status == '0', SysUser.del_flag == '0', SysUser.user_id == user_id)
-                        .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                        .join(
-                            SysRole,
-                            and_(
-                                SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'
-                            ),
-                            isouter=True,
-                        )
-                        .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id, isouter=True)
-                        .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
-                        .order_by(SysMenu.order_num)
-                        .distinct()
-                    )
-                )
-                .scalars()
-                .all()
-            )
-
-        results = dict(
-            user_basic_info=query_user_basic_info,
-            user_dept_info=query_user_dept_info,
-            user_role_info=query_user_role_info,
-            user_post_info=query_user_post_info,
-            user_menu_info=query_user_menu_info,
-        )
-
-        return results
+        return await cls.get_user_aggregate(db, user_id, active_only=True, with_perms=True)
 
     @classmethod
     async def get_user_detail_by_id(cls, db: AsyncSession, user_id: int):
@@ -189,112 +111,118 @@ class UserDao:
 
         :param db: orm对象
         :param user_id: 用户id
-        :return: 当前user_id的用户信息对象
+        :return: 当前user_id的用户聚合信息，包含用户、部门、角色及岗位
         """
-        query_user_basic_info = (
-            (await db.execute(select(SysUser).where(SysUser.del_flag == '0', SysUser.user_id == user_id).distinct()))
-            .scalars()
-            .first()
-        )
-        query_user_dept_info = (
-            (
-                await db.execute(
-                    select(SysDept)
-                    .select_from(SysUser)
-                    .where(SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(
-                        SysDept,
-                        and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
-                    )
-                    .distinct()
-                )
+        return await cls.get_user_aggregate(db, user_id, active_only=False, with_perms=False)
+
+    @classmethod
+    async def get_user_aggregate(cls, db: AsyncSession, user_id: int, active_only: bool, with_perms: bool):
+        """
+        获取用户聚合信息，当前会话尚未占用连接时，用户及部门在当前会话中查询，角色、岗位及菜单权限标识分别在连接池的其他连接中同时查询；
+        当前会话已占用连接或同时进行的并发查询数已达上限时，在当前会话中依次查询，避免持有连接的同时等待其他连接
+
+        :param db: orm对象
+        :param user_id: 用户id
+        :param active_only: 是否仅查询状态正常的用户
+        :param with_perms: 是否查询用户角色对应的菜单权限标识
+        :return: 用户聚合信息
+        """
+        user_conditions = [SysUser.del_flag == '0', SysUser.user_id == user_id]
+        if active_only:
+            user_conditions.append(SysUser.status == '0')
+        role_query = (
+            select(SysRole)
+            .select_from(SysUser)
+            .where(*user_conditions)
+            .join(SysUserRole, SysUser.user_id == SysUserRole.user_id)
+            .join(
+                SysRole,
+                and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
             )
-            .scalars()
-            .first()
+            .distinct()
         )
-        query_user_role_info = (
-            (
-                await db.execute(
-                    select(SysRole)
-                    .select_from(SysUser)
-                    .where(SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
-                    .join(
-                        SysRole,
-                        and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
-                    )
-                    .distinct()
-                )
-            )
-            .scalars()
-            .all()
+        post_query = (
+            select(SysPost)
+            .select_from(SysUser)
+            .where(*user_conditions)
+            .join(SysUserPost, SysUser.user_id == SysUserPost.user_id)
+            .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'))
+            .distinct()
         )
-        query_user_post_info = (
-            (
-                await db.execute(
-                    select(SysPost)
-                    .select_from(SysUser)
-                    .where(SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserPost, SysUser.user_id == SysUserPost.user_id, isouter=True)
-                    .join(SysPost, and_(SysUserPost.post_id == SysPost.post_id, SysPost.status == '0'))
-                    .distinct()
-                )
+        perms_query = (
+            select(SysMenu.perms)
+            .select_from(SysUser)
+            .where(*user_conditions)
+            .join(SysUserRole, SysUser.user_id == SysUserRole.user_id)
+            .join(
+                SysRole,
+                and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
             )
-            .scalars()
-            .all()
+            .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id)
+            .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
+            .distinct()
         )
-        query_user_menu_info = (
-            (
+
+        async def query_user_and_dept():
+            return (
                 await db.execute(
-                    select(SysMenu)
-                    .select_from(SysUser)
-                    .where(SysUser.del_flag == '0', SysUser.user_id == user_id)
-                    .join(SysUserRole, SysUser.user_id == SysUserRole.user_id, isouter=True)
+                    select(SysUser, SysDept)
+                    .where(*user_conditions)
                     .join(
-                        SysRole,
-                        and_(SysUserRole.role_id == SysRole.role_id, SysRole.status == '0', SysRole.del_flag == '0'),
+                        SysDept,
+                        and_(SysUser.dept_id == SysDept.dept_id, SysDept.status == '0', SysDept.del_flag == '0'),
                         isouter=True,
                     )
-                    .join(SysRoleMenu, SysRole.role_id == SysRoleMenu.role_id, isouter=True)
-                    .join(SysMenu, and_(SysRoleMenu.menu_id == SysMenu.menu_id, SysMenu.status == '0'))
-                    .distinct()
                 )
-            )
-            .scalars()
-            .all()
-        )
-        results = dict(
-            user_basic_info=query_user_basic_info,
-            user_dept_info=query_user_dept_info,
-            user_role_info=query_user_role_info,
-            user_post_info=query_user_post_info,
-            user_menu_info=query_user_menu_info,
+            ).first()
+
+        async def execute_query(session: AsyncSession, query, scalars: bool):
+            result = await session.execute(query)
+            return result.scalars().all() if scalars else result.all()
+
+        async def query_in_new_session(query, scalars: bool):
+            # 同一会话不能并发执行查询，因此使用连接池中的其他连接
+            async with AsyncSession(bind=db.bind, expire_on_commit=False) as session:
+                return await execute_query(session, query, scalars)
+
+        related_queries = [(role_query, True), (post_query, True)]
+        if with_perms:
+            related_queries.append((perms_query, False))
+        if db.in_transaction() or cls._aggregate_semaphore.locked():
+            query_results = [await query_user_and_dept()]
+            for query, scalars in related_queries:
+                query_results.append(await execute_query(db, query, scalars))
+        else:
+            async with cls._aggregate_semaphore:
+                query_results = await asyncio.gather(
+                    query_user_and_dept(),
+                    *[query_in_new_session(query, scalars) for query, scalars in related_queries],
+                )
+        user_and_dept = query_results[0]
+
+        return UserAggregate(
+            user_basic_info=user_and_dept[0] if user_and_dept else None,
+            user_dept_info=user_and_dept[1] if user_and_dept else None,
+            user_role_info=list(query_results[1]),
+            user_post_info=list(query_results[2]),
+            user_perms=[row.perms for row in query_results[3]] if with_perms else [],
         )
 
-        return results
-
     @classmethod
-    async def get_user_list(
-        cls, db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
-    ):
+    def get_user_list_query(cls, query_object: UserPageQueryModel, data_scope_sql: ColumnElement):
         """
-        根据查询参数获取用户列表信息
+        根据查询参数构建用户列表查询语句
 
-        :param db: orm对象
         :param query_object: 查询参数对象
         :param data_scope_sql: 数据权限对应的查询sql语句
-        :param is_page: 是否开启分页
-        :return: 用户列表信息对象
+        :return: 用户列表查询语句
         """
         query = (
             select(SysUser, SysDept)
             .where(
                 SysUser.del_flag == '0',
-                or_(
-                    SysUser.dept_id == query_object.dept_id,
-                    SysUser.dept_id.in_(
-                        select(SysDept.dept_id).where(func.find_in_set(query_object.dept_id, SysDept.ancestors))
-                    ),
+                SysUser.dept_id.in_(
+                    select(SysDeptClosure.descendant_id).where(SysDeptClosure.ancestor_id == query_object.dept_id)
                 )
                 if query_object.dept_id
                 else True,
@@ -311,7 +239,7 @@ class UserDao:
                 )
                 if query_object.begin_time and query_object.end_time
                 else True,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .join(
                 SysDept,
@@ -321,6 +249,23 @@ class UserDao:
             .order_by(SysUser.user_id)
             .distinct()
         )
+
+        return query
+
+    @classmethod
+    async def get_user_list(
+        cls, db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: ColumnElement, is_page: bool = False
+    ):
+        """
+        根据查询参数获取用户列表信息
+
+        :param db: orm对象
+        :param query_object: 查询参数对象
+        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param is_page: 是否开启分页
+        :return: 用户列表信息对象
+        """
+        query = cls.get_user_list_query(query_object, data_scope_sql)
         user_list = await PageUtil.paginate(db, query, query_object.page_num, query_object.page_size, is_page)
 
         return user_list
@@ -399,7 +344,11 @@ class UserDao:
 
     @classmethod
     async def get_user_role_allocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配的用户列表信息
@@ -420,7 +369,7 @@ class UserDao:
                 SysUser.user_name == query_object.user_name if query_object.user_name else True,
                 SysUser.phonenumber == query_object.phonenumber if query_object.phonenumber else True,
                 SysRole.role_id == query_object.role_id,
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .distinct()
         )
@@ -430,7 +379,11 @@ class UserDao:
 
     @classmethod
     async def get_user_role_unallocated_list_by_role_id(
-        cls, db: AsyncSession, query_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        db: AsyncSession,
+        query_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配的用户列表信息
@@ -459,7 +412,7 @@ class UserDao:
                         and_(SysUserRole.user_id == SysUser.user_id, SysUserRole.role_id == query_object.role_id),
                     )
                 ),
-                eval(data_scope_sql),
+                data_scope_sql,
             )
             .distinct()
         )
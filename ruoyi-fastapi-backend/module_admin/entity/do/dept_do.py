@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from config.database import Base
 
 
@@ -24,3 +24,17 @@ class SysDept(Base):
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
     update_by = Column(String(64), nullable=True, default='', comment='更新者')
     update_time = Column(DateTime, nullable=True, default=datetime.now(), comment='更新时间')
+
+
+class SysDeptClosure(Base):
+    """
+    部门层级关系表
+    """
+
+    __tablename__ = 'sys_dept_closure'
+
+    ancestor_id = Column(Integer, primary_key=True, nullable=False, comment='祖先部门id')
+    descendant_id = Column(Integer, primary_key=True, nullable=False, comment='后代部门id')
+    depth = Column(Integer, nullable=False, default=0, comment='层级距离（0代表自身）')
+
+    idx_sys_dept_closure_d = Index('idx_sys_dept_closure_d', descendant_id)
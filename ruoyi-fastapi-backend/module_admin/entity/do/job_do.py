@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Index, Integer, String
 from config.database import Base
 
 
@@ -51,4 +51,12 @@ class SysJobLog(Base):
     job_message = Column(String(500), nullable=True, default='', comment='日志信息')
     status = Column(String(1), nullable=True, default='0', comment='执行状态（0正常 1失败）')
     exception_info = Column(String(2000), nullable=True, default='', comment='异常信息')
+    scheduled_time = Column(DateTime, nullable=True, comment='计划执行时间')
+    run_start_time = Column(DateTime, nullable=True, comment='实际开始执行时间')
+    run_end_time = Column(DateTime, nullable=True, comment='执行结束时间')
+    run_duration = Column(Integer, nullable=True, comment='执行耗时（毫秒）')
+    run_delay = Column(Integer, nullable=True, comment='实际开始执行时间较计划执行时间的延迟（毫秒）')
+    misfire_count = Column(Integer, nullable=True, default=0, comment='距上次执行错过执行的次数')
     create_time = Column(DateTime, nullable=True, default=datetime.now(), comment='创建时间')
+
+    idx_sys_job_log_ct = Index('idx_sys_job_log_ct', create_time)
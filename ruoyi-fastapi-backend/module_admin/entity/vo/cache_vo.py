@@ -1,6 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 from typing import Any, List, Optional
+from module_admin.annotation.pydantic_annotation import as_query
 
 
 class CacheMonitorModel(BaseModel):
@@ -26,3 +27,45 @@ class CacheInfoModel(BaseModel):
     cache_name: Optional[str] = Field(default=None, description='缓存名称')
     cache_value: Optional[Any] = Field(default=None, description='缓存内容')
     remark: Optional[str] = Field(default=None, description='备注')
+
+
+@as_query
+class CacheKeyPageQueryModel(BaseModel):
+    """
+    缓存键名分页查询模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    cache_key: Optional[str] = Field(default=None, description='缓存键名关键字')
+    cursor: Optional[str] = Field(default=None, description='上一页返回的游标，为空时查询第一页')
+    page_size: int = Field(default=100, description='每页记录数，每批SCAN结果全部返回，实际数量可能略多于该值')
+
+
+class CacheNameStatsModel(BaseModel):
+    """
+    缓存名称键数量及内存占用统计对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    cache_name: Optional[str] = Field(default=None, description='缓存名称，为空时表示不属于系统内置缓存名称的键')
+    remark: Optional[str] = Field(default=None, description='备注')
+    scanned_count: Optional[int] = Field(default=None, description='遍历到的键数量')
+    key_count: Optional[int] = Field(default=None, description='键数量，未遍历全部键时为估算值')
+    memory_sampled_count: Optional[int] = Field(default=None, description='内存占用抽样键数量')
+    memory_usage: Optional[int] = Field(default=None, description='内存占用（单位：字节），未抽样全部键时为估算值')
+    memory_human: Optional[str] = Field(default=None, description='内存占用')
+
+
+class CacheStatsModel(BaseModel):
+    """
+    缓存键数量及内存占用统计对应pydantic模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    db_size: Optional[int] = Field(default=None, description='Key数量')
+    scanned_count: Optional[int] = Field(default=None, description='遍历的键数量')
+    is_estimated: Optional[bool] = Field(default=None, description='键数量是否为按遍历比例估算的值')
+    stats: Optional[List[CacheNameStatsModel]] = Field(default=[], description='各缓存名称统计信息')
@@ -2,8 +2,9 @@ from datetime import datetime
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
 from pydantic_validation_decorator import NotBlank, Size
-from typing import Literal, Optional
+from typing import Dict, Literal, Optional
 from module_admin.annotation.pydantic_annotation import as_query
+from utils.ip_util import IpMatcher
 
 
 class ConfigModel(BaseModel):
@@ -72,3 +73,18 @@ class DeleteConfigModel(BaseModel):
     model_config = ConfigDict(alias_generator=to_camel)
 
     config_ids: str = Field(description='需要删除的参数主键')
+
+
+class ConfigSnapshotModel(BaseModel):
+    """
+    参数配置进程内快照模型，包含预先解析的常用参数
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    loaded: bool = Field(default=False, description='快照是否已加载')
+    values: Dict[str, str] = Field(default_factory=dict, description='参数键名与参数键值的映射')
+    captcha_enabled: bool = Field(default=False, description='是否开启验证码功能')
+    register_enabled: bool = Field(default=False, description='是否开启用户注册功能')
+    init_password: Optional[str] = Field(default=None, description='用户初始密码')
+    black_ip_matcher: IpMatcher = Field(default_factory=IpMatcher, description='用户登录IP黑名单匹配器')
@@ -65,9 +65,52 @@ class JobLogModel(BaseModel):
     job_message: Optional[str] = Field(default=None, description='日志信息')
     status: Optional[Literal['0', '1']] = Field(default=None, description='执行状态（0正常 1失败）')
     exception_info: Optional[str] = Field(default=None, description='异常信息')
+    scheduled_time: Optional[datetime] = Field(default=None, description='计划执行时间')
+    run_start_time: Optional[datetime] = Field(default=None, description='实际开始执行时间')
+    run_end_time: Optional[datetime] = Field(default=None, description='执行结束时间')
+    run_duration: Optional[int] = Field(default=None, description='执行耗时（毫秒）')
+    run_delay: Optional[int] = Field(default=None, description='实际开始执行时间较计划执行时间的延迟（毫秒）')
+    misfire_count: Optional[int] = Field(default=None, description='距上次执行错过执行的次数')
     create_time: Optional[datetime] = Field(default=None, description='创建时间')
 
 
+class JobTaskModel(BaseModel):
+    """
+    已注册定时任务函数模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    invoke_target: str = Field(description='调用目标字符串')
+    is_async: bool = Field(description='是否为异步函数')
+    picklable: bool = Field(description='能否在进程池执行器中执行')
+
+
+class JobMetricsModel(BaseModel):
+    """
+    定时任务执行指标模型
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    job_id: int = Field(description='任务ID')
+    job_name: Optional[str] = Field(default=None, description='任务名称')
+    job_group: Optional[str] = Field(default=None, description='任务组名')
+    run_count: int = Field(default=0, description='累计执行次数')
+    error_count: int = Field(default=0, description='累计执行失败次数')
+    misfire_count: int = Field(default=0, description='累计错过执行次数')
+    sample_count: int = Field(default=0, description='统计窗口内的执行次数')
+    duration_avg: Optional[float] = Field(default=None, description='执行耗时平均值（毫秒）')
+    duration_p50: Optional[int] = Field(default=None, description='执行耗时50分位（毫秒）')
+    duration_p90: Optional[int] = Field(default=None, description='执行耗时90分位（毫秒）')
+    duration_p99: Optional[int] = Field(default=None, description='执行耗时99分位（毫秒）')
+    duration_max: Optional[int] = Field(default=None, description='执行耗时最大值（毫秒）')
+    delay_p50: Optional[int] = Field(default=None, description='开始执行延迟50分位（毫秒）')
+    delay_p90: Optional[int] = Field(default=None, description='开始执行延迟90分位（毫秒）')
+    delay_p99: Optional[int] = Field(default=None, description='开始执行延迟99分位（毫秒）')
+    delay_max: Optional[int] = Field(default=None, description='开始执行延迟最大值（毫秒）')
+
+
 class JobQueryModel(JobModel):
     """
     定时任务管理不分页查询模型
@@ -122,6 +165,9 @@ class JobLogPageQueryModel(JobLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    cursor: Optional[str] = Field(
+        default=None, description='游标分页时上一页返回的游标，传入空字符串查询第一页，不传时使用页码分页'
+    )
 
 
 class DeleteJobLogModel(BaseModel):
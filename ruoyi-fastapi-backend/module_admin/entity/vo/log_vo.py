@@ -76,6 +76,9 @@ class OperLogPageQueryModel(OperLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    cursor: Optional[str] = Field(
+        default=None, description='游标分页时上一页返回的游标，传入空字符串查询第一页，不传时使用页码分页'
+    )
 
 
 class DeleteOperLogModel(BaseModel):
@@ -109,6 +112,9 @@ class LoginLogPageQueryModel(LoginLogQueryModel):
 
     page_num: int = Field(default=1, description='当前页码')
     page_size: int = Field(default=10, description='每页记录数')
+    cursor: Optional[str] = Field(
+        default=None, description='游标分页时上一页返回的游标，传入空字符串查询第一页，不传时使用页码分页'
+    )
 
 
 class DeleteLoginLogModel(BaseModel):
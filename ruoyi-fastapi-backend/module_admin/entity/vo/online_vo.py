@@ -32,6 +32,16 @@ class OnlineQueryModel(OnlineModel):
     end_time: Optional[str] = Field(default=None, description='结束时间')
 
 
+@as_query
+class OnlinePageQueryModel(OnlineQueryModel):
+    """
+    在线用户分页查询模型
+    """
+
+    page_num: int = Field(default=1, description='当前页码')
+    page_size: int = Field(default=10, description='每页记录数')
+
+
 class DeleteOnlineModel(BaseModel):
     """
     强退在线用户模型
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class CpuInfo(BaseModel):
@@ -53,6 +53,36 @@ class SysFiles(BaseModel):
     usage: Optional[str] = Field(default=None, description='资源的使用率')
 
 
+class NetInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    sent: Optional[str] = Field(default=None, description='累计发送量')
+    recv: Optional[str] = Field(default=None, description='累计接收量')
+    sent_rate: Optional[str] = Field(default=None, description='发送速率')
+    recv_rate: Optional[str] = Field(default=None, description='接收速率')
+
+
+class CaptchaPoolInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel)
+
+    max_size: Optional[int] = Field(default=None, description='验证码池最大容量')
+    size: Optional[int] = Field(default=None, description='验证码池当前数量')
+    produced: Optional[int] = Field(default=None, description='累计生成数量')
+    served_from_pool: Optional[int] = Field(default=None, description='从验证码池中取出的数量')
+    served_on_demand: Optional[int] = Field(default=None, description='验证码池为空时即时生成的数量')
+    refill_rate: Optional[float] = Field(default=None, description='最近一分钟每秒补充数量')
+
+
+class PwdPoolInfo(BaseModel):
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+    max_workers: Optional[int] = Field(default=None, description='密码线程池最大线程数')
+    max_queue_size: Optional[int] = Field(default=None, description='密码线程池最大排队数')
+    queued: Optional[int] = Field(default=None, description='排队中任务数')
+    running: Optional[int] = Field(default=None, description='执行中任务数')
+    completed: Optional[int] = Field(default=None, description='累计完成任务数')
+
+
 class ServerMonitorModel(BaseModel):
     """
     服务监控对应pydantic模型
@@ -65,3 +95,10 @@ class ServerMonitorModel(BaseModel):
     mem: Optional[MemoryInfo] = Field(description='內存相关信息')
     sys: Optional[SysInfo] = Field(description='服务器相关信息')
     sys_files: Optional[List[SysFiles]] = Field(description='磁盘相关信息')
+    net: Optional[NetInfo] = Field(default=None, description='网络相关信息')
+    captcha_pool: Optional[CaptchaPoolInfo] = Field(default=None, description='验证码池相关信息')
+    pwd_pool: Optional[PwdPoolInfo] = Field(default=None, description='密码线程池相关信息')
+    sample_time: Optional[str] = Field(default=None, description='采集时间')
+    history: Optional[Dict[str, List[float]]] = Field(
+        default=None, description='历史采集数据，按列存储，timestamp为毫秒时间戳'
+    )
@@ -1,6 +1,6 @@
 import re
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, Field, model_validator
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr, model_validator
 from pydantic.alias_generators import to_camel
 from pydantic_validation_decorator import Network, NotBlank, Size, Xss
 from typing import List, Literal, Optional, Union
@@ -9,6 +9,7 @@ from module_admin.annotation.pydantic_annotation import as_query
 from module_admin.entity.vo.dept_vo import DeptModel
 from module_admin.entity.vo.post_vo import PostModel
 from module_admin.entity.vo.role_vo import RoleModel
+from utils.permission_util import PermissionIndex
 
 
 class TokenData(BaseModel):
@@ -125,6 +126,16 @@ class CurrentUserModel(BaseModel):
     permissions: List = Field(description='权限信息')
     roles: List = Field(description='角色信息')
     user: Union[UserInfoModel, None] = Field(description='用户信息')
+    _permission_index: Optional[PermissionIndex] = PrivateAttr(default=None)
+
+    @property
+    def permission_index(self) -> PermissionIndex:
+        """
+        权限标识索引，首次使用时根据权限信息构建，随登录用户信息缓存一并复用
+        """
+        if self._permission_index is None:
+            self._permission_index = PermissionIndex(self.permissions)
+        return self._permission_index
 
 
 class UserDetailModel(BaseModel):
@@ -1,15 +1,36 @@
+import random
+import re
 from fastapi import Request
+from redis import asyncio as aioredis
+from typing import AsyncIterator, Dict, List, Optional
+from config.constant import CacheConstant
 from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig
 from config.get_redis import RedisUtil
-from module_admin.entity.vo.cache_vo import CacheInfoModel, CacheMonitorModel
+from exceptions.exception import ServiceException
+from module_admin.entity.vo.cache_vo import (
+    CacheInfoModel,
+    CacheKeyPageQueryModel,
+    CacheMonitorModel,
+    CacheNameStatsModel,
+    CacheStatsModel,
+)
 from module_admin.entity.vo.common_vo import CrudResponseModel
+from module_admin.service.principal_cache_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
+from utils.cache_util import CacheSyncUtil
+from utils.common_util import bytes2human
+from utils.page_util import PageResponseModel, PageUtil
 
 
 class CacheService:
     """
-    缓存监控模块服务层
+    缓存监控模块服务层，键的遍历及删除均使用SCAN游标分批进行，避免KEYS命令阻塞redis
     """
 
+    # 菜单版本号只能递增，版本号回退后仍未过期的旧版本路由缓存会被重新读取，因此不允许删除
+    protected_keys = (RedisInitKeyConfig.SYS_ROUTER_VERSION.key,)
+
     @classmethod
     async def get_cache_monitor_statistical_info_services(cls, request: Request):
         """
@@ -49,18 +70,118 @@ class CacheService:
         return name_list
 
     @classmethod
-    async def get_cache_monitor_cache_key_services(cls, request: Request, cache_name: str):
+    async def get_cache_monitor_cache_stats_services(cls, request: Request):
+        """
+        获取各缓存名称键数量及内存占用统计信息service
+
+        :param request: Request对象
+        :return: 缓存键数量及内存占用统计信息
+        """
+        redis: aioredis.Redis = request.app.state.redis
+        key_config_map = {key_config.key: key_config for key_config in RedisInitKeyConfig}
+        scanned_count_map: Dict[Optional[str], int] = {}
+        sample_keys_map: Dict[Optional[str], List[str]] = {}
+        scanned_count = 0
+        cursor = 0
+        while True:
+            cursor, keys = await redis.scan(cursor, count=CacheConfig.cache_monitor_scan_count)
+            for key in keys:
+                scanned_count += 1
+                prefix = key.split(':', 1)[0]
+                cache_name = prefix if prefix in key_config_map else None
+                count = scanned_count_map[cache_name] = scanned_count_map.get(cache_name, 0) + 1
+                # 蓄水池抽样，保证每个键被抽中用于统计内存占用的概率相同
+                sample_keys = sample_keys_map.setdefault(cache_name, [])
+                if len(sample_keys) < CacheConfig.cache_monitor_memory_samples:
+                    sample_keys.append(key)
+                else:
+                    index = random.randrange(count)
+                    if index < CacheConfig.cache_monitor_memory_samples:
+                        sample_keys[index] = key
+            if cursor == 0 or scanned_count >= CacheConfig.cache_monitor_scan_limit:
+                break
+        db_size = await redis.dbsize()
+        is_estimated = cursor != 0
+        # 未遍历全部键时按已遍历键数量占总键数量的比例估算
+        scale = db_size / scanned_count if is_estimated and scanned_count else 1
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for sample_keys in sample_keys_map.values():
+                for key in sample_keys:
+                    pipe.memory_usage(key)
+            # 抽样后被删除或执行失败的键视为未抽样，不影响其余键的统计
+            memory_usages = iter(await pipe.execute(raise_on_error=False))
+
+        stats = []
+        for cache_name, sample_keys in sample_keys_map.items():
+            sample_memory_usages = [
+                memory_usage
+                for _, memory_usage in zip(sample_keys, memory_usages)
+                if isinstance(memory_usage, int) and memory_usage
+            ]
+            key_count = round(scanned_count_map[cache_name] * scale)
+            memory_usage = (
+                round(sum(sample_memory_usages) / len(sample_memory_usages) * key_count) if sample_memory_usages else 0
+            )
+            key_config = key_config_map.get(cache_name)
+            stats.append(
+                CacheNameStatsModel(
+                    cacheName=cache_name,
+                    remark=key_config.remark if key_config else '其他缓存',
+                    scannedCount=scanned_count_map[cache_name],
+                    keyCount=key_count,
+                    memorySampledCount=len(sample_memory_usages),
+                    memoryUsage=memory_usage,
+                    memoryHuman=bytes2human(memory_usage),
+                )
+            )
+        stats.sort(key=lambda item: item.memory_usage, reverse=True)
+
+        return CacheStatsModel(dbSize=db_size, scannedCount=scanned_count, isEstimated=is_estimated, stats=stats)
+
+    @classmethod
+    async def get_cache_monitor_cache_key_services(
+        cls, request: Request, cache_name: str, query_object: CacheKeyPageQueryModel
+    ):
         """
-        获取缓存键名列表信息service
+        分页获取缓存键名列表信息service
 
         :param request: Request对象
         :param cache_name: 缓存名称
-        :return: 缓存键名列表信息
+        :param query_object: 分页查询参数对象
+        :return: 缓存键名分页列表信息
         """
-        cache_keys = await request.app.state.redis.keys(f'{cache_name}*')
-        cache_key_list = [key.split(':', 1)[1] for key in cache_keys if key.startswith(f'{cache_name}:')]
+        redis: aioredis.Redis = request.app.state.redis
+        page_size = min(max(query_object.page_size, 1), CacheConfig.cache_monitor_scan_count)
+        match = f'{cls.__escape_pattern(cache_name)}:*'
+        if query_object.cache_key:
+            match = f'{cls.__escape_pattern(cache_name)}:*{cls.__escape_pattern(query_object.cache_key)}*'
+        # 每页数量为软限制，每批SCAN结果全部返回，下一页始终从SCAN返回的下一游标继续，不重复读取同一批结果
+        cursor = 0
+        if query_object.cursor:
+            cursor_values = PageUtil.decode_cursor(query_object.cursor)
+            if len(cursor_values) != 1 or not isinstance(cursor_values[0], int) or cursor_values[0] <= 0:
+                raise ServiceException(message='分页游标无效')
+            cursor = cursor_values[0]
+        cache_key_list = []
+        scanned_count = 0
+        while True:
+            cursor, keys = await redis.scan(cursor, match=match, count=page_size)
+            scanned_count += page_size
+            cache_key_list.extend(keys)
+            if cursor == 0 or len(cache_key_list) >= page_size:
+                break
+            if scanned_count >= CacheConfig.cache_monitor_scan_limit:
+                # 匹配的键较稀疏时提前返回当前页，避免单次请求遍历过多的键
+                break
+        has_next = cursor != 0
 
-        return cache_key_list
+        return PageResponseModel(
+            rows=[key.split(':', 1)[1] for key in cache_key_list],
+            page_size=page_size,
+            has_next=has_next,
+            next_cursor=PageUtil.encode_cursor([cursor]) if has_next else None,
+        )
 
     @classmethod
     async def get_cache_monitor_cache_value_services(cls, request: Request, cache_name: str, cache_key: str):
@@ -85,24 +206,42 @@ class CacheService:
         :param cache_name: 缓存名称
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys(f'{cache_name}*')
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        redis: aioredis.Redis = request.app.state.redis
+        if cache_name not in cls.protected_keys:
+            await redis.unlink(cache_name)
+        await cls.__unlink_keys(redis, cls.__scan_keys(redis, f'{cls.__escape_pattern(cache_name)}:*'))
+        await cls.__evict_local_cache(redis, cache_name)
 
         return CrudResponseModel(is_success=True, message=f'{cache_name}对应键值清除成功')
 
     @classmethod
-    async def clear_cache_monitor_cache_key_services(cls, request: Request, cache_key: str):
+    async def clear_cache_monitor_cache_key_services(
+        cls, request: Request, cache_key: str, cache_name: Optional[str] = None
+    ):
         """
-        清除缓存名称对应所有键值service
+        清除缓存键名对应键值service
 
         :param request: Request对象
         :param cache_key: 缓存键名
+        :param cache_name: 缓存名称，为空时清除所有以该键名结尾的键值
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys(f'*{cache_key}')
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        redis: aioredis.Redis = request.app.state.redis
+        if cache_name:
+            cache_keys = [f'{cache_name}:{cache_key}']
+        else:
+            cache_keys = [
+                key async for keys in cls.__scan_keys(redis, f'*{cls.__escape_pattern(cache_key)}') for key in keys
+            ]
+        cache_keys = [key for key in cache_keys if key not in cls.protected_keys]
+        for index in range(0, len(cache_keys), CacheConfig.cache_monitor_scan_count):
+            await redis.unlink(*cache_keys[index : index + CacheConfig.cache_monitor_scan_count])
+        cache_name_key_map: Dict[str, List[str]] = {}
+        for key in cache_keys:
+            key_cache_name, _, key_name = key.partition(':')
+            cache_name_key_map.setdefault(key_cache_name, []).append(key_name)
+        for key_cache_name, key_names in cache_name_key_map.items():
+            await cls.__evict_local_cache(redis, key_cache_name, key_names)
 
         return CrudResponseModel(is_success=True, message=f'{cache_key}清除成功')
 
@@ -114,11 +253,79 @@ class CacheService:
         :param request: Request对象
         :return: 操作缓存响应信息
         """
-        cache_keys = await request.app.state.redis.keys()
-        if cache_keys:
-            await request.app.state.redis.delete(*cache_keys)
+        await cls.__unlink_keys(request.app.state.redis, cls.__scan_keys(request.app.state.redis))
 
         await RedisUtil.init_sys_dict(request.app.state.redis)
         await RedisUtil.init_sys_config(request.app.state.redis)
+        await PrincipalCacheService.invalidate_principal_services()
+        await RouterCacheService.invalidate_router_services()
 
         return CrudResponseModel(is_success=True, message='所有缓存清除成功')
+
+    @classmethod
+    async def __scan_keys(cls, redis: aioredis.Redis, match: Optional[str] = None) -> AsyncIterator[List[str]]:
+        """
+        使用SCAN游标分批获取匹配的键
+
+        :param redis: redis对象
+        :param match: 键名匹配模式，为空时获取全部键
+        :return: 分批返回的键列表
+        """
+        cursor = 0
+        while True:
+            cursor, keys = await redis.scan(cursor, match=match, count=CacheConfig.cache_monitor_scan_count)
+            if keys:
+                yield keys
+            if cursor == 0:
+                break
+
+    @classmethod
+    async def __unlink_keys(cls, redis: aioredis.Redis, key_batches: AsyncIterator[List[str]]):
+        """
+        使用UNLINK分批删除键，键值内存由redis后台线程回收，不允许删除的键会被跳过
+
+        :param redis: redis对象
+        :param key_batches: 分批返回的键列表
+        :return: 删除的键数量
+        """
+        unlink_count = 0
+        async for keys in key_batches:
+            keys = [key for key in keys if key not in cls.protected_keys]
+            if keys:
+                unlink_count += await redis.unlink(*keys)
+
+        return unlink_count
+
+    @classmethod
+    async def __evict_local_cache(cls, redis: aioredis.Redis, cache_name: str, key_names: Optional[List[str]] = None):
+        """
+        清除redis缓存后同步失效各worker中对应的本地缓存，需常驻redis的字典及参数配置缓存从数据库重新加载
+
+        :param redis: redis对象
+        :param cache_name: 缓存名称
+        :param key_names: 清除的缓存键名（不含缓存名称），为空时表示清除了缓存名称对应的全部键值
+        :return:
+        """
+        if cache_name in (RedisInitKeyConfig.SYS_ROUTER.key, RedisInitKeyConfig.SYS_ROUTER_VERSION.key):
+            # 递增菜单版本号，旧版本号的路由缓存不会再被读取
+            await RouterCacheService.invalidate_router_services()
+        elif cache_name == RedisInitKeyConfig.USER_PRINCIPAL.key:
+            await PrincipalCacheService.invalidate_principal_services(key_names)
+        elif cache_name == RedisInitKeyConfig.SYS_DICT.key:
+            if key_names is None:
+                await RedisUtil.init_sys_dict(redis)
+            else:
+                await CacheSyncUtil.publish(CacheConstant.TOPIC_DICT, ','.join(key_names))
+        elif cache_name == RedisInitKeyConfig.SYS_CONFIG.key:
+            # 参数配置快照从redis重建，删除部分键值后需从数据库重新缓存全部参数配置
+            await RedisUtil.init_sys_config(redis)
+
+    @classmethod
+    def __escape_pattern(cls, value: str):
+        """
+        转义键名中的SCAN匹配模式特殊字符
+
+        :param value: 键名
+        :return: 转义后的键名
+        """
+        return re.sub(r'([*?\[\]\\])', r'\\\1', value)
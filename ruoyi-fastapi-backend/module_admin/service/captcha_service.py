@@ -1,26 +1,164 @@
+import asyncio
 import base64
 import io
 import os
 import random
+import threading
+import time
+from collections import deque
 from PIL import Image, ImageDraw, ImageFont
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
+from config.env import CaptchaConfig
+from module_admin.entity.vo.server_vo import CaptchaPoolInfo
+from utils.log_util import logger
 
 
 class CaptchaService:
     """
-    验证码模块服务层
+    验证码模块服务层，后台任务在线程中预先生成验证码放入进程内验证码池，获取验证码时直接从池中取出
     """
 
+    _font: Optional[ImageFont.FreeTypeFont] = None
+    # 同一字体对象不能在多个线程中同时绘制
+    _font_lock = threading.Lock()
+    _pool: deque = deque()
+    _refill_event: Optional[asyncio.Event] = None
+    _producer_task: Optional[asyncio.Task] = None
+    _produced_history: deque = deque()
+    _produced = 0
+    _served_from_pool = 0
+    _served_on_demand = 0
+
     @classmethod
     async def create_captcha_image_service(cls):
+        """
+        获取图片验证码service，优先从验证码池中取出，验证码池为空时即时生成
+
+        :return: 验证码图片的base64字符串及计算结果
+        """
+        try:
+            captcha = cls._pool.popleft()
+            cls._served_from_pool += 1
+        except IndexError:
+            captcha = None
+        if cls._refill_event is not None:
+            cls._refill_event.set()
+        if captcha is None:
+            cls._served_on_demand += 1
+            captcha = await run_in_threadpool(cls.__render_captcha)
+
+        return list(captcha)
+
+    @classmethod
+    async def init_captcha_pool_services(cls):
+        """
+        应用启动时启动验证码池后台生成任务
+
+        :return:
+        """
+        if CaptchaConfig.captcha_pool_size <= 0 or cls._producer_task is not None:
+            return
+        cls._refill_event = asyncio.Event()
+        cls._refill_event.set()
+        cls._producer_task = asyncio.create_task(cls.__produce_captcha())
+        logger.info('验证码池启动成功')
+
+    @classmethod
+    async def close_captcha_pool_services(cls):
+        """
+        应用关闭时停止验证码池后台生成任务
+
+        :return:
+        """
+        if cls._producer_task is None:
+            return
+        cls._producer_task.cancel()
+        try:
+            await cls._producer_task
+        except asyncio.CancelledError:
+            pass
+        cls._producer_task = None
+        cls._refill_event = None
+        cls._pool.clear()
+        logger.info('验证码池关闭成功')
+
+    @classmethod
+    def get_captcha_pool_stats(cls):
+        """
+        获取验证码池运行状态
+
+        :return: 验证码池最大容量、当前数量、累计生成数、从池中取出数、即时生成数及最近一分钟每秒补充数量
+        """
+        cls.__trim_produced_history()
+        return CaptchaPoolInfo(
+            maxSize=CaptchaConfig.captcha_pool_size,
+            size=len(cls._pool),
+            produced=cls._produced,
+            servedFromPool=cls._served_from_pool,
+            servedOnDemand=cls._served_on_demand,
+            refillRate=round(sum(count for _, count in cls._produced_history) / 60, 2),
+        )
+
+    @classmethod
+    async def __produce_captcha(cls):
+        """
+        持续在线程中批量生成验证码，补充验证码池至最大容量后等待下次取出
+
+        :return:
+        """
+        while True:
+            await cls._refill_event.wait()
+            cls._refill_event.clear()
+            while len(cls._pool) < CaptchaConfig.captcha_pool_size:
+                batch_size = min(
+                    CaptchaConfig.captcha_pool_refill_batch_size, CaptchaConfig.captcha_pool_size - len(cls._pool)
+                )
+                try:
+                    captchas = await run_in_threadpool(cls.__render_captcha_batch, batch_size)
+                except Exception as e:
+                    logger.exception(e)
+                    await asyncio.sleep(1)
+                    continue
+                cls._pool.extend(captchas)
+                cls._produced += len(captchas)
+                cls._produced_history.append((time.monotonic(), len(captchas)))
+                cls.__trim_produced_history()
+
+    @classmethod
+    def __trim_produced_history(cls):
+        """
+        清理一分钟之前的验证码生成记录
+
+        :return:
+        """
+        expire_before = time.monotonic() - 60
+        while cls._produced_history and cls._produced_history[0][0] < expire_before:
+            cls._produced_history.popleft()
+
+    @classmethod
+    def __render_captcha_batch(cls, batch_size: int) -> List[Tuple[str, int]]:
+        """
+        批量生成验证码，减少线程切换次数
+
+        :param batch_size: 生成数量
+        :return: 验证码列表
+        """
+        return [cls.__render_captcha() for _ in range(batch_size)]
+
+    @classmethod
+    def __render_captcha(cls) -> Tuple[str, int]:
+        """
+        生成一张验证码图片
+
+        :return: 验证码图片的base64字符串及计算结果
+        """
         # 创建空白图像
         image = Image.new('RGB', (160, 60), color='#EAEAEA')
 
         # 创建绘图对象
         draw = ImageDraw.Draw(image)
 
-        # 设置字体
-        font = ImageFont.truetype(os.path.join(os.path.abspath(os.getcwd()), 'assets', 'font', 'Arial.ttf'), size=30)
-
         # 生成两个0-9之间的随机整数
         num1 = random.randint(0, 9)
         num2 = random.randint(0, 9)
@@ -36,7 +174,8 @@ class CaptchaService:
             result = num1 * num2
         # 绘制文本
         text = f'{num1} {operational_character} {num2} = ?'
-        draw.text((25, 15), text, fill='blue', font=font)
+        with cls._font_lock:
+            draw.text((25, 15), text, fill='blue', font=cls.__get_font())
 
         # 将图像数据保存到内存中
         buffer = io.BytesIO()
@@ -45,4 +184,17 @@ class CaptchaService:
         # 将图像数据转换为base64字符串
         base64_string = base64.b64encode(buffer.getvalue()).decode()
 
-        return [base64_string, result]
+        return base64_string, result
+
+    @classmethod
+    def __get_font(cls) -> ImageFont.FreeTypeFont:
+        """
+        获取验证码字体，字体文件仅在首次使用时加载
+
+        :return: 字体对象
+        """
+        if cls._font is None:
+            cls._font = ImageFont.truetype(
+                os.path.join(os.path.abspath(os.getcwd()), 'assets', 'font', 'Arial.ttf'), size=30
+            )
+        return cls._font
@@ -1,14 +1,22 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from config.constant import CommonConstant
-from config.enums import RedisInitKeyConfig
+from typing import Dict
+from config.constant import CacheConstant, CommonConstant
+from config.enums import ExportFormat, RedisInitKeyConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.config_dao import ConfigDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
-from module_admin.entity.vo.config_vo import ConfigModel, ConfigPageQueryModel, DeleteConfigModel
+from module_admin.entity.vo.config_vo import (
+    ConfigModel,
+    ConfigPageQueryModel,
+    ConfigSnapshotModel,
+    DeleteConfigModel,
+)
+from utils.cache_util import CacheSyncUtil
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
+from utils.ip_util import IpMatcher
+from utils.page_util import PageUtil
 
 
 class ConfigService:
@@ -16,6 +24,8 @@ class ConfigService:
     参数配置管理模块服务层
     """
 
+    snapshot = ConfigSnapshotModel()
+
     @classmethod
     async def get_config_list_services(
         cls, query_db: AsyncSession, query_object: ConfigPageQueryModel, is_page: bool = False
@@ -41,17 +51,22 @@ class ConfigService:
         :param redis: redis对象
         :return:
         """
-        # 获取以sys_config:开头的键列表
-        keys = await redis.keys(f'{RedisInitKeyConfig.SYS_CONFIG.key}:*')
-        # 删除匹配的键
-        if keys:
-            await redis.delete(*keys)
         config_all = await ConfigDao.get_config_list(query_db, ConfigPageQueryModel(**dict()), is_page=False)
-        for config_obj in config_all:
-            await redis.set(
-                f"{RedisInitKeyConfig.SYS_CONFIG.key}:{config_obj.get('configKey')}",
-                config_obj.get('configValue'),
-            )
+        config_map = {config_obj.get('configKey'): config_obj.get('configValue') for config_obj in config_all}
+        # 使用SCAN获取已删除参数的缓存键，避免KEYS阻塞redis
+        stale_keys = [
+            key
+            async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.SYS_CONFIG.key}:*', count=1000)
+            if key.split(':', 1)[-1] not in config_map
+        ]
+        async with redis.pipeline(transaction=False) as pipe:
+            if stale_keys:
+                pipe.delete(*stale_keys)
+            for config_key, config_value in config_map.items():
+                pipe.set(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{config_key}', config_value)
+            await pipe.execute()
+        cls.snapshot = cls.__build_config_snapshot(config_map)
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_CONFIG)
 
     @classmethod
     async def query_config_list_from_cache_services(cls, redis, config_key: str):
@@ -62,10 +77,67 @@ class ConfigService:
         :param config_key: 参数键名
         :return: 参数键名对应值
         """
+        if cls.snapshot.loaded:
+            return cls.snapshot.values.get(config_key)
         result = await redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:{config_key}')
 
         return result
 
+    @classmethod
+    def get_config_snapshot(cls) -> ConfigSnapshotModel:
+        """
+        获取参数配置进程内快照，无需访问redis
+
+        :return: 参数配置快照
+        """
+        return cls.snapshot
+
+    @classmethod
+    async def reload_config_snapshot_services(cls, redis):
+        """
+        从redis重新加载参数配置进程内快照service
+
+        :param redis: redis对象
+        :return:
+        """
+        config_keys = [key async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.SYS_CONFIG.key}:*', count=1000)]
+        config_values = await redis.mget(config_keys) if config_keys else []
+        cls.snapshot = cls.__build_config_snapshot(
+            {
+                config_key.split(':', 1)[-1]: config_value
+                for config_key, config_value in zip(config_keys, config_values)
+                if config_value is not None
+            }
+        )
+
+    @classmethod
+    async def evict_local_config(cls, payload: str):
+        """
+        参数配置变更时重新加载当前进程的参数配置快照
+
+        :param payload: 失效消息内容
+        :return:
+        """
+        if CacheSyncUtil.redis is not None:
+            await cls.reload_config_snapshot_services(CacheSyncUtil.redis)
+
+    @staticmethod
+    def __build_config_snapshot(config_map: Dict[str, str]):
+        """
+        根据参数键值对构建参数配置快照
+
+        :param config_map: 参数键名与参数键值的映射
+        :return: 参数配置快照
+        """
+        return ConfigSnapshotModel(
+            loaded=True,
+            values=config_map,
+            captcha_enabled=config_map.get('sys.account.captchaEnabled') == 'true',
+            register_enabled=config_map.get('sys.account.registerUser') == 'true',
+            init_password=config_map.get('sys.user.initPassword'),
+            black_ip_matcher=IpMatcher(config_map.get('sys.login.blackIPList')),
+        )
+
     @classmethod
     async def check_config_key_unique_services(cls, query_db: AsyncSession, page_object: ConfigModel):
         """
@@ -100,6 +172,7 @@ class ConfigService:
                 await request.app.state.redis.set(
                     f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                 )
+                await CacheSyncUtil.publish(CacheConstant.TOPIC_CONFIG)
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -131,6 +204,7 @@ class ConfigService:
                     await request.app.state.redis.set(
                         f'{RedisInitKeyConfig.SYS_CONFIG.key}:{page_object.config_key}', page_object.config_value
                     )
+                    await CacheSyncUtil.publish(CacheConstant.TOPIC_CONFIG)
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -162,6 +236,7 @@ class ConfigService:
                 await query_db.commit()
                 if delete_config_key_list:
                     await request.app.state.redis.delete(*delete_config_key_list)
+                    await CacheSyncUtil.publish(CacheConstant.TOPIC_CONFIG)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -187,12 +262,15 @@ class ConfigService:
         return result
 
     @staticmethod
-    async def export_config_list_services(config_list: List):
+    async def export_config_list_services(
+        query_object: ConfigPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出参数配置信息service
 
-        :param config_list: 参数配置信息列表
-        :return: 参数配置信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 参数配置信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -208,12 +286,15 @@ class ConfigService:
             'remark': '备注',
         }
 
-        for item in config_list:
+        def format_config(item: Dict):
             if item.get('configType') == 'Y':
                 item['configType'] = '是'
             else:
                 item['configType'] = '否'
-        binary_data = ExcelUtil.export_list2excel(config_list, mapping_dict)
+            return item
+
+        config_stream = PageUtil.stream(ConfigDao.get_config_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(config_stream, mapping_dict, export_format, format_config)
 
         return binary_data
 
@@ -229,3 +310,6 @@ class ConfigService:
         await cls.init_cache_sys_config_services(query_db, request.app.state.redis)
 
         return CrudResponseModel(is_success=True, message='刷新成功')
+
+
+CacheSyncUtil.register(CacheConstant.TOPIC_CONFIG, ConfigService.evict_local_config)
@@ -1,10 +1,17 @@
+import asyncio
+from redis import asyncio as aioredis
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from config.constant import CommonConstant
+from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig
 from exceptions.exception import ServiceException, ServiceWarning
 from module_admin.dao.dept_dao import DeptDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.dept_vo import DeleteDeptModel, DeptModel
+from module_admin.service.principal_cache_service import PrincipalCacheService
 from utils.common_util import CamelCaseUtil
+from utils.lock_util import RedisLock
 
 
 class DeptService:
@@ -13,7 +20,9 @@ class DeptService:
     """
 
     @classmethod
-    async def get_dept_tree_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_tree_services(
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
+    ):
         """
         获取部门树信息service
 
@@ -29,7 +38,7 @@ class DeptService:
 
     @classmethod
     async def get_dept_for_edit_option_services(
-        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
     ):
         """
         获取部门编辑部门树信息service
@@ -44,7 +53,9 @@ class DeptService:
         return CamelCaseUtil.transform_result(dept_list_result)
 
     @classmethod
-    async def get_dept_list_services(cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: str):
+    async def get_dept_list_services(
+        cls, query_db: AsyncSession, page_object: DeptModel, data_scope_sql: ColumnElement
+    ):
         """
         获取部门列表信息service
 
@@ -58,7 +69,7 @@ class DeptService:
         return CamelCaseUtil.transform_result(dept_list_result)
 
     @classmethod
-    async def check_dept_data_scope_services(cls, query_db: AsyncSession, dept_id: int, data_scope_sql: str):
+    async def check_dept_data_scope_services(cls, query_db: AsyncSession, dept_id: int, data_scope_sql: ColumnElement):
         """
         校验部门是否有数据权限service
 
@@ -106,7 +117,8 @@ class DeptService:
             raise ServiceException(message=f'部门{parent_info.dept_name}停用，不允许新增')
         page_object.ancestors = f'{parent_info.ancestors},{page_object.parent_id}'
         try:
-            await DeptDao.add_dept_dao(query_db, page_object)
+            add_dept = await DeptDao.add_dept_dao(query_db, page_object)
+            await DeptDao.add_dept_closure_dao(query_db, add_dept.dept_id, page_object.parent_id)
             await query_db.commit()
             return CrudResponseModel(is_success=True, message='新增成功')
         except Exception as e:
@@ -133,12 +145,22 @@ class DeptService:
             raise ServiceException(message=f'修改部门{page_object.dept_name}失败，该部门包含未停用的子部门')
         new_parent_dept = await DeptDao.get_dept_by_id(query_db, page_object.parent_id)
         old_dept = await DeptDao.get_dept_by_id(query_db, page_object.dept_id)
+        if (
+            new_parent_dept
+            and old_dept
+            and old_dept.parent_id != page_object.parent_id
+            and page_object.parent_id
+            in [child.dept_id for child in await DeptDao.get_children_dept_dao(query_db, page_object.dept_id)]
+        ):
+            raise ServiceException(message=f'修改部门{page_object.dept_name}失败，上级部门不能是自己的下级部门')
         try:
             if new_parent_dept and old_dept:
                 new_ancestors = f'{new_parent_dept.ancestors},{new_parent_dept.dept_id}'
                 old_ancestors = old_dept.ancestors
                 page_object.ancestors = new_ancestors
                 await cls.update_dept_children(query_db, page_object.dept_id, new_ancestors, old_ancestors)
+                if old_dept.parent_id != page_object.parent_id:
+                    await DeptDao.move_dept_closure_dao(query_db, page_object.dept_id, page_object.parent_id)
             edit_dept = page_object.model_dump(exclude_unset=True)
             await DeptDao.edit_dept_dao(query_db, edit_dept)
             if (
@@ -148,6 +170,7 @@ class DeptService:
             ):
                 await cls.update_parent_dept_status_normal(query_db, page_object)
             await query_db.commit()
+            await PrincipalCacheService.invalidate_principal_services()
             return CrudResponseModel(is_success=True, message='更新成功')
         except Exception as e:
             await query_db.rollback()
@@ -197,6 +220,37 @@ class DeptService:
 
         return result
 
+    @classmethod
+    async def init_dept_closure_services(cls, query_db: AsyncSession, redis: aioredis.Redis):
+        """
+        应用启动时初始化部门层级关系service，层级关系表为空时根据部门祖级列表重建，多worker部署时仅由获得分布式锁的worker重建，其余worker等待重建完成
+
+        :param query_db: orm对象
+        :param redis: redis对象
+        :return:
+        """
+        if await DeptDao.count_dept_closure_dao(query_db):
+            return
+        lock = RedisLock(redis, RedisInitKeyConfig.SYS_DEPT_CLOSURE_LOCK.key, CacheConfig.cache_warmup_lock_seconds)
+        while not await lock.acquire():
+            # 其他worker正在重建，结束当前事务以便读取到其他worker提交的数据；重建的worker异常退出时锁过期后由当前worker重建
+            await asyncio.sleep(0.2)
+            await query_db.rollback()
+            if await DeptDao.count_dept_closure_dao(query_db):
+                return
+        try:
+            # 获取锁后再次确认，其他worker可能已在此之前完成重建
+            await query_db.rollback()
+            if await DeptDao.count_dept_closure_dao(query_db):
+                return
+            await DeptDao.rebuild_dept_closure_dao(query_db)
+            await query_db.commit()
+        except Exception as e:
+            await query_db.rollback()
+            raise e
+        finally:
+            await lock.release()
+
     @classmethod
     def list_to_tree(cls, permission_list: list) -> list:
         """
@@ -1,10 +1,11 @@
 import json
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from config.constant import CommonConstant
+from typing import Dict, List
+from config.constant import CacheConstant, CommonConstant
 from config.database import AsyncSessionLocal
-from config.enums import RedisInitKeyConfig
+from config.enums import ExportFormat, RedisInitKeyConfig
+from config.env import CacheConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.dict_dao import DictDataDao, DictTypeDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -16,8 +17,10 @@ from module_admin.entity.vo.dict_vo import (
     DictTypeModel,
     DictTypePageQueryModel,
 )
+from utils.cache_util import CacheSyncUtil, LocalCache
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
+from utils.page_util import PageUtil
 
 
 class DictTypeService:
@@ -74,7 +77,7 @@ class DictTypeService:
             try:
                 await DictTypeDao.add_dict_type_dao(query_db, page_object)
                 await query_db.commit()
-                await request.app.state.redis.set(f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}', '')
+                await DictDataService.set_dict_cache_services(request.app.state.redis, {page_object.dict_type: []})
                 result = dict(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -113,11 +116,12 @@ class DictTypeService:
                     await DictTypeDao.edit_dict_type_dao(query_db, edit_dict_type)
                     await query_db.commit()
                     if dict_type_info.dict_type != page_object.dict_type:
-                        dict_data = [CamelCaseUtil.transform_result(row) for row in dict_data_list if row]
-                        await request.app.state.redis.set(
-                            f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
-                            json.dumps(dict_data, ensure_ascii=False, default=str),
+                        await DictDataService.delete_dict_cache_services(
+                            request.app.state.redis, [dict_type_info.dict_type]
                         )
+                    await DictDataService.refresh_dict_cache_services(
+                        query_db, request.app.state.redis, [page_object.dict_type or dict_type_info.dict_type]
+                    )
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -146,10 +150,9 @@ class DictTypeService:
                     if (await DictDataDao.count_dict_data_dao(query_db, dict_type_into.dict_type)) > 0:
                         raise ServiceException(message=f'{dict_type_into.dict_name}已分配，不能删除')
                     await DictTypeDao.delete_dict_type_dao(query_db, DictTypeModel(dictId=int(dict_id)))
-                    delete_dict_type_list.append(f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type_into.dict_type}')
+                    delete_dict_type_list.append(dict_type_into.dict_type)
                 await query_db.commit()
-                if delete_dict_type_list:
-                    await request.app.state.redis.delete(*delete_dict_type_list)
+                await DictDataService.delete_dict_cache_services(request.app.state.redis, delete_dict_type_list)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -175,12 +178,15 @@ class DictTypeService:
         return result
 
     @staticmethod
-    async def export_dict_type_list_services(dict_type_list: List):
+    async def export_dict_type_list_services(
+        query_object: DictTypePageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出字典类型信息service
 
-        :param dict_type_list: 字典信息列表
-        :return: 字典信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 字典信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -195,12 +201,15 @@ class DictTypeService:
             'remark': '备注',
         }
 
-        for item in dict_type_list:
+        def format_dict_type(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(dict_type_list, mapping_dict)
+            return item
+
+        dict_type_stream = PageUtil.stream(DictTypeDao.get_dict_type_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(dict_type_stream, mapping_dict, export_format, format_dict_type)
 
         return binary_data
 
@@ -224,6 +233,11 @@ class DictDataService:
     字典数据管理模块服务层
     """
 
+    local_cache = LocalCache(
+        max_size=CacheConfig.cache_dict_local_max_size, expire_seconds=CacheConfig.cache_dict_local_expire_seconds
+    )
+    generation = 0
+
     @classmethod
     async def get_dict_data_list_services(
         cls, query_db: AsyncSession, query_object: DictDataPageQueryModel, is_page: bool = False
@@ -262,20 +276,23 @@ class DictDataService:
         :param redis: redis对象
         :return:
         """
-        # 获取以sys_dict:开头的键列表
-        keys = await redis.keys(f'{RedisInitKeyConfig.SYS_DICT.key}:*')
-        # 删除匹配的键
-        if keys:
-            await redis.delete(*keys)
-        dict_type_all = await DictTypeDao.get_all_dict_type(query_db)
-        for dict_type_obj in [item for item in dict_type_all if item.status == '0']:
-            dict_type = dict_type_obj.dict_type
-            dict_data_list = await DictDataDao.query_dict_data_list(query_db, dict_type)
-            dict_data = [CamelCaseUtil.transform_result(row) for row in dict_data_list if row]
-            await redis.set(
-                f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
-                json.dumps(dict_data, ensure_ascii=False, default=str),
-            )
+        dict_data_map = cls.__group_dict_data(await DictDataDao.get_dict_data_group_list(query_db))
+        # 使用SCAN获取已失效的字典类型缓存键，避免KEYS阻塞redis
+        stale_keys = [
+            key
+            async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.SYS_DICT.key}:*', count=1000)
+            if key.split(':', 1)[-1] not in dict_data_map
+        ]
+        async with redis.pipeline(transaction=False) as pipe:
+            if stale_keys:
+                pipe.delete(*stale_keys)
+            for dict_type, dict_data in dict_data_map.items():
+                pipe.set(
+                    f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
+                    json.dumps(dict_data, ensure_ascii=False, default=str),
+                )
+            await pipe.execute()
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_DICT, CacheConstant.SYNC_ALL)
 
     @classmethod
     async def query_dict_data_list_from_cache_services(cls, redis, dict_type: str):
@@ -286,26 +303,142 @@ class DictDataService:
         :param dict_type: 字典类型
         :return: 字典数据列表信息对象
         """
-        result = []
-        cache_key = f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}'
-        dict_data_list_result = await redis.get(cache_key)
-        if dict_data_list_result:
-            result = json.loads(dict_data_list_result)
-        else:
-            result = await cls._load_dict_data_and_refresh_cache(redis, dict_type, cache_key)
+        dict_data_map = await cls.query_dict_data_map_from_cache_services(redis, [dict_type])
+
+        return dict_data_map[dict_type]
+
+    @classmethod
+    async def query_dict_data_map_from_cache_services(cls, redis, dict_types: List[str]):
+        """
+        从缓存批量获取多个字典类型对应的字典数据列表信息service，依次查询本地缓存、redis及数据库
+
+        :param redis: redis对象
+        :param dict_types: 字典类型列表
+        :return: 字典类型与字典数据列表信息的映射，字典数据列表为缓存共享对象，请勿修改
+        """
+        generation = cls.generation
+        dict_data_map = {}
+        miss_dict_types = []
+        for dict_type in dict.fromkeys(dict_types):
+            dict_data = cls.local_cache.get(dict_type)
+            if dict_data is None:
+                miss_dict_types.append(dict_type)
+            else:
+                dict_data_map[dict_type] = dict_data
+        if not miss_dict_types:
+            return dict_data_map
+        # 本地缓存未命中的字典类型通过一次MGET从redis获取
+        cache_values = await redis.mget(
+            [f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}' for dict_type in miss_dict_types]
+        )
+        db_dict_types = []
+        for dict_type, cache_value in zip(miss_dict_types, cache_values):
+            if cache_value:
+                dict_data_map[dict_type] = json.loads(cache_value)
+            else:
+                db_dict_types.append(dict_type)
+        # redis同样未命中的字典类型通过一次查询从数据库获取并写回redis
+        if db_dict_types:
+            async with AsyncSessionLocal() as session:
+                db_dict_data_map = cls.__group_dict_data(
+                    await DictDataDao.get_dict_data_group_list(session, db_dict_types)
+                )
+            db_dict_data_map = {dict_type: db_dict_data_map.get(dict_type, []) for dict_type in db_dict_types}
+            async with redis.pipeline(transaction=False) as pipe:
+                for dict_type, dict_data in db_dict_data_map.items():
+                    pipe.set(
+                        f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
+                        json.dumps(dict_data, ensure_ascii=False, default=str),
+                    )
+                await pipe.execute()
+            dict_data_map.update(db_dict_data_map)
+        # 获取期间本地缓存被失效时不再写入，避免旧数据覆盖
+        if generation == cls.generation:
+            for dict_type in miss_dict_types:
+                cls.local_cache.set(dict_type, dict_data_map[dict_type])
+
+        return dict_data_map
+
+    @classmethod
+    async def refresh_dict_cache_services(cls, query_db: AsyncSession, redis, dict_types: List[str]):
+        """
+        从数据库重新加载字典数据并刷新缓存service
+
+        :param query_db: orm对象
+        :param redis: redis对象
+        :param dict_types: 需要刷新的字典类型列表
+        :return:
+        """
+        dict_types = [dict_type for dict_type in dict.fromkeys(dict_types) if dict_type]
+        dict_data_map = cls.__group_dict_data(await DictDataDao.get_dict_data_group_list(query_db, dict_types))
+        await cls.set_dict_cache_services(
+            redis, {dict_type: dict_data_map.get(dict_type, []) for dict_type in dict_types}
+        )
+
+    @classmethod
+    async def set_dict_cache_services(cls, redis, dict_data_map: Dict[str, List[Dict]]):
+        """
+        写入字典数据缓存并通知所有worker失效本地缓存service
 
-        return CamelCaseUtil.transform_result(result)
+        :param redis: redis对象
+        :param dict_data_map: 字典类型与字典数据列表信息的映射
+        :return:
+        """
+        if not dict_data_map:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for dict_type, dict_data in dict_data_map.items():
+                pipe.set(
+                    f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
+                    json.dumps(dict_data, ensure_ascii=False, default=str),
+                )
+            await pipe.execute()
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_DICT, ','.join(dict_data_map.keys()))
 
     @classmethod
-    async def _load_dict_data_and_refresh_cache(cls, redis, dict_type: str, cache_key: str):
+    async def delete_dict_cache_services(cls, redis, dict_types: List[str]):
         """
-        当缓存未命中时，从数据库加载字典数据并写回缓存
+        删除字典数据缓存并通知所有worker失效本地缓存service
+
+        :param redis: redis对象
+        :param dict_types: 需要删除的字典类型列表
+        :return:
         """
-        async with AsyncSessionLocal() as session:
-            dict_data_list = await DictDataDao.query_dict_data_list(session, dict_type)
-        dict_data = [CamelCaseUtil.transform_result(row) for row in dict_data_list if row]
-        await redis.set(cache_key, json.dumps(dict_data, ensure_ascii=False, default=str))
-        return dict_data
+        if not dict_types:
+            return
+        await redis.delete(*[f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}' for dict_type in dict_types])
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_DICT, ','.join(dict_types))
+
+    @classmethod
+    def evict_local_dict(cls, payload: str):
+        """
+        失效当前进程的字典数据本地缓存
+
+        :param payload: 失效消息内容，为字典类型列表或全部失效标识
+        :return:
+        """
+        cls.generation += 1
+        if payload == CacheConstant.SYNC_ALL:
+            cls.local_cache.clear()
+        else:
+            for dict_type in payload.split(','):
+                cls.local_cache.delete(dict_type)
+
+    @staticmethod
+    def __group_dict_data(dict_data_group_list: List):
+        """
+        将字典类型及字典数据列表按字典类型分组
+
+        :param dict_data_group_list: 字典类型及字典数据列表
+        :return: 字典类型与字典数据列表信息的映射
+        """
+        dict_data_map = {}
+        for dict_type, dict_data in dict_data_group_list:
+            dict_data_list = dict_data_map.setdefault(dict_type, [])
+            if dict_data:
+                dict_data_list.append(CamelCaseUtil.transform_result(dict_data))
+
+        return dict_data_map
 
     @classmethod
     async def check_dict_data_unique_services(cls, query_db: AsyncSession, page_object: DictDataModel):
@@ -340,11 +473,7 @@ class DictDataService:
             try:
                 await DictDataDao.add_dict_data_dao(query_db, page_object)
                 await query_db.commit()
-                dict_data_list = await cls.query_dict_data_list_services(query_db, page_object.dict_type)
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
-                    json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
-                )
+                await cls.refresh_dict_cache_services(query_db, request.app.state.redis, [page_object.dict_type])
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -371,10 +500,9 @@ class DictDataService:
                 try:
                     await DictDataDao.edit_dict_data_dao(query_db, edit_data_type)
                     await query_db.commit()
-                    dict_data_list = await cls.query_dict_data_list_services(query_db, page_object.dict_type)
-                    await request.app.state.redis.set(
-                        f'{RedisInitKeyConfig.SYS_DICT.key}:{page_object.dict_type}',
-                        json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
+                    # 字典数据变更所属字典类型时，原字典类型的缓存同样需要刷新
+                    await cls.refresh_dict_cache_services(
+                        query_db, request.app.state.redis, list({dict_data_info.dict_type, page_object.dict_type})
                     )
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
@@ -404,12 +532,9 @@ class DictDataService:
                     await DictDataDao.delete_dict_data_dao(query_db, DictDataModel(dictCode=dict_code))
                     delete_dict_type_list.append(dict_data.dict_type)
                 await query_db.commit()
-                for dict_type in list(set(delete_dict_type_list)):
-                    dict_data_list = await cls.query_dict_data_list_services(query_db, dict_type)
-                    await request.app.state.redis.set(
-                        f'{RedisInitKeyConfig.SYS_DICT.key}:{dict_type}',
-                        json.dumps(CamelCaseUtil.transform_result(dict_data_list), ensure_ascii=False, default=str),
-                    )
+                await cls.refresh_dict_cache_services(
+                    query_db, request.app.state.redis, list(set(delete_dict_type_list))
+                )
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -435,12 +560,15 @@ class DictDataService:
         return result
 
     @staticmethod
-    async def export_dict_data_list_services(dict_data_list: List):
+    async def export_dict_data_list_services(
+        query_object: DictDataPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出字典数据信息service
 
-        :param dict_data_list: 字典数据信息列表
-        :return: 字典数据信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 字典数据信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -460,7 +588,7 @@ class DictDataService:
             'remark': '备注',
         }
 
-        for item in dict_data_list:
+        def format_dict_data(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -469,6 +597,12 @@ class DictDataService:
                 item['isDefault'] = '是'
             else:
                 item['isDefault'] = '否'
-        binary_data = ExcelUtil.export_list2excel(dict_data_list, mapping_dict)
+            return item
+
+        dict_data_stream = PageUtil.stream(DictDataDao.get_dict_data_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(dict_data_stream, mapping_dict, export_format, format_dict_data)
 
         return binary_data
+
+
+CacheSyncUtil.register(CacheConstant.TOPIC_DICT, DictDataService.evict_local_dict)
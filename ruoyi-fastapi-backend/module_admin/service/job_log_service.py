@@ -1,12 +1,17 @@
+import json
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Optional
+from config.database import AsyncSessionLocal
+from config.enums import ExportFormat
+from config.env import LogQueueConfig
 from module_admin.dao.job_log_dao import JobLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.job_vo import DeleteJobLogModel, JobLogModel, JobLogPageQueryModel
 from module_admin.service.dict_service import DictDataService
 from utils.excel_util import ExcelUtil
+from utils.page_util import PageUtil
+from utils.write_behind_util import WriteBehindQueue
 
 
 class JobLogService:
@@ -31,7 +36,7 @@ class JobLogService:
         return job_log_list_result
 
     @classmethod
-    def add_job_log_services(cls, query_db: Session, page_object: JobLogModel):
+    async def add_job_log_services(cls, query_db: AsyncSession, page_object: JobLogModel):
         """
         新增定时任务日志信息service
 
@@ -40,11 +45,11 @@ class JobLogService:
         :return: 新增定时任务日志校验结果
         """
         try:
-            JobLogDao.add_job_log_dao(query_db, page_object)
-            query_db.commit()
+            await JobLogDao.add_job_log_dao(query_db, page_object)
+            await query_db.commit()
             result = dict(is_success=True, message='新增成功')
         except Exception as e:
-            query_db.rollback()
+            await query_db.rollback()
             result = dict(is_success=False, message=str(e))
 
         return CrudResponseModel(**result)
@@ -91,13 +96,16 @@ class JobLogService:
         return CrudResponseModel(**result)
 
     @staticmethod
-    async def export_job_log_list_services(request: Request, job_log_list: List):
+    async def export_job_log_list_services(
+        request: Request, query_object: JobLogPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出定时任务日志信息service
 
         :param request: Request对象
-        :param job_log_list: 定时任务日志信息列表
-        :return: 定时任务日志信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 定时任务日志信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -112,6 +120,12 @@ class JobLogService:
             'jobMessage': '日志信息',
             'status': '执行状态',
             'exceptionInfo': '异常信息',
+            'scheduledTime': '计划执行时间',
+            'runStartTime': '实际开始执行时间',
+            'runEndTime': '执行结束时间',
+            'runDuration': '执行耗时（毫秒）',
+            'runDelay': '开始执行延迟（毫秒）',
+            'misfireCount': '错过执行次数',
             'createTime': '创建时间',
         }
 
@@ -128,7 +142,7 @@ class JobLogService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in job_log_list:
+        def format_job_log(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -137,6 +151,101 @@ class JobLogService:
                 item['jobGroup'] = job_group_option_dict.get(str(item.get('jobGroup'))).get('label')
             if str(item.get('jobExecutor')) in job_executor_option_dict.keys():
                 item['jobExecutor'] = job_executor_option_dict.get(str(item.get('jobExecutor'))).get('label')
-        binary_data = ExcelUtil.export_list2excel(job_log_list, mapping_dict)
+            return item
+
+        job_log_stream = PageUtil.stream(JobLogDao.get_job_log_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(job_log_stream, mapping_dict, export_format, format_job_log)
 
         return binary_data
+
+
+class JobLogQueueService:
+    """
+    定时任务日志写后队列服务层，与操作日志共用日志写后队列配置
+    """
+
+    job_log_queue: Optional[WriteBehindQueue] = None
+
+    @classmethod
+    async def init_job_log_queue_services(cls):
+        """
+        应用启动时初始化定时任务日志写后队列service
+
+        :return:
+        """
+        if not LogQueueConfig.log_queue_enabled:
+            return
+        cls.job_log_queue = WriteBehindQueue(
+            name='sys_job_log',
+            flush_handler=cls.flush_job_log_services,
+            max_size=LogQueueConfig.log_queue_max_size,
+            batch_size=LogQueueConfig.log_queue_batch_size,
+            flush_interval=LogQueueConfig.log_queue_flush_interval,
+            full_policy=LogQueueConfig.log_queue_full_policy,
+            spill_path=LogQueueConfig.log_queue_spill_path,
+            dump_item=cls.__dump_job_log_item,
+            load_item=cls.__load_job_log_item,
+        )
+        await cls.job_log_queue.start()
+
+    @classmethod
+    async def close_job_log_queue_services(cls):
+        """
+        应用关闭时写入队列中剩余日志并关闭定时任务日志写后队列service
+
+        :return:
+        """
+        if cls.job_log_queue:
+            await cls.job_log_queue.stop()
+            cls.job_log_queue = None
+
+    @classmethod
+    async def add_job_log_services(cls, page_object: JobLogModel):
+        """
+        将定时任务日志放入写后队列service，未开启队列时直接通过异步引擎写入数据库
+
+        :param page_object: 新增定时任务日志对象
+        :return: 新增定时任务日志校验结果
+        """
+        if cls.job_log_queue and cls.job_log_queue.running:
+            await cls.job_log_queue.put(page_object)
+            return CrudResponseModel(is_success=True, message='新增成功')
+
+        async with AsyncSessionLocal() as session:
+            return await JobLogService.add_job_log_services(session, page_object)
+
+    @classmethod
+    async def flush_job_log_services(cls, job_log_list: List[JobLogModel]):
+        """
+        批量写入定时任务日志service
+
+        :param job_log_list: 定时任务日志对象列表
+        :return:
+        """
+        async with AsyncSessionLocal() as session:
+            try:
+                await JobLogDao.add_job_log_batch_dao(session, job_log_list)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    @staticmethod
+    def __dump_job_log_item(job_log: JobLogModel):
+        """
+        将定时任务日志序列化为溢出文件中的单行文本
+
+        :param job_log: 定时任务日志对象
+        :return: 单行文本
+        """
+        return json.dumps(job_log.model_dump(mode='json', by_alias=True), ensure_ascii=False)
+
+    @staticmethod
+    def __load_job_log_item(line: str):
+        """
+        将溢出文件中的单行文本反序列化为定时任务日志
+
+        :param line: 单行文本
+        :return: 定时任务日志对象
+        """
+        return JobLogModel(**json.loads(line))
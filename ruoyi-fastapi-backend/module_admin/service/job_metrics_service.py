@@ -0,0 +1,130 @@
+import math
+from datetime import timedelta
+from redis import asyncio as aioredis
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from config.enums import RedisInitKeyConfig
+from config.env import SchedulerConfig
+from exceptions.exception import ServiceException
+from module_admin.dao.job_dao import JobDao
+from module_admin.entity.vo.job_vo import JobMetricsModel
+
+
+class JobMetricsService:
+    """
+    定时任务执行指标服务层，调度主节点将每次执行的耗时及延迟写入redis，任意worker均可读取并计算滚动分位数
+    """
+
+    @classmethod
+    async def record_job_run_services(
+        cls, redis: aioredis.Redis, job_id: str, status: str, run_duration: int, run_delay: int
+    ):
+        """
+        记录一次定时任务执行的耗时及延迟service
+
+        :param redis: redis对象
+        :param job_id: 任务id
+        :param status: 执行状态（0正常 1失败）
+        :param run_duration: 执行耗时（毫秒）
+        :param run_delay: 开始执行延迟（毫秒）
+        :return:
+        """
+        samples_key = f'{RedisInitKeyConfig.SYS_JOB_METRICS_SAMPLES.key}:{job_id}'
+        count_key = f'{RedisInitKeyConfig.SYS_JOB_METRICS_COUNT.key}:{job_id}'
+        expire_time = timedelta(days=SchedulerConfig.scheduler_metrics_expire_days)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(samples_key, f'{run_duration},{run_delay}')
+            pipe.ltrim(samples_key, 0, SchedulerConfig.scheduler_metrics_window - 1)
+            pipe.expire(samples_key, expire_time)
+            pipe.hincrby(count_key, 'run_count', 1)
+            if status == '1':
+                pipe.hincrby(count_key, 'error_count', 1)
+            pipe.expire(count_key, expire_time)
+            await pipe.execute()
+
+    @classmethod
+    async def record_job_misfire_services(cls, redis: aioredis.Redis, job_id: str):
+        """
+        记录一次定时任务错过执行service
+
+        :param redis: redis对象
+        :param job_id: 任务id
+        :return:
+        """
+        count_key = f'{RedisInitKeyConfig.SYS_JOB_METRICS_COUNT.key}:{job_id}'
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.hincrby(count_key, 'misfire_count', 1)
+            pipe.expire(count_key, timedelta(days=SchedulerConfig.scheduler_metrics_expire_days))
+            await pipe.execute()
+
+    @classmethod
+    async def get_job_metrics_services(
+        cls, query_db: AsyncSession, redis: aioredis.Redis, job_ids: Optional[str] = None
+    ) -> List[JobMetricsModel]:
+        """
+        获取定时任务最近执行的耗时及延迟分位数service
+
+        :param query_db: orm对象
+        :param redis: redis对象
+        :param job_ids: 逗号分隔的任务id，为空时获取全部任务
+        :return: 定时任务执行指标列表
+        """
+        try:
+            job_id_list = [int(job_id) for job_id in job_ids.split(',') if job_id.strip()] if job_ids else None
+        except ValueError:
+            raise ServiceException(message='任务ID无效')
+        job_list = await JobDao.get_job_list_by_ids(query_db, job_id_list)
+        if not job_list:
+            return []
+        async with redis.pipeline(transaction=False) as pipe:
+            for job in job_list:
+                pipe.lrange(f'{RedisInitKeyConfig.SYS_JOB_METRICS_SAMPLES.key}:{job.job_id}', 0, -1)
+                pipe.hgetall(f'{RedisInitKeyConfig.SYS_JOB_METRICS_COUNT.key}:{job.job_id}')
+            results = await pipe.execute()
+
+        metrics_list = []
+        for index, job in enumerate(job_list):
+            samples, counts = results[index * 2], results[index * 2 + 1]
+            durations, delays = [], []
+            for sample in samples:
+                duration, delay = sample.split(',')
+                durations.append(int(duration))
+                delays.append(int(delay))
+            durations.sort()
+            delays.sort()
+            metrics_list.append(
+                JobMetricsModel(
+                    jobId=job.job_id,
+                    jobName=job.job_name,
+                    jobGroup=job.job_group,
+                    runCount=int(counts.get('run_count', 0)),
+                    errorCount=int(counts.get('error_count', 0)),
+                    misfireCount=int(counts.get('misfire_count', 0)),
+                    sampleCount=len(durations),
+                    durationAvg=round(sum(durations) / len(durations), 2) if durations else None,
+                    durationP50=cls.__percentile(durations, 50),
+                    durationP90=cls.__percentile(durations, 90),
+                    durationP99=cls.__percentile(durations, 99),
+                    durationMax=durations[-1] if durations else None,
+                    delayP50=cls.__percentile(delays, 50),
+                    delayP90=cls.__percentile(delays, 90),
+                    delayP99=cls.__percentile(delays, 99),
+                    delayMax=delays[-1] if delays else None,
+                )
+            )
+
+        return metrics_list
+
+    @staticmethod
+    def __percentile(sorted_values: List[int], percent: int) -> Optional[int]:
+        """
+        按最近秩法计算分位数
+
+        :param sorted_values: 已升序排列的数值列表
+        :param percent: 百分位
+        :return: 分位数，列表为空时返回None
+        """
+        if not sorted_values:
+            return None
+        rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+        return sorted_values[rank - 1]
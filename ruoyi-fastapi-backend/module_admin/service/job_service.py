@@ -1,17 +1,20 @@
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List
 from config.constant import CommonConstant, JobConstant
+from config.enums import ExportFormat
 from config.get_scheduler import SchedulerUtil
 from exceptions.exception import ServiceException
 from module_admin.dao.job_dao import JobDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
-from module_admin.entity.vo.job_vo import DeleteJobModel, EditJobModel, JobModel, JobPageQueryModel
+from module_admin.entity.vo.job_vo import DeleteJobModel, EditJobModel, JobModel, JobPageQueryModel, JobTaskModel
 from module_admin.service.dict_service import DictDataService
 from utils.common_util import CamelCaseUtil
 from utils.cron_util import CronUtil
 from utils.excel_util import ExcelUtil
+from utils.page_util import PageUtil
 from utils.string_util import StringUtil
+from utils.task_registry_util import TaskRegistryUtil
 
 
 class JobService:
@@ -75,19 +78,23 @@ class JobService:
             raise ServiceException(message=f'新增定时任务{page_object.job_name}失败，目标字符串存在违规')
         elif not StringUtil.startswith_any_case(page_object.invoke_target, JobConstant.JOB_WHITE_LIST):
             raise ServiceException(message=f'新增定时任务{page_object.job_name}失败，目标字符串不在白名单内')
+        elif not TaskRegistryUtil.get_task(page_object.invoke_target):
+            raise ServiceException(message=f'新增定时任务{page_object.job_name}失败，目标字符串未注册为定时任务')
+        elif page_object.job_executor == 'processpool' and not cls.__check_processpool_task(page_object.invoke_target):
+            raise ServiceException(
+                message=f'新增定时任务{page_object.job_name}失败，异步函数或无法序列化的函数不支持进程池执行器'
+            )
         elif not await cls.check_job_unique_services(query_db, page_object):
             raise ServiceException(message=f'新增定时任务{page_object.job_name}失败，定时任务已存在')
         else:
             try:
                 add_job = await JobDao.add_job_dao(query_db, page_object)
-                job_info = await cls.job_detail_services(query_db, add_job.job_id)
-                if job_info.status == '0':
-                    SchedulerUtil.add_scheduler_job(job_info=job_info)
                 await query_db.commit()
                 result = dict(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
                 raise e
+            await SchedulerUtil.publish_scheduler_job_action(add_job.job_id)
 
         return CrudResponseModel(**result)
 
@@ -126,19 +133,26 @@ class JobService:
                     raise ServiceException(message=f'修改定时任务{page_object.job_name}失败，目标字符串存在违规')
                 elif not StringUtil.startswith_any_case(page_object.invoke_target, JobConstant.JOB_WHITE_LIST):
                     raise ServiceException(message=f'修改定时任务{page_object.job_name}失败，目标字符串不在白名单内')
+                elif not TaskRegistryUtil.get_task(page_object.invoke_target):
+                    raise ServiceException(
+                        message=f'修改定时任务{page_object.job_name}失败，目标字符串未注册为定时任务'
+                    )
+                elif page_object.job_executor == 'processpool' and not cls.__check_processpool_task(
+                    page_object.invoke_target
+                ):
+                    raise ServiceException(
+                        message=f'修改定时任务{page_object.job_name}失败，异步函数或无法序列化的函数不支持进程池执行器'
+                    )
                 elif not await cls.check_job_unique_services(query_db, page_object):
                     raise ServiceException(message=f'修改定时任务{page_object.job_name}失败，定时任务已存在')
             try:
                 await JobDao.edit_job_dao(query_db, edit_job)
-                SchedulerUtil.remove_scheduler_job(job_id=edit_job.get('job_id'))
-                if edit_job.get('status') == '0':
-                    job_info = await cls.job_detail_services(query_db, edit_job.get('job_id'))
-                    SchedulerUtil.add_scheduler_job(job_info=job_info)
                 await query_db.commit()
-                return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
                 raise e
+            await SchedulerUtil.publish_scheduler_job_action(edit_job.get('job_id'))
+            return CrudResponseModel(is_success=True, message='更新成功')
         else:
             raise ServiceException(message='定时任务不存在')
 
@@ -151,10 +165,9 @@ class JobService:
         :param page_object: 定时任务对象
         :return: 执行一次定时任务结果
         """
-        SchedulerUtil.remove_scheduler_job(job_id=page_object.job_id)
         job_info = await cls.job_detail_services(query_db, page_object.job_id)
-        if job_info:
-            SchedulerUtil.execute_scheduler_job_once(job_info=job_info)
+        if job_info.job_id is not None:
+            await SchedulerUtil.publish_scheduler_job_action(job_info.job_id, JobConstant.SCHEDULER_ACTION_RUN)
             return CrudResponseModel(is_success=True, message='执行成功')
         else:
             raise ServiceException(message='定时任务不存在')
@@ -173,15 +186,39 @@ class JobService:
             try:
                 for job_id in job_id_list:
                     await JobDao.delete_job_dao(query_db, JobModel(jobId=job_id))
-                    SchedulerUtil.remove_scheduler_job(job_id=job_id)
                 await query_db.commit()
-                return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
                 raise e
+            for job_id in job_id_list:
+                await SchedulerUtil.publish_scheduler_job_action(job_id)
+            return CrudResponseModel(is_success=True, message='删除成功')
         else:
             raise ServiceException(message='传入定时任务id为空')
 
+    @classmethod
+    def get_job_task_list_services(cls) -> List[JobTaskModel]:
+        """
+        获取已注册的定时任务函数列表service
+
+        :return: 已注册的定时任务函数列表，按调用目标字符串排序
+        """
+        return [
+            JobTaskModel(invokeTarget=task.invoke_target, isAsync=task.is_async, picklable=task.picklable)
+            for task in sorted(TaskRegistryUtil.get_task_list(), key=lambda task: task.invoke_target)
+        ]
+
+    @classmethod
+    def __check_processpool_task(cls, invoke_target: str):
+        """
+        校验定时任务函数能否在进程池中执行
+
+        :param invoke_target: 调用目标字符串
+        :return: 校验结果
+        """
+        task = TaskRegistryUtil.get_task(invoke_target)
+        return not task.is_async and task.picklable
+
     @classmethod
     async def job_detail_services(cls, query_db: AsyncSession, job_id: int):
         """
@@ -200,13 +237,16 @@ class JobService:
         return result
 
     @staticmethod
-    async def export_job_list_services(request: Request, job_list: List):
+    async def export_job_list_services(
+        request: Request, query_object: JobPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出定时任务信息service
 
         :param request: Request对象
-        :param job_list: 定时任务信息列表
-        :return: 定时任务信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 定时任务信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -241,7 +281,7 @@ class JobService:
         ]
         job_executor_option_dict = {item.get('value'): item for item in job_executor_option}
 
-        for item in job_list:
+        def format_job(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -260,6 +300,9 @@ class JobService:
                 item['concurrent'] = '允许'
             else:
                 item['concurrent'] = '禁止'
-        binary_data = ExcelUtil.export_list2excel(job_list, mapping_dict)
+            return item
+
+        job_stream = PageUtil.stream(JobDao.get_job_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(job_stream, mapping_dict, export_format, format_job)
 
         return binary_data
@@ -1,6 +1,10 @@
+import json
 from fastapi import Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict, List, Optional, Tuple, Union
+from config.database import AsyncSessionLocal
+from config.enums import ExportFormat
+from config.env import LogQueueConfig
 from exceptions.exception import ServiceException
 from module_admin.dao.log_dao import LoginLogDao, OperationLogDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -15,6 +19,8 @@ from module_admin.entity.vo.log_vo import (
 )
 from module_admin.service.dict_service import DictDataService
 from utils.excel_util import ExcelUtil
+from utils.page_util import PageUtil
+from utils.write_behind_util import WriteBehindQueue
 
 
 class OperationLogService:
@@ -94,13 +100,16 @@ class OperationLogService:
             raise e
 
     @classmethod
-    async def export_operation_log_list_services(cls, request: Request, operation_log_list: List):
+    async def export_operation_log_list_services(
+        cls, request: Request, query_object: OperLogPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出操作日志信息service
 
         :param request: Request对象
-        :param operation_log_list: 操作日志信息列表
-        :return: 操作日志信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 操作日志信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -130,14 +139,17 @@ class OperationLogService:
         ]
         operation_type_option_dict = {item.get('value'): item for item in operation_type_option}
 
-        for item in operation_log_list:
+        def format_operation_log(item: Dict):
             if item.get('status') == 0:
                 item['status'] = '成功'
             else:
                 item['status'] = '失败'
             if str(item.get('businessType')) in operation_type_option_dict.keys():
                 item['businessType'] = operation_type_option_dict.get(str(item.get('businessType'))).get('label')
-        binary_data = ExcelUtil.export_list2excel(operation_log_list, mapping_dict)
+            return item
+
+        operation_log_stream = PageUtil.stream(OperationLogDao.get_operation_log_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(operation_log_stream, mapping_dict, export_format, format_operation_log)
 
         return binary_data
 
@@ -228,12 +240,15 @@ class LoginLogService:
             raise ServiceException(message='该用户未锁定')
 
     @staticmethod
-    async def export_login_log_list_services(login_log_list: List):
+    async def export_login_log_list_services(
+        query_object: LoginLogPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出登录日志信息service
 
-        :param login_log_list: 登录日志信息列表
-        :return: 登录日志信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 登录日志信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -248,11 +263,129 @@ class LoginLogService:
             'loginTime': '登录日期',
         }
 
-        for item in login_log_list:
+        def format_login_log(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '成功'
             else:
                 item['status'] = '失败'
-        binary_data = ExcelUtil.export_list2excel(login_log_list, mapping_dict)
+            return item
+
+        login_log_stream = PageUtil.stream(LoginLogDao.get_login_log_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(login_log_stream, mapping_dict, export_format, format_login_log)
 
         return binary_data
+
+
+class LogQueueService:
+    """
+    日志写后队列服务层
+    """
+
+    log_queue: Optional[WriteBehindQueue] = None
+
+    @classmethod
+    async def init_log_queue_services(cls):
+        """
+        应用启动时初始化日志写后队列service
+
+        :return:
+        """
+        if not LogQueueConfig.log_queue_enabled:
+            return
+        cls.log_queue = WriteBehindQueue(
+            name='sys_log',
+            flush_handler=cls.flush_log_services,
+            max_size=LogQueueConfig.log_queue_max_size,
+            batch_size=LogQueueConfig.log_queue_batch_size,
+            flush_interval=LogQueueConfig.log_queue_flush_interval,
+            full_policy=LogQueueConfig.log_queue_full_policy,
+            spill_path=LogQueueConfig.log_queue_spill_path,
+            dump_item=cls.__dump_log_item,
+            load_item=cls.__load_log_item,
+        )
+        await cls.log_queue.start()
+
+    @classmethod
+    async def close_log_queue_services(cls):
+        """
+        应用关闭时写入队列中剩余日志并关闭日志写后队列service
+
+        :return:
+        """
+        if cls.log_queue:
+            await cls.log_queue.stop()
+            cls.log_queue = None
+
+    @classmethod
+    async def add_operation_log_services(cls, query_db: AsyncSession, page_object: OperLogModel):
+        """
+        将操作日志放入写后队列service，未开启队列时直接写入数据库
+
+        :param query_db: orm对象
+        :param page_object: 新增操作日志对象
+        :return: 新增操作日志校验结果
+        """
+        if cls.log_queue and cls.log_queue.running:
+            await cls.log_queue.put(('operation', page_object))
+            return CrudResponseModel(is_success=True, message='新增成功')
+
+        return await OperationLogService.add_operation_log_services(query_db, page_object)
+
+    @classmethod
+    async def add_login_log_services(cls, query_db: AsyncSession, page_object: LogininforModel):
+        """
+        将登录日志放入写后队列service，未开启队列时直接写入数据库
+
+        :param query_db: orm对象
+        :param page_object: 新增登录日志对象
+        :return: 新增登录日志校验结果
+        """
+        if cls.log_queue and cls.log_queue.running:
+            await cls.log_queue.put(('login', page_object))
+            return CrudResponseModel(is_success=True, message='新增成功')
+
+        return await LoginLogService.add_login_log_services(query_db, page_object)
+
+    @classmethod
+    async def flush_log_services(cls, log_items: List[Tuple[str, Union[OperLogModel, LogininforModel]]]):
+        """
+        批量写入日志service
+
+        :param log_items: 日志类型及日志对象列表
+        :return:
+        """
+        operation_log_list = [log for log_type, log in log_items if log_type == 'operation']
+        login_log_list = [log for log_type, log in log_items if log_type == 'login']
+        async with AsyncSessionLocal() as session:
+            try:
+                if operation_log_list:
+                    await OperationLogDao.add_operation_log_batch_dao(session, operation_log_list)
+                if login_log_list:
+                    await LoginLogDao.add_login_log_batch_dao(session, login_log_list)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    @staticmethod
+    def __dump_log_item(log_item: Tuple[str, Union[OperLogModel, LogininforModel]]):
+        """
+        将日志序列化为溢出文件中的单行文本
+
+        :param log_item: 日志类型及日志对象
+        :return: 单行文本
+        """
+        log_type, log = log_item
+        return json.dumps({'type': log_type, 'data': log.model_dump(mode='json', by_alias=True)}, ensure_ascii=False)
+
+    @staticmethod
+    def __load_log_item(line: str):
+        """
+        将溢出文件中的单行文本反序列化为日志
+
+        :param line: 单行文本
+        :return: 日志类型及日志对象
+        """
+        log_item = json.loads(line)
+        log_model = OperLogModel if log_item.get('type') == 'operation' else LogininforModel
+        return log_item.get('type'), log_model(**log_item.get('data'))
@@ -0,0 +1,174 @@
+import math
+from redis import asyncio as aioredis
+from typing import List, Optional, Tuple
+from config.enums import RedisInitKeyConfig
+from config.env import LoginLimitConfig
+
+
+# 依次检查每组锁定键，任意一组已锁定时返回其序号及剩余锁定时间
+# KEYS: 锁定键列表
+CHECK_LOCK_SCRIPT = """
+for index, lock_key in ipairs(KEYS) do
+    local ttl = redis.call('TTL', lock_key)
+    if ttl > 0 or ttl == -1 then
+        return {index, ttl}
+    end
+end
+return {0, 0}
+"""
+
+# 对每组计数键原子地累加失败次数，超过阈值时删除计数并写入锁定键，返回第一个锁定组序号、锁定时间及各组失败次数
+# KEYS: 按组排列的计数键及锁定键，即 计数键1, 锁定键1, 计数键2, 锁定键2 ...
+# ARGV: 按组排列的最大失败次数、统计时间（秒）、锁定时间（秒）及锁定值
+RECORD_FAILURE_SCRIPT = """
+local locked_index = 0
+local locked_ttl = 0
+local counts = {}
+for index = 1, #KEYS / 2 do
+    local count_key = KEYS[index * 2 - 1]
+    local lock_key = KEYS[index * 2]
+    local max_attempts = tonumber(ARGV[index * 4 - 3])
+    local window_seconds = tonumber(ARGV[index * 4 - 2])
+    local lock_seconds = tonumber(ARGV[index * 4 - 1])
+    local count = redis.call('INCR', count_key)
+    redis.call('EXPIRE', count_key, window_seconds)
+    counts[index] = count
+    if count > max_attempts then
+        redis.call('DEL', count_key)
+        redis.call('SET', lock_key, ARGV[index * 4], 'EX', lock_seconds)
+        if locked_index == 0 then
+            locked_index = index
+            locked_ttl = lock_seconds
+        end
+    end
+end
+return {locked_index, locked_ttl, unpack(counts)}
+"""
+
+
+class LoginLimiterService:
+    """
+    登录失败限制服务层，账号及IP的失败计数与锁定通过一次Lua脚本调用原子完成
+    """
+
+    USER = 'user'
+    IP = 'ip'
+
+    _check_lock_script = None
+    _record_failure_script = None
+    _script_redis = None
+
+    @classmethod
+    async def check_login_lock_services(
+        cls, redis: aioredis.Redis, user_name: str, ip: Optional[str]
+    ) -> Tuple[Optional[str], int]:
+        """
+        检查账号及IP是否已被锁定service
+
+        :param redis: redis对象
+        :param user_name: 用户账号
+        :param ip: 登录ip
+        :return: 锁定类型（user账号 ip登录IP，未锁定时为None）及剩余锁定时间（单位：秒）
+        """
+        limit_groups = cls.__get_limit_groups(user_name, ip)
+        cls.__register_scripts(redis)
+        locked_index, locked_ttl = await cls._check_lock_script(keys=[group[2] for group in limit_groups])
+        if locked_index == 0:
+            return None, 0
+
+        return limit_groups[locked_index - 1][0], locked_ttl
+
+    @classmethod
+    async def record_login_failure_services(
+        cls, redis: aioredis.Redis, user_name: str, ip: Optional[str]
+    ) -> Tuple[Optional[str], int]:
+        """
+        记录一次登录密码错误，失败次数超过阈值时锁定账号或IP service
+
+        :param redis: redis对象
+        :param user_name: 用户账号
+        :param ip: 登录ip
+        :return: 本次触发锁定的类型（user账号 ip登录IP，未触发锁定时为None）及锁定时间（单位：秒）
+        """
+        limit_groups = cls.__get_limit_groups(user_name, ip)
+        keys = []
+        args = []
+        for _, count_key, lock_key, max_attempts, window_seconds, lock_seconds, lock_value in limit_groups:
+            keys.extend([count_key, lock_key])
+            args.extend([max_attempts, window_seconds, lock_seconds, lock_value])
+        cls.__register_scripts(redis)
+        result = await cls._record_failure_script(keys=keys, args=args)
+        locked_index, locked_ttl = result[0], result[1]
+        if locked_index == 0:
+            return None, 0
+
+        return limit_groups[locked_index - 1][0], locked_ttl
+
+    @classmethod
+    async def clear_login_failure_services(cls, redis: aioredis.Redis, user_name: str):
+        """
+        登录成功后清除账号的密码错误次数service
+
+        :param redis: redis对象
+        :param user_name: 用户账号
+        :return:
+        """
+        await redis.delete(f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{user_name}')
+
+    @staticmethod
+    def get_lock_minutes(lock_seconds: int):
+        """
+        将锁定时间换算为向上取整的分钟数
+
+        :param lock_seconds: 锁定时间（单位：秒）
+        :return: 锁定分钟数
+        """
+        return max(math.ceil(lock_seconds / 60), 1)
+
+    @classmethod
+    def __get_limit_groups(cls, user_name: str, ip: Optional[str]) -> List[tuple]:
+        """
+        获取需要限制的账号及IP分组
+
+        :param user_name: 用户账号
+        :param ip: 登录ip
+        :return: 限制分组列表，每组依次为 类型、计数键、锁定键、最大失败次数、统计时间、锁定时间、锁定值
+        """
+        limit_groups = [
+            (
+                cls.USER,
+                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{user_name}',
+                f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{user_name}',
+                LoginLimitConfig.login_limit_user_max_attempts,
+                LoginLimitConfig.login_limit_user_window_seconds,
+                LoginLimitConfig.login_limit_user_lock_seconds,
+                user_name,
+            )
+        ]
+        if ip and LoginLimitConfig.login_limit_ip_max_attempts > 0:
+            limit_groups.append(
+                (
+                    cls.IP,
+                    f'{RedisInitKeyConfig.LOGIN_IP_ERROR_COUNT.key}:{ip}',
+                    f'{RedisInitKeyConfig.LOGIN_IP_LOCK.key}:{ip}',
+                    LoginLimitConfig.login_limit_ip_max_attempts,
+                    LoginLimitConfig.login_limit_ip_window_seconds,
+                    LoginLimitConfig.login_limit_ip_lock_seconds,
+                    ip,
+                )
+            )
+
+        return limit_groups
+
+    @classmethod
+    def __register_scripts(cls, redis: aioredis.Redis):
+        """
+        注册Lua脚本，之后通过EVALSHA调用，脚本缓存丢失时自动回退为EVAL
+
+        :param redis: redis对象
+        :return:
+        """
+        if cls._script_redis is not redis:
+            cls._check_lock_script = redis.register_script(CHECK_LOCK_SCRIPT)
+            cls._record_failure_script = redis.register_script(RECORD_FAILURE_SCRIPT)
+            cls._script_redis = redis
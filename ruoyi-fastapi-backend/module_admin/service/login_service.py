@@ -1,26 +1,37 @@
+import hashlib
 import json
 import jwt
 import random
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, Form, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jwt.exceptions import InvalidTokenError
+from redis import asyncio as aioredis
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, List, Optional, Union
 from config.constant import CommonConstant, MenuConstant
 from config.enums import RedisInitKeyConfig
-from config.env import AppConfig, JwtConfig
+from config.env import AppConfig, CacheConfig, JwtConfig, LoginLimitConfig
 from config.get_db import get_db
 from exceptions.exception import LoginException, AuthException, ServiceException
 from module_admin.dao.login_dao import login_by_account
-from module_admin.dao.user_dao import UserDao
+from module_admin.dao.menu_dao import MenuDao
+from module_admin.dao.user_dao import UserAggregate, UserDao
 from module_admin.entity.do.menu_do import SysMenu
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.login_vo import MenuTreeModel, MetaModel, RouterModel, SmsCode, UserLogin, UserRegister
-from module_admin.entity.vo.user_vo import AddUserModel, CurrentUserModel, ResetUserModel, TokenData, UserInfoModel
+from module_admin.entity.vo.user_vo import AddUserModel, CurrentUserModel, ResetUserModel, TokenData
+from module_admin.service.config_service import ConfigService
+from module_admin.service.login_limiter_service import LoginLimiterService
+from module_admin.service.online_service import OnlineService
+from module_admin.service.principal_cache_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
 from module_admin.service.user_service import UserService
+from utils.cache_util import LocalCache
 from utils.common_util import CamelCaseUtil
+from utils.ip_util import ClientIpUtil
 from utils.log_util import logger
 from utils.message_util import message_service
 from utils.pwd_util import PwdUtil
@@ -63,6 +74,10 @@ class LoginService:
     登录模块服务层
     """
 
+    token_cache = LocalCache(
+        max_size=CacheConfig.cache_token_local_max_size, expire_seconds=CacheConfig.cache_token_local_expire_seconds
+    )
+
     @classmethod
     async def authenticate_user(cls, request: Request, query_db: AsyncSession, login_user: UserLogin):
         """
@@ -74,13 +89,16 @@ class LoginService:
         :return: 校验结果
         """
         login_user = cls.__normalize_login_payload(login_user)
-        await cls.__check_login_ip(request)
-        account_lock = await request.app.state.redis.get(
-            f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{login_user.user_name}'
+        login_ip = ClientIpUtil.get_client_ip(request)
+        cls.__check_login_ip(login_ip)
+        lock_type, lock_seconds = await LoginLimiterService.check_login_lock_services(
+            request.app.state.redis, login_user.user_name, login_ip
         )
-        if login_user.user_name == account_lock:
-            logger.warning('账号已锁定，请稍后再试')
-            raise LoginException(data='', message='账号已锁定，请稍后再试')
+        if lock_type:
+            lock_target = '账号' if lock_type == LoginLimiterService.USER else '当前IP'
+            message = f'{lock_target}已锁定，请{LoginLimiterService.get_lock_minutes(lock_seconds)}分钟后再试'
+            logger.warning(message)
+            raise LoginException(data='', message=message)
         # 判断请求是否来自于api文档，如果是返回指定格式的结果，用于修复api文档认证成功后token显示undefined的bug
         request_from_swagger = (
             request.headers.get('referer').endswith('docs') if request.headers.get('referer') else False
@@ -102,49 +120,42 @@ class LoginService:
         if not user:
             logger.warning('用户不存在')
             raise LoginException(data='', message='用户不存在')
-        if not PwdUtil.verify_password(login_user.password, user[0].password):
-            cache_password_error_count = await request.app.state.redis.get(
-                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}'
-            )
-            password_error_counted = 0
-            if cache_password_error_count:
-                password_error_counted = cache_password_error_count
-            password_error_count = int(password_error_counted) + 1
-            await request.app.state.redis.set(
-                f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}',
-                password_error_count,
-                ex=timedelta(minutes=10),
+        if not await PwdUtil.verify_password_async(login_user.password, user[0].password):
+            lock_type, lock_seconds = await LoginLimiterService.record_login_failure_services(
+                request.app.state.redis, login_user.user_name, login_ip
             )
-            if password_error_count > 5:
-                await request.app.state.redis.delete(
-                    f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}'
+            if lock_type:
+                if lock_type == LoginLimiterService.USER:
+                    lock_target = '账号'
+                    window_seconds = LoginLimitConfig.login_limit_user_window_seconds
+                    max_attempts = LoginLimitConfig.login_limit_user_max_attempts
+                else:
+                    lock_target = '当前IP'
+                    window_seconds = LoginLimitConfig.login_limit_ip_window_seconds
+                    max_attempts = LoginLimitConfig.login_limit_ip_max_attempts
+                message = (
+                    f'{LoginLimiterService.get_lock_minutes(window_seconds)}分钟内密码已输错超过{max_attempts}次，'
+                    f'{lock_target}已锁定，请{LoginLimiterService.get_lock_minutes(lock_seconds)}分钟后再试'
                 )
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.ACCOUNT_LOCK.key}:{login_user.user_name}',
-                    login_user.user_name,
-                    ex=timedelta(minutes=10),
-                )
-                logger.warning('10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
-                raise LoginException(data='', message='10分钟内密码已输错超过5次，账号已锁定，请10分钟后再试')
+                logger.warning(message)
+                raise LoginException(data='', message=message)
             logger.warning('密码错误')
             raise LoginException(data='', message='密码错误')
         if user[0].status == '1':
             logger.warning('用户已停用')
             raise LoginException(data='', message='用户已停用')
-        await request.app.state.redis.delete(f'{RedisInitKeyConfig.PASSWORD_ERROR_COUNT.key}:{login_user.user_name}')
+        await LoginLimiterService.clear_login_failure_services(request.app.state.redis, login_user.user_name)
         return user
 
     @classmethod
-    async def __check_login_ip(cls, request: Request):
+    def __check_login_ip(cls, login_ip: str):
         """
         校验用户登录ip是否在黑名单内
 
-        :param request: Request对象
+        :param login_ip: 登录ip
         :return: 校验结果
         """
-        black_ip_value = await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.login.blackIPList')
-        black_ip_list = black_ip_value.split(',') if black_ip_value else []
-        if request.headers.get('X-Forwarded-For') in black_ip_list:
+        if ConfigService.get_config_snapshot().black_ip_matcher.match(login_ip):
             logger.warning('当前IP禁止登录')
             raise LoginException(data='', message='当前IP禁止登录')
         return True
@@ -204,7 +215,7 @@ class LoginService:
         try:
             if token.startswith('Bearer'):
                 token = token.split(' ')[1]
-            payload = jwt.decode(token, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
+            payload = cls.__decode_access_token(token)
             user_id: str = payload.get('user_id')
             session_id: str = payload.get('session_id')
             if not user_id:
@@ -214,97 +225,129 @@ class LoginService:
         except InvalidTokenError:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
-        query_user = await UserDao.get_user_by_id(query_db, user_id=token_data.user_id)
-        if query_user.get('user_basic_info') is None:
-            logger.warning('用户token不合法')
-            raise AuthException(data='', message='用户token不合法')
+        current_user = await PrincipalCacheService.get_principal_services(
+            request.app.state.redis, token_data.user_id
+        )
+        if current_user is None:
+            generation = PrincipalCacheService.generation
+            query_user = await UserDao.get_user_by_id(query_db, user_id=token_data.user_id)
+            if query_user.user_basic_info is None:
+                logger.warning('用户token不合法')
+                raise AuthException(data='', message='用户token不合法')
+            current_user = await PrincipalCacheService.set_principal_services(
+                request.app.state.redis, token_data.user_id, cls.__generate_principal_data(query_user), generation
+            )
         if AppConfig.app_same_time_login:
-            redis_token = await request.app.state.redis.get(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+            token_key = f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}'
         else:
             # 此方法可实现同一账号同一时间只能登录一次
-            redis_token = await request.app.state.redis.get(
-                f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}"
-            )
+            token_key = f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{current_user.user.user_id}'
+        redis_token, redis_token_ttl = await OnlineService.get_access_token_services(request.app.state.redis, token_key)
         if token == redis_token:
-            if AppConfig.app_same_time_login:
-                await request.app.state.redis.set(
-                    f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}',
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-            else:
-                await request.app.state.redis.set(
-                    f"{RedisInitKeyConfig.ACCESS_TOKEN.key}:{query_user.get('user_basic_info').user_id}",
-                    redis_token,
-                    ex=timedelta(minutes=JwtConfig.jwt_redis_expire_minutes),
-                )
-
-            role_id_list = [item.role_id for item in query_user.get('user_role_info')]
-            if 1 in role_id_list:
-                permissions = ['*:*:*']
-            else:
-                permissions = [row.perms for row in query_user.get('user_menu_info')]
-            post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-            role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
-            roles = [row.role_key for row in query_user.get('user_role_info')]
-
-            current_user = CurrentUserModel(
-                permissions=permissions,
-                roles=roles,
-                user=UserInfoModel(
-                    **CamelCaseUtil.transform_result(query_user.get('user_basic_info')),
-                    postIds=post_ids,
-                    roleIds=role_ids,
-                    dept=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
-                    role=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
-                ),
-            )
+            # 剩余过期时间低于阈值时才同时延长登录令牌及在线会话登记信息的过期时间，避免每次请求都写入redis
+            if 0 <= redis_token_ttl < JwtConfig.jwt_redis_refresh_threshold_minutes * 60:
+                await OnlineService.refresh_online_session_services(request.app.state.redis, session_id, token_key)
+            # 缓存到当前请求中，供日志装饰器等在同一请求内复用
+            request.state.current_user = current_user
             return current_user
         else:
             logger.warning('用户token已失效，请重新登录')
             raise AuthException(data='', message='用户token已失效，请重新登录')
 
     @classmethod
-    async def get_current_user_routers(cls, user_id: int, query_db: AsyncSession):
+    def __decode_access_token(cls, token: str) -> dict:
         """
-        根据用户id获取当前用户路由信息
+        校验并解析token，校验通过的结果按token摘要缓存在进程内，缓存时间不超过token的剩余有效期
 
-        :param user_id: 用户id
+        :param token: 用户token
+        :return: token内容
+        :raise: token不合法或已过期时抛出InvalidTokenError
+        """
+        token_digest = hashlib.sha256(token.encode('utf-8')).hexdigest()
+        payload = cls.token_cache.get(token_digest)
+        if payload is None:
+            payload = jwt.decode(token, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
+            expire_seconds = min(payload.get('exp', 0) - time.time(), CacheConfig.cache_token_local_expire_seconds)
+            if expire_seconds > 0:
+                cls.token_cache.set(token_digest, payload, expire_seconds)
+
+        return payload
+
+    @classmethod
+    def __generate_principal_data(cls, query_user: UserAggregate):
+        """
+        工具方法：根据用户信息查询结果生成构建当前用户信息对象所需的数据
+
+        :param query_user: 用户信息查询结果
+        :return: 当前用户信息数据
+        """
+        role_id_list = [item.role_id for item in query_user.user_role_info]
+        if 1 in role_id_list:
+            permissions = ['*:*:*']
+        else:
+            permissions = query_user.user_perms
+        post_ids = ','.join([str(row.post_id) for row in query_user.user_post_info])
+        role_ids = ','.join([str(row.role_id) for row in query_user.user_role_info])
+        roles = [row.role_key for row in query_user.user_role_info]
+
+        return dict(
+            permissions=permissions,
+            roles=roles,
+            user=dict(
+                **CamelCaseUtil.transform_result(query_user.user_basic_info),
+                postIds=post_ids,
+                roleIds=role_ids,
+                dept=CamelCaseUtil.transform_result(query_user.user_dept_info),
+                role=CamelCaseUtil.transform_result(query_user.user_role_info),
+            ),
+        )
+
+    @classmethod
+    async def get_current_user_routers(
+        cls, redis: aioredis.Redis, current_user: CurrentUserModel, query_db: AsyncSession
+    ):
+        """
+        获取当前用户路由信息，路由信息仅取决于用户的角色组合，按角色组合缓存
+
+        :param redis: redis对象
+        :param current_user: 当前用户对象
         :param query_db: orm对象
         :return: 当前用户路由信息对象
         """
-        query_user = await UserDao.get_user_by_id(query_db, user_id=user_id)
-        user_router_menu = sorted(
-            [
-                row
-                for row in query_user.get('user_menu_info')
-                if row.menu_type in [MenuConstant.TYPE_DIR, MenuConstant.TYPE_MENU]
-            ],
-            key=lambda x: x.order_num,
-        )
+        role_ids = current_user.user.role_ids
+        cache_key, user_routers = await RouterCacheService.get_routers_services(redis, role_ids)
+        if user_routers is not None:
+            return user_routers
+        generation = RouterCacheService.generation
+        role_id_list = [int(role_id) for role_id in (role_ids or '').split(',') if role_id]
+        user_router_menu = await MenuDao.get_router_menu_list_by_role_ids(query_db, role_id_list)
         menus = cls.__generate_menus(0, user_router_menu)
         user_router = cls.__generate_user_router_menu(menus)
-        return [router.model_dump(exclude_unset=True, by_alias=True) for router in user_router]
+        user_routers = [router.model_dump(exclude_unset=True, by_alias=True) for router in user_router]
+
+        return await RouterCacheService.set_routers_services(redis, cache_key, user_routers, generation)
 
     @classmethod
     def __generate_menus(cls, pid: int, permission_list: List[SysMenu]):
         """
-        工具方法：根据菜单信息生成菜单信息树形嵌套数据
+        工具方法：根据菜单信息生成菜单信息树形嵌套数据，先按上级菜单id分组，每个菜单只处理一次
 
         :param pid: 菜单id
         :param permission_list: 菜单列表信息
         :return: 菜单信息树形嵌套数据
         """
-        menu_list: List[MenuTreeModel] = []
+        children_map: Dict[int, List[MenuTreeModel]] = {}
         for permission in permission_list:
-            if permission.parent_id == pid:
-                children = cls.__generate_menus(permission.menu_id, permission_list)
-                menu_list_data = MenuTreeModel(**CamelCaseUtil.transform_result(permission))
+            children_map.setdefault(permission.parent_id, []).append(
+                MenuTreeModel(**CamelCaseUtil.transform_result(permission))
+            )
+        for menu_list in children_map.values():
+            for menu in menu_list:
+                children = children_map.get(menu.menu_id)
                 if children:
-                    menu_list_data.children = children
-                menu_list.append(menu_list_data)
+                    menu.children = children
 
-        return menu_list
+        return children_map.get(pid, [])
 
     @classmethod
     def __generate_user_router_menu(cls, permission_list: List[MenuTreeModel]):
@@ -383,18 +426,9 @@ class LoginService:
         :param user_register: 注册用户对象
         :return: 注册结果
         """
-        register_enabled = (
-            True
-            if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.registerUser')
-            == 'true'
-            else False
-        )
-        captcha_enabled = (
-            True
-            if await request.app.state.redis.get(f'{RedisInitKeyConfig.SYS_CONFIG.key}:sys.account.captchaEnabled')
-            == 'true'
-            else False
-        )
+        config_snapshot = ConfigService.get_config_snapshot()
+        register_enabled = config_snapshot.register_enabled
+        captcha_enabled = config_snapshot.captcha_enabled
         if user_register.password == user_register.confirm_password:
             if register_enabled:
                 if captcha_enabled:
@@ -408,7 +442,7 @@ class LoginService:
                 add_user = AddUserModel(
                     userName=user_register.username,
                     nickName=user_register.username,
-                    password=PwdUtil.get_password_hash(user_register.password),
+                    password=await PwdUtil.get_password_hash_async(user_register.password),
                 )
                 result = await UserService.add_user_services(query_db, add_user)
                 return result
@@ -458,7 +492,7 @@ class LoginService:
             f'{RedisInitKeyConfig.SMS_CODE.key}:{forget_user.session_id}'
         )
         if forget_user.sms_code == redis_sms_result:
-            forget_user.password = PwdUtil.get_password_hash(forget_user.password)
+            forget_user.password = await PwdUtil.get_password_hash_async(forget_user.password)
             forget_user.user_id = (await UserDao.get_user_by_name(query_db, forget_user.user_name)).user_id
             edit_result = await UserService.reset_user_services(query_db, forget_user)
             result = edit_result.dict()
@@ -479,7 +513,7 @@ class LoginService:
         :param session_id: 会话编号
         :return: 退出登录结果
         """
-        await request.app.state.redis.delete(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+        await OnlineService.remove_online_sessions_services(request.app.state.redis, [session_id])
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_access_token')
         # await request.app.state.redis.delete(f'{current_user.user.user_id}_session_id')
 
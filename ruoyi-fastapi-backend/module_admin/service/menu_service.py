@@ -8,6 +8,8 @@ from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.menu_vo import DeleteMenuModel, MenuQueryModel, MenuModel
 from module_admin.entity.vo.role_vo import RoleMenuQueryModel
 from module_admin.entity.vo.user_vo import CurrentUserModel
+from module_admin.service.principal_cache_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
 from utils.common_util import CamelCaseUtil
 from utils.string_util import StringUtil
 
@@ -106,6 +108,8 @@ class MenuService:
             try:
                 await MenuDao.add_menu_dao(query_db, page_object)
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
+                await RouterCacheService.invalidate_router_services()
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -133,6 +137,8 @@ class MenuService:
                 try:
                     await MenuDao.edit_menu_dao(query_db, edit_menu)
                     await query_db.commit()
+                    await PrincipalCacheService.invalidate_principal_services()
+                    await RouterCacheService.invalidate_router_services()
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -159,6 +165,8 @@ class MenuService:
                         raise ServiceWarning(message='菜单已分配,不允许删除')
                     await MenuDao.delete_menu_dao(query_db, MenuModel(menuId=menu_id))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
+                await RouterCacheService.invalidate_router_services()
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
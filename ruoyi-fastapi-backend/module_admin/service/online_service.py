@@ -1,62 +1,80 @@
 import jwt
+import time
+from datetime import timedelta
 from fastapi import Request
+from jwt.exceptions import InvalidTokenError
+from redis import asyncio as aioredis
+from typing import Dict, List, Optional, Tuple
 from config.enums import RedisInitKeyConfig
-from config.env import JwtConfig
+from config.env import AppConfig, JwtConfig
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
-from module_admin.entity.vo.online_vo import DeleteOnlineModel, OnlineQueryModel
+from module_admin.entity.vo.online_vo import DeleteOnlineModel, OnlinePageQueryModel
 from utils.common_util import CamelCaseUtil
+from utils.log_util import logger
+from utils.page_util import PageResponseModel
 
 
 class OnlineService:
     """
     在线用户管理模块服务层
+
+    在线会话登记在redis中：online_session_index为以登录时间为分值的会话编号有序集合，
+    online_session:{会话编号}为保存会话信息的哈希，过期时间与登录令牌一致
     """
 
+    batch_size = 1000
+    online_fields = ['token_id', 'user_name', 'dept_name', 'ipaddr', 'login_location', 'browser', 'os', 'login_time']
+
     @classmethod
-    async def get_online_list_services(cls, request: Request, query_object: OnlineQueryModel):
+    async def get_online_list_services(cls, request: Request, query_object: OnlinePageQueryModel):
         """
         获取在线用户表信息service
 
         :param request: Request对象
         :param query_object: 查询参数对象
-        :return: 在线用户列表信息
-        """
-        access_token_keys = await request.app.state.redis.keys(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}*')
-        if not access_token_keys:
-            access_token_keys = []
-        access_token_values_list = [await request.app.state.redis.get(key) for key in access_token_keys]
-        online_info_list = []
-        for item in access_token_values_list:
-            payload = jwt.decode(item, JwtConfig.jwt_secret_key, algorithms=[JwtConfig.jwt_algorithm])
-            online_dict = dict(
-                token_id=payload.get('session_id'),
-                user_name=payload.get('user_name'),
-                dept_name=payload.get('dept_name'),
-                ipaddr=payload.get('login_info').get('ipaddr'),
-                login_location=payload.get('login_info').get('loginLocation'),
-                browser=payload.get('login_info').get('browser'),
-                os=payload.get('login_info').get('os'),
-                login_time=payload.get('login_info').get('loginTime'),
-            )
-            if query_object.user_name and not query_object.ipaddr:
-                if query_object.user_name == payload.get('user_name'):
-                    online_info_list = [online_dict]
-                    break
-            elif not query_object.user_name and query_object.ipaddr:
-                if query_object.ipaddr == payload.get('login_info').get('ipaddr'):
-                    online_info_list = [online_dict]
-                    break
-            elif query_object.user_name and query_object.ipaddr:
-                if query_object.user_name == payload.get('user_name') and query_object.ipaddr == payload.get(
-                    'login_info'
-                ).get('ipaddr'):
-                    online_info_list = [online_dict]
-                    break
-            else:
-                online_info_list.append(online_dict)
-
-        return CamelCaseUtil.transform_result(online_info_list)
+        :return: 在线用户分页列表信息
+        """
+        redis = request.app.state.redis
+        session_ids = await redis.zrevrange(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, 0, -1)
+        # 分批读取筛选字段，同时清理会话信息已过期的索引
+        matched_session_ids = []
+        stale_session_ids = []
+        for index in range(0, len(session_ids), cls.batch_size):
+            batch_session_ids = session_ids[index : index + cls.batch_size]
+            async with redis.pipeline(transaction=False) as pipe:
+                for session_id in batch_session_ids:
+                    pipe.hmget(cls.__get_session_key(session_id), 'user_name', 'ipaddr')
+                filter_values = await pipe.execute()
+            for session_id, (user_name, ipaddr) in zip(batch_session_ids, filter_values):
+                if user_name is None:
+                    stale_session_ids.append(session_id)
+                elif (not query_object.user_name or query_object.user_name == user_name) and (
+                    not query_object.ipaddr or query_object.ipaddr == ipaddr
+                ):
+                    matched_session_ids.append(session_id)
+        if stale_session_ids:
+            await redis.zrem(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, *stale_session_ids)
+        # 仅读取当前页的完整会话信息
+        start = (query_object.page_num - 1) * query_object.page_size
+        page_session_ids = matched_session_ids[start : start + query_object.page_size]
+        async with redis.pipeline(transaction=False) as pipe:
+            for session_id in page_session_ids:
+                pipe.hgetall(cls.__get_session_key(session_id))
+            session_infos = await pipe.execute()
+        online_info_list = [
+            {field: session_info.get(field) or None for field in cls.online_fields}
+            for session_info in session_infos
+            if session_info
+        ]
+
+        return PageResponseModel(
+            rows=CamelCaseUtil.transform_result(online_info_list),
+            page_num=query_object.page_num,
+            page_size=query_object.page_size,
+            total=len(matched_session_ids),
+            has_next=start + query_object.page_size < len(matched_session_ids),
+        )
 
     @classmethod
     async def delete_online_services(cls, request: Request, page_object: DeleteOnlineModel):
@@ -68,9 +86,209 @@ class OnlineService:
         :return: 强退在线用户校验结果
         """
         if page_object.token_ids:
-            token_id_list = page_object.token_ids.split(',')
-            for token_id in token_id_list:
-                await request.app.state.redis.delete(f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{token_id}')
+            token_id_list = [token_id for token_id in page_object.token_ids.split(',') if token_id]
+            await cls.remove_online_sessions_services(request.app.state.redis, token_id_list)
             return CrudResponseModel(is_success=True, message='强退成功')
         else:
             raise ServiceException(message='传入session_id为空')
+
+    @classmethod
+    async def save_online_session_services(
+        cls, redis: aioredis.Redis, session_id: str, token_key: str, access_token: str, session_info: Dict
+    ):
+        """
+        登录成功后保存登录令牌并登记在线会话service
+
+        :param redis: redis对象
+        :param session_id: 会话编号
+        :param token_key: 登录令牌的redis键
+        :param access_token: 登录令牌
+        :param session_info: 会话信息，包含user_id、user_name、dept_name及登录信息login_info
+        :return:
+        """
+        replaced_session_id = None
+        if not AppConfig.app_same_time_login:
+            # 同一账号同一时间只能登录一次时，新登录会顶替旧会话，需一并移除旧会话的登记信息
+            replaced_session_id = cls.__get_token_session_id(await redis.get(token_key))
+        now = time.time()
+        expire = timedelta(minutes=JwtConfig.jwt_redis_expire_minutes)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.set(token_key, access_token, ex=expire)
+            if replaced_session_id and replaced_session_id != session_id:
+                pipe.delete(cls.__get_session_key(replaced_session_id))
+                pipe.zrem(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, replaced_session_id)
+            pipe.hset(
+                cls.__get_session_key(session_id),
+                mapping=cls.__build_session_mapping(session_id, token_key, session_info),
+            )
+            pipe.expire(cls.__get_session_key(session_id), expire)
+            pipe.zadd(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, {session_id: now})
+            # 登录令牌自签发起超过有效期后必然失效，其会话索引可直接按登录时间清理
+            pipe.zremrangebyscore(
+                RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, '-inf', now - JwtConfig.jwt_expire_minutes * 60
+            )
+            await pipe.execute()
+
+    @classmethod
+    async def get_access_token_services(cls, redis: aioredis.Redis, token_key: str) -> Tuple[Optional[str], int]:
+        """
+        在一次往返中获取redis中保存的登录令牌及其剩余过期时间service
+
+        :param redis: redis对象
+        :param token_key: 登录令牌的redis键
+        :return: 登录令牌（不存在时为None）及剩余过期时间（单位：秒）
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(token_key)
+            pipe.ttl(token_key)
+            access_token, ttl = await pipe.execute()
+
+        return access_token, ttl
+
+    @classmethod
+    async def refresh_online_session_services(cls, redis: aioredis.Redis, session_id: Optional[str], token_key: str):
+        """
+        延长登录令牌及在线会话登记信息的过期时间service
+
+        :param redis: redis对象
+        :param session_id: 会话编号
+        :param token_key: 登录令牌的redis键
+        :return:
+        """
+        expire = timedelta(minutes=JwtConfig.jwt_redis_expire_minutes)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.expire(token_key, expire)
+            if session_id:
+                pipe.expire(cls.__get_session_key(session_id), expire)
+            await pipe.execute()
+
+    @classmethod
+    async def remove_online_sessions_services(cls, redis: aioredis.Redis, session_ids: List[str]):
+        """
+        批量移除在线会话及其登录令牌service
+
+        :param redis: redis对象
+        :param session_ids: 会话编号列表
+        :return:
+        """
+        if not session_ids:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for session_id in session_ids:
+                pipe.hget(cls.__get_session_key(session_id), 'token_key')
+            token_keys = await pipe.execute()
+        async with redis.pipeline(transaction=False) as pipe:
+            for session_id, token_key in zip(session_ids, token_keys):
+                # 未登记的会话按照同一账号可同时登录时的令牌键删除
+                pipe.delete(token_key or f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:{session_id}')
+                pipe.delete(cls.__get_session_key(session_id))
+            pipe.zrem(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key, *session_ids)
+            await pipe.execute()
+
+    @classmethod
+    async def init_online_session_index_services(cls, redis: aioredis.Redis):
+        """
+        应用启动时为尚未登记的登录令牌补充在线会话登记信息service
+
+        :param redis: redis对象
+        :return:
+        """
+        if await redis.exists(RedisInitKeyConfig.ONLINE_SESSION_INDEX.key):
+            return
+        token_keys = [
+            key async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.ACCESS_TOKEN.key}:*', count=cls.batch_size)
+        ]
+        session_count = 0
+        for index in range(0, len(token_keys), cls.batch_size):
+            batch_token_keys = token_keys[index : index + cls.batch_size]
+            access_tokens = await redis.mget(batch_token_keys)
+            async with redis.pipeline(transaction=False) as pipe:
+                for token_key in batch_token_keys:
+                    pipe.ttl(token_key)
+                ttls = await pipe.execute()
+            async with redis.pipeline(transaction=False) as pipe:
+                for token_key, access_token, ttl in zip(batch_token_keys, access_tokens, ttls):
+                    payload = cls.__decode_token(access_token)
+                    if not payload or not payload.get('session_id') or ttl <= 0:
+                        continue
+                    session_key = cls.__get_session_key(payload.get('session_id'))
+                    pipe.hset(
+                        session_key, mapping=cls.__build_session_mapping(payload.get('session_id'), token_key, payload)
+                    )
+                    pipe.expire(session_key, ttl)
+                    # 令牌签发时间即为登录时间
+                    pipe.zadd(
+                        RedisInitKeyConfig.ONLINE_SESSION_INDEX.key,
+                        {payload.get('session_id'): payload.get('exp', 0) - JwtConfig.jwt_expire_minutes * 60},
+                    )
+                    session_count += 1
+                await pipe.execute()
+        if session_count:
+            logger.info(f'已为{session_count}个登录令牌补充在线会话登记信息')
+
+    @classmethod
+    def __get_session_key(cls, session_id: str):
+        """
+        获取在线会话登记信息的redis键
+
+        :param session_id: 会话编号
+        :return: 在线会话登记信息的redis键
+        """
+        return f'{RedisInitKeyConfig.ONLINE_SESSION.key}:{session_id}'
+
+    @classmethod
+    def __build_session_mapping(cls, session_id: str, token_key: str, session_info: Dict):
+        """
+        生成在线会话登记信息
+
+        :param session_id: 会话编号
+        :param token_key: 登录令牌的redis键
+        :param session_info: 会话信息，与登录令牌内容结构一致
+        :return: 在线会话登记信息
+        """
+        login_info = session_info.get('login_info') or {}
+        session_mapping = {
+            'token_id': session_id,
+            'user_id': session_info.get('user_id'),
+            'user_name': session_info.get('user_name'),
+            'dept_name': session_info.get('dept_name'),
+            'ipaddr': login_info.get('ipaddr'),
+            'login_location': login_info.get('loginLocation'),
+            'browser': login_info.get('browser'),
+            'os': login_info.get('os'),
+            'login_time': login_info.get('loginTime'),
+            'token_key': token_key,
+        }
+        # redis哈希不支持保存None值
+        return {key: '' if value is None else str(value) for key, value in session_mapping.items()}
+
+    @classmethod
+    def __get_token_session_id(cls, access_token: Optional[str]):
+        """
+        获取登录令牌中的会话编号
+
+        :param access_token: 登录令牌
+        :return: 会话编号，令牌不合法时返回None
+        """
+        payload = cls.__decode_token(access_token)
+        return payload.get('session_id') if payload else None
+
+    @classmethod
+    def __decode_token(cls, access_token: Optional[str]):
+        """
+        解析登录令牌，不校验过期时间
+
+        :param access_token: 登录令牌
+        :return: 令牌内容，令牌不合法时返回None
+        """
+        if not access_token:
+            return None
+        try:
+            return jwt.decode(
+                access_token,
+                JwtConfig.jwt_secret_key,
+                algorithms=[JwtConfig.jwt_algorithm],
+                options={'verify_exp': False},
+            )
+        except InvalidTokenError:
+            return None
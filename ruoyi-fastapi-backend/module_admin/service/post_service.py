@@ -1,12 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict
 from config.constant import CommonConstant
+from config.enums import ExportFormat
 from exceptions.exception import ServiceException
 from module_admin.dao.post_dao import PostDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.post_vo import DeletePostModel, PostModel, PostPageQueryModel
+from module_admin.service.principal_cache_service import PrincipalCacheService
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
+from utils.page_util import PageUtil
 
 
 class PostService:
@@ -102,6 +105,7 @@ class PostService:
                 try:
                     await PostDao.edit_post_dao(query_db, edit_post)
                     await query_db.commit()
+                    await PrincipalCacheService.invalidate_principal_services()
                     return CrudResponseModel(is_success=True, message='更新成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -127,6 +131,7 @@ class PostService:
                         raise ServiceException(message=f'{post.post_name}已分配，不能删除')
                     await PostDao.delete_post_dao(query_db, PostModel(postId=post_id))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -152,12 +157,15 @@ class PostService:
         return result
 
     @staticmethod
-    async def export_post_list_services(post_list: List):
+    async def export_post_list_services(
+        query_object: PostPageQueryModel, export_format: ExportFormat = ExportFormat.EXCEL
+    ):
         """
         导出岗位信息service
 
-        :param post_list: 岗位信息列表
-        :return: 岗位信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param export_format: 导出格式
+        :return: 岗位信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -173,11 +181,14 @@ class PostService:
             'remark': '备注',
         }
 
-        for item in post_list:
+        def format_post(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(post_list, mapping_dict)
+            return item
+
+        post_stream = PageUtil.stream(PostDao.get_post_list_query(query_object))
+        binary_data = ExcelUtil.export_stream(post_stream, mapping_dict, export_format, format_post)
 
         return binary_data
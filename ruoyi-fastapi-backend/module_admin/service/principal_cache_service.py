@@ -0,0 +1,113 @@
+import json
+from datetime import timedelta
+from fastapi.encoders import jsonable_encoder
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Iterable, Optional, Union
+from config.constant import CacheConstant
+from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig
+from module_admin.entity.vo.user_vo import CurrentUserModel
+from utils.cache_util import CacheSyncUtil, LocalCache
+from utils.log_util import logger
+
+
+class PrincipalCacheService:
+    """
+    登录用户信息缓存服务层，本地LRU缓存在前，Redis缓存在后
+    """
+
+    local_cache = LocalCache(
+        max_size=CacheConfig.cache_principal_local_max_size,
+        expire_seconds=CacheConfig.cache_principal_local_expire_seconds,
+    )
+    generation = 0
+
+    @classmethod
+    async def get_principal_services(cls, redis: aioredis.Redis, user_id: int) -> Optional[CurrentUserModel]:
+        """
+        从缓存获取登录用户信息service
+
+        :param redis: redis对象
+        :param user_id: 用户id
+        :return: 登录用户信息，缓存未命中时返回None
+        """
+        current_user = cls.local_cache.get(user_id)
+        if current_user is not None:
+            return current_user
+        principal_data = await redis.get(f'{RedisInitKeyConfig.USER_PRINCIPAL.key}:{user_id}')
+        if principal_data:
+            current_user = CurrentUserModel(**json.loads(principal_data))
+            cls.local_cache.set(user_id, current_user)
+
+        return current_user
+
+    @classmethod
+    async def set_principal_services(
+        cls, redis: aioredis.Redis, user_id: int, principal_data: dict, generation: int
+    ) -> CurrentUserModel:
+        """
+        构建登录用户信息并写入缓存service
+
+        :param redis: redis对象
+        :param user_id: 用户id
+        :param principal_data: 用于构建登录用户信息的数据
+        :param generation: 开始查询数据库前的缓存版本，查询期间缓存被失效时不再写入缓存
+        :return: 登录用户信息
+        """
+        current_user = CurrentUserModel(**principal_data)
+        if generation == cls.generation:
+            cls.local_cache.set(user_id, current_user)
+            await redis.set(
+                f'{RedisInitKeyConfig.USER_PRINCIPAL.key}:{user_id}',
+                json.dumps(jsonable_encoder(principal_data), ensure_ascii=False),
+                ex=timedelta(minutes=CacheConfig.cache_principal_redis_expire_minutes),
+            )
+
+        return current_user
+
+    @classmethod
+    async def invalidate_principal_services(cls, user_ids: Optional[Iterable[Union[int, str]]] = None):
+        """
+        失效登录用户信息缓存service
+
+        :param user_ids: 需要失效的用户id，为空时失效全部用户
+        :return:
+        """
+        if user_ids is None:
+            payload = CacheConstant.SYNC_ALL
+        else:
+            payload = ','.join([str(user_id) for user_id in user_ids])
+            if not payload:
+                return
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_PRINCIPAL, payload)
+        redis = CacheSyncUtil.redis
+        if redis is None:
+            return
+        try:
+            if payload == CacheConstant.SYNC_ALL:
+                cache_keys = [key async for key in redis.scan_iter(match=f'{RedisInitKeyConfig.USER_PRINCIPAL.key}:*')]
+            else:
+                cache_keys = [f'{RedisInitKeyConfig.USER_PRINCIPAL.key}:{user_id}' for user_id in payload.split(',')]
+            if cache_keys:
+                await redis.delete(*cache_keys)
+        except RedisError as e:
+            logger.error(f'登录用户信息缓存清除失败，详细错误信息：{e}')
+
+    @classmethod
+    def evict_local_principal(cls, payload: str):
+        """
+        失效当前进程的登录用户信息本地缓存
+
+        :param payload: 失效消息内容，为用户id列表或全部失效标识
+        :return:
+        """
+        cls.generation += 1
+        if payload == CacheConstant.SYNC_ALL:
+            cls.local_cache.clear()
+        else:
+            for user_id in payload.split(','):
+                cls.local_cache.delete(int(user_id))
+
+
+CacheSyncUtil.register(CacheConstant.TOPIC_PRINCIPAL, PrincipalCacheService.evict_local_principal)
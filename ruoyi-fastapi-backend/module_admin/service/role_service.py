@@ -1,6 +1,8 @@
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import Dict
 from config.constant import CommonConstant
+from config.enums import ExportFormat
 from exceptions.exception import ServiceException
 from module_admin.entity.vo.common_vo import CrudResponseModel
 from module_admin.entity.vo.role_vo import (
@@ -15,9 +17,11 @@ from module_admin.entity.vo.role_vo import (
 from module_admin.entity.vo.user_vo import UserInfoModel, UserRolePageQueryModel
 from module_admin.dao.role_dao import RoleDao
 from module_admin.dao.user_dao import UserDao
+from module_admin.service.principal_cache_service import PrincipalCacheService
+from module_admin.service.router_cache_service import RouterCacheService
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
-from utils.page_util import PageResponseModel
+from utils.page_util import PageResponseModel, PageUtil
 
 
 class RoleService:
@@ -55,7 +59,11 @@ class RoleService:
 
     @classmethod
     async def get_role_list_services(
-        cls, query_db: AsyncSession, query_object: RolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: RolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         获取角色列表信息service
@@ -84,7 +92,7 @@ class RoleService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_role_data_scope_services(cls, query_db: AsyncSession, role_ids: str, data_scope_sql: str):
+    async def check_role_data_scope_services(cls, query_db: AsyncSession, role_ids: str, data_scope_sql: ColumnElement):
         """
         校验角色是否有数据权限service
 
@@ -192,6 +200,8 @@ class RoleService:
                                 query_db, RoleMenuModel(roleId=page_object.role_id, menuId=menu)
                             )
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
+                await RouterCacheService.invalidate_router_services()
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -220,6 +230,7 @@ class RoleService:
                             query_db, RoleDeptModel(roleId=page_object.role_id, deptId=dept)
                         )
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -250,6 +261,8 @@ class RoleService:
                     await RoleDao.delete_role_dept_dao(query_db, RoleDeptModel(**role_id_dict))
                     await RoleDao.delete_role_dao(query_db, RoleModel(**role_id_dict))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services()
+                await RouterCacheService.invalidate_router_services()
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -275,12 +288,18 @@ class RoleService:
         return result
 
     @staticmethod
-    async def export_role_list_services(role_list: List):
+    async def export_role_list_services(
+        query_object: RolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        export_format: ExportFormat = ExportFormat.EXCEL,
+    ):
         """
         导出角色列表信息service
 
-        :param role_list: 角色信息列表
-        :return: 角色列表信息对象
+        :param query_object: 查询参数对象
+        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param export_format: 导出格式
+        :return: 角色列表信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -296,18 +315,25 @@ class RoleService:
             'remark': '备注',
         }
 
-        for item in role_list:
+        def format_role(item: Dict):
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
                 item['status'] = '停用'
-        binary_data = ExcelUtil.export_list2excel(role_list, mapping_dict)
+            return item
+
+        role_stream = PageUtil.stream(RoleDao.get_role_list_query(query_object, data_scope_sql))
+        binary_data = ExcelUtil.export_stream(role_stream, mapping_dict, export_format, format_role)
 
         return binary_data
 
     @classmethod
     async def get_role_user_allocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取已分配用户列表
@@ -332,7 +358,11 @@ class RoleService:
 
     @classmethod
     async def get_role_user_unallocated_list_services(
-        cls, query_db: AsyncSession, page_object: UserRolePageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        page_object: UserRolePageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         根据角色id获取未分配用户列表
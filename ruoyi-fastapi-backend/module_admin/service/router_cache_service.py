@@ -0,0 +1,113 @@
+import hashlib
+import json
+from datetime import timedelta
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import List, Optional, Tuple
+from config.constant import CacheConstant
+from config.enums import RedisInitKeyConfig
+from config.env import CacheConfig
+from utils.cache_util import CacheSyncUtil, LocalCache
+from utils.log_util import logger
+
+
+class RouterCacheService:
+    """
+    用户路由信息缓存服务层，路由信息仅取决于用户的角色组合，按角色组合及菜单版本号缓存，本地LRU缓存在前，Redis缓存在后
+    """
+
+    local_cache = LocalCache(
+        max_size=CacheConfig.cache_router_local_max_size,
+        expire_seconds=CacheConfig.cache_router_local_expire_seconds,
+    )
+    generation = 0
+
+    @classmethod
+    async def get_routers_services(
+        cls, redis: aioredis.Redis, role_ids: Optional[str]
+    ) -> Tuple[Optional[str], Optional[List]]:
+        """
+        从缓存获取角色组合对应的路由信息service
+
+        :param redis: redis对象
+        :param role_ids: 逗号分隔的角色id
+        :return: 当前菜单版本号下的redis缓存键（本地缓存命中时为None）及路由信息，缓存未命中时路由信息为None
+        """
+        role_hash = cls.__get_role_hash(role_ids)
+        routers = cls.local_cache.get(role_hash)
+        if routers is not None:
+            return None, routers
+        generation = cls.generation
+        version = await redis.get(RedisInitKeyConfig.SYS_ROUTER_VERSION.key) or '0'
+        cache_key = f'{RedisInitKeyConfig.SYS_ROUTER.key}:{version}:{role_hash}'
+        routers_data = await redis.get(cache_key)
+        if routers_data:
+            routers = json.loads(routers_data)
+            if generation == cls.generation:
+                cls.local_cache.set(role_hash, routers)
+
+        return cache_key, routers
+
+    @classmethod
+    async def set_routers_services(cls, redis: aioredis.Redis, cache_key: str, routers: List, generation: int) -> List:
+        """
+        将角色组合对应的路由信息写入缓存service
+
+        :param redis: redis对象
+        :param cache_key: 获取缓存时返回的redis缓存键
+        :param routers: 路由信息
+        :param generation: 开始查询前的缓存版本，查询期间缓存被失效时不再写入本地缓存
+        :return: 路由信息
+        """
+        if generation == cls.generation:
+            cls.local_cache.set(cache_key.rsplit(':', 1)[-1], routers)
+        # redis缓存键包含查询前的菜单版本号，菜单变更后旧版本的缓存不会再被读取
+        await redis.set(
+            cache_key,
+            json.dumps(routers, ensure_ascii=False),
+            ex=timedelta(minutes=CacheConfig.cache_router_redis_expire_minutes),
+        )
+
+        return routers
+
+    @classmethod
+    async def invalidate_router_services(cls):
+        """
+        菜单或角色菜单变更后递增菜单版本号并失效全部路由信息缓存service
+
+        :return:
+        """
+        redis = CacheSyncUtil.redis
+        if redis is not None:
+            try:
+                await redis.incr(RedisInitKeyConfig.SYS_ROUTER_VERSION.key)
+            except RedisError as e:
+                logger.error(f'菜单版本号更新失败，详细错误信息：{e}')
+        await CacheSyncUtil.publish(CacheConstant.TOPIC_ROUTER)
+
+    @classmethod
+    def evict_local_router(cls, payload: str):
+        """
+        失效当前进程的路由信息本地缓存
+
+        :param payload: 失效消息内容
+        :return:
+        """
+        cls.generation += 1
+        cls.local_cache.clear()
+
+    @classmethod
+    def __get_role_hash(cls, role_ids: Optional[str]):
+        """
+        获取角色组合的摘要，角色id排序后计算，与角色顺序无关
+
+        :param role_ids: 逗号分隔的角色id
+        :return: 角色组合摘要
+        """
+        sorted_role_ids = ','.join(
+            sorted({role_id.strip() for role_id in (role_ids or '').split(',') if role_id.strip()})
+        )
+        return hashlib.sha1(sorted_role_ids.encode('utf-8')).hexdigest()
+
+
+CacheSyncUtil.register(CacheConstant.TOPIC_ROUTER, RouterCacheService.evict_local_router)
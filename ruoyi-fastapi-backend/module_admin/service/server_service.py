@@ -1,96 +1,277 @@
+import asyncio
 import os
 import platform
 import psutil
 import socket
 import time
-from module_admin.entity.vo.server_vo import CpuInfo, MemoryInfo, PyInfo, ServerMonitorModel, SysFiles, SysInfo
+from pydantic.alias_generators import to_camel
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, Optional, Tuple
+from config.env import ServerMonitorConfig
+from module_admin.entity.vo.server_vo import (
+    CpuInfo,
+    MemoryInfo,
+    NetInfo,
+    PwdPoolInfo,
+    PyInfo,
+    ServerMonitorModel,
+    SysFiles,
+    SysInfo,
+)
+from module_admin.service.captcha_service import CaptchaService
 from utils.common_util import bytes2human
+from utils.log_util import logger
+from utils.pwd_util import PwdUtil
+from utils.ring_buffer_util import RingBuffer
 
 
 class ServerService:
     """
-    服务监控模块服务层
+    服务监控模块服务层，后台任务按固定间隔在线程中采集系统指标，接口直接返回最近一次采集结果及环形缓冲区中的历史数据
     """
 
-    @staticmethod
-    async def get_server_monitor_info():
-        # CPU信息
-        # 获取CPU总核心数
+    history_fields = (
+        'cpu_used',
+        'cpu_sys',
+        'mem_usage',
+        'py_used',
+        'py_cpu',
+        'net_sent_rate',
+        'net_recv_rate',
+        'disk_read_rate',
+        'disk_write_rate',
+    )
+    _history: Optional[RingBuffer] = None
+    _latest: Optional[ServerMonitorModel] = None
+    _sampler_task: Optional[asyncio.Task] = None
+    _sys_info: Optional[SysInfo] = None
+    _process: Optional[psutil.Process] = None
+    _last_counters: Optional[Tuple[float, Optional[tuple], Optional[tuple]]] = None
+
+    @classmethod
+    async def get_server_monitor_info(cls, history: Optional[int] = None):
+        """
+        获取服务监控信息service
+
+        :param history: 需要返回的历史数据时间范围（单位：秒），为空时不返回历史数据
+        :return: 最近一次采集的服务监控信息
+        """
+        if cls._latest is None or cls._sampler_task is None:
+            # 未启用后台采集或尚未完成首次采集时即时采集
+            await cls.__sample()
+        # 验证码池及密码线程池状态为当前worker进程内的计数，查询时即时获取
+        update = {
+            'captcha_pool': CaptchaService.get_captcha_pool_stats(),
+            'pwd_pool': PwdPoolInfo(**PwdUtil.get_pool_stats()),
+        }
+        if not history or cls._history is None:
+            return cls._latest.model_copy(update=update)
+        history_data = cls._history.window(since=time.time() - history)
+        history_result = {
+            'timestamp': [int(timestamp * 1000) for timestamp in history_data.pop('timestamp')],
+            **{to_camel(field): [round(value, 2) for value in values] for field, values in history_data.items()},
+        }
+
+        update['history'] = history_result
+
+        return cls._latest.model_copy(update=update)
+
+    @classmethod
+    async def init_server_monitor_services(cls):
+        """
+        应用启动时启动系统指标后台采集任务
+
+        :return:
+        """
+        if ServerMonitorConfig.server_monitor_sample_interval <= 0 or cls._sampler_task is not None:
+            return
+        cls._history = RingBuffer(cls.history_fields, ServerMonitorConfig.server_monitor_history_size)
+        cls._sampler_task = asyncio.create_task(cls.__run_sampler())
+        logger.info('服务监控采集任务启动成功')
+
+    @classmethod
+    async def close_server_monitor_services(cls):
+        """
+        应用关闭时停止系统指标后台采集任务
+
+        :return:
+        """
+        if cls._sampler_task is None:
+            return
+        cls._sampler_task.cancel()
+        try:
+            await cls._sampler_task
+        except asyncio.CancelledError:
+            pass
+        cls._sampler_task = None
+        logger.info('服务监控采集任务关闭成功')
+
+    @classmethod
+    async def __run_sampler(cls):
+        """
+        按固定间隔持续采集系统指标，采集耗时不计入间隔
+
+        :return:
+        """
+        loop = asyncio.get_running_loop()
+        next_time = loop.time()
+        while True:
+            try:
+                await cls.__sample()
+            except Exception as e:
+                logger.exception(e)
+            next_time += ServerMonitorConfig.server_monitor_sample_interval
+            await asyncio.sleep(max(next_time - loop.time(), 0))
+
+    @classmethod
+    async def __sample(cls):
+        """
+        在线程中采集一次系统指标，更新最近一次采集结果并写入历史数据
+
+        :return:
+        """
+        sample_time = time.time()
+        cls._latest, history_values = await run_in_threadpool(cls.__collect, sample_time)
+        if cls._history is not None:
+            cls._history.append(sample_time, history_values)
+
+    @classmethod
+    def __collect(cls, sample_time: float) -> Tuple[ServerMonitorModel, Dict[str, float]]:
+        """
+        采集CPU、内存、磁盘、网络及当前进程信息
+
+        :param sample_time: 采集时间戳
+        :return: 服务监控信息及需要写入历史数据的数值指标
+        """
+        # CPU信息，与上次采集之间的平均使用率
         cpu_num = psutil.cpu_count(logical=True)
         cpu_usage_percent = psutil.cpu_times_percent()
-        cpu_used = cpu_usage_percent.user
-        cpu_sys = cpu_usage_percent.system
-        cpu_free = cpu_usage_percent.idle
-        cpu = CpuInfo(cpuNum=cpu_num, used=cpu_used, sys=cpu_sys, free=cpu_free)
+        cpu = CpuInfo(
+            cpuNum=cpu_num,
+            used=cpu_usage_percent.user,
+            sys=cpu_usage_percent.system,
+            free=cpu_usage_percent.idle,
+        )
 
         # 内存信息
         memory_info = psutil.virtual_memory()
-        memory_total = bytes2human(memory_info.total)
-        memory_used = bytes2human(memory_info.used)
-        memory_free = bytes2human(memory_info.free)
-        memory_usage = memory_info.percent
-        mem = MemoryInfo(total=memory_total, used=memory_used, free=memory_free, usage=memory_usage)
-
-        # 主机信息
-        # 获取主机名
-        hostname = socket.gethostname()
-        # 获取IP
-        computer_ip = socket.gethostbyname(hostname)
-        os_name = platform.platform()
-        computer_name = platform.node()
-        os_arch = platform.machine()
-        user_dir = os.path.abspath(os.getcwd())
-        sys = SysInfo(
-            computerIp=computer_ip, computerName=computer_name, osArch=os_arch, osName=os_name, userDir=user_dir
+        mem = MemoryInfo(
+            total=bytes2human(memory_info.total),
+            used=bytes2human(memory_info.used),
+            free=bytes2human(memory_info.free),
+            usage=memory_info.percent,
         )
 
-        # python解释器信息
-        current_pid = os.getpid()
-        current_process = psutil.Process(current_pid)
-        python_name = current_process.name()
-        python_version = platform.python_version()
-        python_home = current_process.exe()
-        start_time_stamp = current_process.create_time()
-        start_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time_stamp))
-        current_time_stamp = time.time()
-        difference = current_time_stamp - start_time_stamp
-        # 将时间差转换为天、小时和分钟数
-        days = int(difference // (24 * 60 * 60))  # 每天的秒数
-        hours = int((difference % (24 * 60 * 60)) // (60 * 60))  # 每小时的秒数
-        minutes = int((difference % (60 * 60)) // 60)  # 每分钟的秒数
-        run_time = f'{days}天{hours}小时{minutes}分钟'
-        # 获取当前Python程序的pid
-        pid = os.getpid()
-        # 获取该进程的内存信息
-        current_process_memory_info = psutil.Process(pid).memory_info()
-        py = PyInfo(
-            name=python_name,
-            version=python_version,
-            startTime=start_time,
-            runTime=run_time,
-            home=python_home,
-            total=bytes2human(memory_info.available),
-            used=bytes2human(current_process_memory_info.rss),
-            free=bytes2human(memory_info.available - current_process_memory_info.rss),
-            usage=round((current_process_memory_info.rss / memory_info.available) * 100, 2),
-        )
+        # 主机信息不会变化，仅首次采集时获取
+        if cls._sys_info is None:
+            hostname = socket.gethostname()
+            cls._sys_info = SysInfo(
+                computerIp=socket.gethostbyname(hostname),
+                computerName=platform.node(),
+                osArch=platform.machine(),
+                osName=platform.platform(),
+                userDir=os.path.abspath(os.getcwd()),
+            )
 
-        # 磁盘信息
-        io = psutil.disk_partitions()
+        # python解释器信息，复用同一进程对象以计算两次采集之间的CPU使用率
+        if cls._process is None:
+            cls._process = psutil.Process(os.getpid())
+        current_process = cls._process
+        with current_process.oneshot():
+            start_time_stamp = current_process.create_time()
+            current_process_memory_info = current_process.memory_info()
+            current_process_cpu = current_process.cpu_percent()
+            difference = sample_time - start_time_stamp
+            # 将时间差转换为天、小时和分钟数
+            days = int(difference // (24 * 60 * 60))  # 每天的秒数
+            hours = int((difference % (24 * 60 * 60)) // (60 * 60))  # 每小时的秒数
+            minutes = int((difference % (60 * 60)) // 60)  # 每分钟的秒数
+            py = PyInfo(
+                name=current_process.name(),
+                version=platform.python_version(),
+                startTime=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(start_time_stamp)),
+                runTime=f'{days}天{hours}小时{minutes}分钟',
+                home=current_process.exe(),
+                total=bytes2human(memory_info.available),
+                used=bytes2human(current_process_memory_info.rss),
+                free=bytes2human(memory_info.available - current_process_memory_info.rss),
+                usage=round((current_process_memory_info.rss / memory_info.available) * 100, 2),
+            )
+
+        # 磁盘信息，每个分区只查询一次使用量
         sys_files = []
-        for i in io:
-            o = psutil.disk_usage(i.device)
-            disk_data = SysFiles(
-                dirName=i.device,
-                sysTypeName=i.fstype,
-                typeName='本地固定磁盘（' + i.mountpoint.replace('\\', '') + '）',
-                total=bytes2human(o.total),
-                used=bytes2human(o.used),
-                free=bytes2human(o.free),
-                usage=f'{psutil.disk_usage(i.device).percent}%',
+        for partition in psutil.disk_partitions():
+            try:
+                disk_usage = psutil.disk_usage(partition.mountpoint)
+            except OSError:
+                continue
+            sys_files.append(
+                SysFiles(
+                    dirName=partition.device,
+                    sysTypeName=partition.fstype,
+                    typeName='本地固定磁盘（' + partition.mountpoint.replace('\\', '') + '）',
+                    total=bytes2human(disk_usage.total),
+                    used=bytes2human(disk_usage.used),
+                    free=bytes2human(disk_usage.free),
+                    usage=f'{disk_usage.percent}%',
+                )
             )
-            sys_files.append(disk_data)
 
-        result = ServerMonitorModel(cpu=cpu, mem=mem, sys=sys, py=py, sysFiles=sys_files)
+        # 网络及磁盘读写速率，根据与上次采集之间的累计量差值计算
+        net_counters = psutil.net_io_counters()
+        disk_counters = psutil.disk_io_counters()
+        net_io = (net_counters.bytes_sent, net_counters.bytes_recv) if net_counters else None
+        disk_io = (disk_counters.read_bytes, disk_counters.write_bytes) if disk_counters else None
+        net_sent_rate, net_recv_rate = cls.__get_rate(sample_time, net_io, 1)
+        disk_read_rate, disk_write_rate = cls.__get_rate(sample_time, disk_io, 2)
+        cls._last_counters = (sample_time, net_io, disk_io)
+        net = NetInfo(
+            sent=bytes2human(net_io[0]) if net_io else None,
+            recv=bytes2human(net_io[1]) if net_io else None,
+            sentRate=f'{bytes2human(net_sent_rate)}/s',
+            recvRate=f'{bytes2human(net_recv_rate)}/s',
+        )
 
-        return result
+        result = ServerMonitorModel(
+            cpu=cpu,
+            mem=mem,
+            sys=cls._sys_info,
+            py=py,
+            sysFiles=sys_files,
+            net=net,
+            sampleTime=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(sample_time)),
+        )
+        history_values = dict(
+            cpu_used=cpu_usage_percent.user,
+            cpu_sys=cpu_usage_percent.system,
+            mem_usage=memory_info.percent,
+            py_used=current_process_memory_info.rss,
+            py_cpu=current_process_cpu,
+            net_sent_rate=net_sent_rate,
+            net_recv_rate=net_recv_rate,
+            disk_read_rate=disk_read_rate,
+            disk_write_rate=disk_write_rate,
+        )
+
+        return result, history_values
+
+    @classmethod
+    def __get_rate(cls, sample_time: float, counters: Optional[tuple], index: int) -> Tuple[float, float]:
+        """
+        根据与上次采集之间的累计量差值计算每秒速率
+
+        :param sample_time: 本次采集时间戳
+        :param counters: 本次采集的两项累计量
+        :param index: 上次采集记录中对应累计量的下标
+        :return: 两项累计量的每秒速率，无上次采集记录时为0
+        """
+        if cls._last_counters is None or counters is None or cls._last_counters[index] is None:
+            return 0.0, 0.0
+        elapsed = sample_time - cls._last_counters[0]
+        if elapsed <= 0:
+            return 0.0, 0.0
+        last_counters = cls._last_counters[index]
+        return (
+            max(counters[0] - last_counters[0], 0) / elapsed,
+            max(counters[1] - last_counters[1], 0) / elapsed,
+        )
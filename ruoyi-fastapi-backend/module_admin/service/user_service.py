@@ -2,9 +2,11 @@ import io
 import pandas as pd
 from datetime import datetime
 from fastapi import Request, UploadFile
+from sqlalchemy import ColumnElement
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Union
 from config.constant import CommonConstant
+from config.enums import ExportFormat
 from exceptions.exception import ServiceException
 from module_admin.dao.user_dao import UserDao
 from module_admin.entity.vo.common_vo import CrudResponseModel
@@ -30,10 +32,11 @@ from module_admin.entity.vo.user_vo import (
 from module_admin.service.config_service import ConfigService
 from module_admin.service.dept_service import DeptService
 from module_admin.service.post_service import PostService
+from module_admin.service.principal_cache_service import PrincipalCacheService
 from module_admin.service.role_service import RoleService
 from utils.common_util import CamelCaseUtil
 from utils.excel_util import ExcelUtil
-from utils.page_util import PageResponseModel
+from utils.page_util import PageResponseModel, PageUtil
 from utils.pwd_util import PwdUtil
 
 
@@ -44,7 +47,11 @@ class UserService:
 
     @classmethod
     async def get_user_list_services(
-        cls, query_db: AsyncSession, query_object: UserPageQueryModel, data_scope_sql: str, is_page: bool = False
+        cls,
+        query_db: AsyncSession,
+        query_object: UserPageQueryModel,
+        data_scope_sql: ColumnElement,
+        is_page: bool = False,
     ):
         """
         获取用户列表信息service
@@ -84,7 +91,7 @@ class UserService:
             return CrudResponseModel(is_success=True, message='校验通过')
 
     @classmethod
-    async def check_user_data_scope_services(cls, query_db: AsyncSession, user_id: int, data_scope_sql: str):
+    async def check_user_data_scope_services(cls, query_db: AsyncSession, user_id: int, data_scope_sql: ColumnElement):
         """
         校验用户数据权限service
 
@@ -217,6 +224,7 @@ class UserService:
                                 query_db, UserPostModel(userId=page_object.user_id, postId=post)
                             )
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='更新成功')
             except Exception as e:
                 await query_db.rollback()
@@ -244,6 +252,7 @@ class UserService:
                     await UserDao.delete_user_post_dao(query_db, UserPostModel(**user_id_dict))
                     await UserDao.delete_user_dao(query_db, UserModel(**user_id_dict))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services(user_id_list)
                 return CrudResponseModel(is_success=True, message='删除成功')
             except Exception as e:
                 await query_db.rollback()
@@ -264,18 +273,18 @@ class UserService:
         roles = await RoleService.get_role_select_option_services(query_db)
         if user_id != '':
             query_user = await UserDao.get_user_detail_by_id(query_db, user_id=user_id)
-            post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-            post_ids_list = [row.post_id for row in query_user.get('user_post_info')]
-            role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
-            role_ids_list = [row.role_id for row in query_user.get('user_role_info')]
+            post_ids = ','.join([str(row.post_id) for row in query_user.user_post_info])
+            post_ids_list = [row.post_id for row in query_user.user_post_info]
+            role_ids = ','.join([str(row.role_id) for row in query_user.user_role_info])
+            role_ids_list = [row.role_id for row in query_user.user_role_info]
 
             return UserDetailModel(
                 data=UserInfoModel(
-                    **CamelCaseUtil.transform_result(query_user.get('user_basic_info')),
+                    **CamelCaseUtil.transform_result(query_user.user_basic_info),
                     postIds=post_ids,
                     roleIds=role_ids,
-                    dept=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
-                    role=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
+                    dept=CamelCaseUtil.transform_result(query_user.user_dept_info),
+                    role=CamelCaseUtil.transform_result(query_user.user_role_info),
                 ),
                 postIds=post_ids_list,
                 posts=posts,
@@ -295,18 +304,18 @@ class UserService:
         :return: 用户id对应的信息
         """
         query_user = await UserDao.get_user_detail_by_id(query_db, user_id=user_id)
-        post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-        post_group = ','.join([row.post_name for row in query_user.get('user_post_info')])
-        role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
-        role_group = ','.join([row.role_name for row in query_user.get('user_role_info')])
+        post_ids = ','.join([str(row.post_id) for row in query_user.user_post_info])
+        post_group = ','.join([row.post_name for row in query_user.user_post_info])
+        role_ids = ','.join([str(row.role_id) for row in query_user.user_role_info])
+        role_group = ','.join([row.role_name for row in query_user.user_role_info])
 
         return UserProfileModel(
             data=UserInfoModel(
-                **CamelCaseUtil.transform_result(query_user.get('user_basic_info')),
+                **CamelCaseUtil.transform_result(query_user.user_basic_info),
                 postIds=post_ids,
                 roleIds=role_ids,
-                dept=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
-                role=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
+                dept=CamelCaseUtil.transform_result(query_user.user_dept_info),
+                role=CamelCaseUtil.transform_result(query_user.user_role_info),
             ),
             postGroup=post_group,
             roleGroup=role_group,
@@ -323,10 +332,10 @@ class UserService:
         """
         reset_user = page_object.model_dump(exclude_unset=True, exclude={'admin'})
         if page_object.old_password:
-            user = (await UserDao.get_user_detail_by_id(query_db, user_id=page_object.user_id)).get('user_basic_info')
-            if not PwdUtil.verify_password(page_object.old_password, user.password):
+            user = (await UserDao.get_user_detail_by_id(query_db, user_id=page_object.user_id)).user_basic_info
+            if not await PwdUtil.verify_password_async(page_object.old_password, user.password):
                 raise ServiceException(message='修改密码失败，旧密码错误')
-            elif PwdUtil.verify_password(page_object.password, user.password):
+            elif await PwdUtil.verify_password_async(page_object.password, user.password):
                 raise ServiceException(message='新密码不能与旧密码相同')
             else:
                 del reset_user['old_password']
@@ -334,9 +343,10 @@ class UserService:
             del reset_user['sms_code']
             del reset_user['session_id']
         try:
-            reset_user['password'] = PwdUtil.get_password_hash(page_object.password)
+            reset_user['password'] = await PwdUtil.get_password_hash_async(page_object.password)
             await UserDao.edit_user_dao(query_db, reset_user)
             await query_db.commit()
+            await PrincipalCacheService.invalidate_principal_services([page_object.user_id])
             return CrudResponseModel(is_success=True, message='重置成功')
         except Exception as e:
             await query_db.rollback()
@@ -350,8 +360,8 @@ class UserService:
         file: UploadFile,
         update_support: bool,
         current_user: CurrentUserModel,
-        user_data_scope_sql: str,
-        dept_data_scope_sql: str,
+        user_data_scope_sql: ColumnElement,
+        dept_data_scope_sql: ColumnElement,
     ):
         """
         批量导入用户service
@@ -379,7 +389,11 @@ class UserService:
         await file.close()
         df.rename(columns=header_dict, inplace=True)
         add_error_result = []
+        edit_user_id_list = []
         count = 0
+        init_password = await ConfigService.query_config_list_from_cache_services(
+            request.app.state.redis, 'sys.user.initPassword'
+        )
         try:
             for index, row in df.iterrows():
                 count = count + 1
@@ -396,11 +410,6 @@ class UserService:
                 add_user = UserModel(
                     deptId=row['dept_id'],
                     userName=row['user_name'],
-                    password=PwdUtil.get_password_hash(
-                        await ConfigService.query_config_list_from_cache_services(
-                            request.app.state.redis, 'sys.user.initPassword'
-                        )
-                    ),
                     nickName=row['nick_name'],
                     email=row['email'],
                     phonenumber=str(row['phonenumber']),
@@ -437,9 +446,12 @@ class UserService:
                             )
                         edit_user = edit_user_model.model_dump(exclude_unset=True)
                         await UserDao.edit_user_dao(query_db, edit_user)
+                        edit_user_id_list.append(edit_user_model.user_id)
                     else:
                         add_error_result.append(f"{count}.用户账号{row['user_name']}已存在")
                 else:
+                    # 仅对新增用户在密码线程池中加密初始密码
+                    add_user.password = await PwdUtil.get_password_hash_async(init_password)
                     add_user.validate_fields()
                     if not current_user.user.admin:
                         await DeptService.check_dept_data_scope_services(
@@ -447,6 +459,7 @@ class UserService:
                         )
                     await UserDao.add_user_dao(query_db, add_user)
             await query_db.commit()
+            await PrincipalCacheService.invalidate_principal_services(edit_user_id_list)
             return CrudResponseModel(is_success=True, message='\n'.join(add_error_result))
         except Exception as e:
             await query_db.rollback()
@@ -469,12 +482,18 @@ class UserService:
         return binary_data
 
     @staticmethod
-    async def export_user_list_services(user_list: List):
+    async def export_user_list_services(
+        query_object: UserPageQueryModel,
+        data_scope_sql: ColumnElement,
+        export_format: ExportFormat = ExportFormat.EXCEL,
+    ):
         """
         导出用户信息service
 
-        :param user_list: 用户信息列表
-        :return: 用户信息对应excel的二进制数据
+        :param query_object: 查询参数对象
+        :param data_scope_sql: 数据权限对应的查询sql语句
+        :param export_format: 导出格式
+        :return: 用户信息对应导出文件的二进制数据流
         """
         # 创建一个映射字典，将英文键映射到中文键
         mapping_dict = {
@@ -493,8 +512,9 @@ class UserService:
             'remark': '备注',
         }
 
-        for item in user_list:
-            item['deptName'] = item.get('dept').get('deptName')
+        def format_user(row: List):
+            item = {**row[0], 'dept': row[1]}
+            item['deptName'] = item.get('dept').get('deptName') if item.get('dept') else None
             if item.get('status') == '0':
                 item['status'] = '正常'
             else:
@@ -505,7 +525,10 @@ class UserService:
                 item['sex'] = '女'
             else:
                 item['sex'] = '未知'
-        binary_data = ExcelUtil.export_list2excel(user_list, mapping_dict)
+            return item
+
+        user_stream = PageUtil.stream(UserDao.get_user_list_query(query_object, data_scope_sql))
+        binary_data = ExcelUtil.export_stream(user_stream, mapping_dict, export_format, format_user)
 
         return binary_data
 
@@ -519,14 +542,14 @@ class UserService:
         :return: 已分配角色列表
         """
         query_user = await UserDao.get_user_detail_by_id(query_db, page_object.user_id)
-        post_ids = ','.join([str(row.post_id) for row in query_user.get('user_post_info')])
-        role_ids = ','.join([str(row.role_id) for row in query_user.get('user_role_info')])
+        post_ids = ','.join([str(row.post_id) for row in query_user.user_post_info])
+        role_ids = ','.join([str(row.role_id) for row in query_user.user_role_info])
         user = UserInfoModel(
-            **CamelCaseUtil.transform_result(query_user.get('user_basic_info')),
+            **CamelCaseUtil.transform_result(query_user.user_basic_info),
             postIds=post_ids,
             roleIds=role_ids,
-            dept=CamelCaseUtil.transform_result(query_user.get('user_dept_info')),
-            role=CamelCaseUtil.transform_result(query_user.get('user_role_info')),
+            dept=CamelCaseUtil.transform_result(query_user.user_dept_info),
+            role=CamelCaseUtil.transform_result(query_user.user_role_info),
         )
         query_role_list = [
             SelectedRoleModel(**row) for row in await RoleService.get_role_select_option_services(query_db)
@@ -555,6 +578,7 @@ class UserService:
                 for role_id in role_id_list:
                     await UserDao.add_user_role_dao(query_db, UserRoleModel(userId=page_object.user_id, roleId=role_id))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -563,6 +587,7 @@ class UserService:
             try:
                 await UserDao.delete_user_role_by_user_and_role_dao(query_db, UserRoleModel(userId=page_object.user_id))
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services([page_object.user_id])
                 return CrudResponseModel(is_success=True, message='分配成功')
             except Exception as e:
                 await query_db.rollback()
@@ -581,6 +606,7 @@ class UserService:
                             query_db, UserRoleModel(userId=user_id, roleId=page_object.role_id)
                         )
                 await query_db.commit()
+                await PrincipalCacheService.invalidate_principal_services(user_id_list)
                 return CrudResponseModel(is_success=True, message='新增成功')
             except Exception as e:
                 await query_db.rollback()
@@ -604,6 +630,7 @@ class UserService:
                         query_db, UserRoleModel(userId=page_object.user_id, roleId=page_object.role_id)
                     )
                     await query_db.commit()
+                    await PrincipalCacheService.invalidate_principal_services([page_object.user_id])
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -616,6 +643,7 @@ class UserService:
                             query_db, UserRoleModel(userId=user_id, roleId=page_object.role_id)
                         )
                     await query_db.commit()
+                    await PrincipalCacheService.invalidate_principal_services(user_id_list)
                     return CrudResponseModel(is_success=True, message='删除成功')
                 except Exception as e:
                     await query_db.rollback()
@@ -1,6 +1,8 @@
 from datetime import datetime
+from utils.task_registry_util import TaskRegistryUtil
 
 
+@TaskRegistryUtil.register
 def job(*args, **kwargs):
     """
     定时任务执行同步函数示例
@@ -10,6 +12,7 @@ def job(*args, **kwargs):
     print(f'{datetime.now()}同步函数执行了')
 
 
+@TaskRegistryUtil.register
 async def async_job(*args, **kwargs):
     """
     定时任务执行异步函数示例
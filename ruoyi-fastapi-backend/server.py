@@ -1,7 +1,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from config.env import AppConfig
-from config.get_db import init_create_table
+from config.get_db import init_create_table, init_dept_closure
 from config.get_redis import RedisUtil
 from config.get_scheduler import SchedulerUtil
 from exceptions.handle import handle_exception
@@ -27,10 +27,17 @@ from module_admin.controller.device_controller import deviceController
 from module_admin.controller.role_controller import roleController
 from module_admin.controller.server_controller import serverController
 from module_admin.controller.user_controller import userController
+from module_admin.service.captcha_service import CaptchaService
+from module_admin.service.job_log_service import JobLogQueueService
+from module_admin.service.log_service import LogQueueService
+from module_admin.service.server_service import ServerService
 from module_generator.controller.gen_controller import genController
 from sub_applications.handle import handle_sub_applications
+from utils.cache_util import CacheSyncUtil
 from utils.common_util import worship
+from utils.ip_util import IpLocationUtil
 from utils.log_util import logger
+from utils.pwd_util import PwdUtil
 
 
 # 生命周期事件
@@ -39,14 +46,26 @@ async def lifespan(app: FastAPI):
     logger.info(f'{AppConfig.app_name}开始启动')
     worship()
     await init_create_table()
+    await LogQueueService.init_log_queue_services()
+    await JobLogQueueService.init_job_log_queue_services()
     app.state.redis = await RedisUtil.create_redis_pool()
-    await RedisUtil.init_sys_dict(app.state.redis)
-    await RedisUtil.init_sys_config(app.state.redis)
-    await SchedulerUtil.init_system_scheduler()
+    await init_dept_closure(app.state.redis)
+    await CacheSyncUtil.start(app.state.redis)
+    await RedisUtil.init_sys_cache(app.state.redis)
+    await CaptchaService.init_captcha_pool_services()
+    await ServerService.init_server_monitor_services()
+    await SchedulerUtil.init_system_scheduler(app.state.redis)
     logger.info(f'{AppConfig.app_name}启动成功')
     yield
-    await RedisUtil.close_redis_pool(app)
     await SchedulerUtil.close_system_scheduler()
+    await LogQueueService.close_log_queue_services()
+    await JobLogQueueService.close_job_log_queue_services()
+    await CaptchaService.close_captcha_pool_services()
+    await ServerService.close_server_monitor_services()
+    await CacheSyncUtil.stop()
+    await IpLocationUtil.close()
+    PwdUtil.close_pool()
+    await RedisUtil.close_redis_pool(app)
 
 
 # 初始化FastAPI对象
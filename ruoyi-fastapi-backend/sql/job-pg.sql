@@ -0,0 +1,20 @@
+-- ============================================
+-- 定时任务模块（PostgreSQL 已有库的表结构增量变更，MySQL 见 job.sql）
+-- ============================================
+
+-- 1. 调度日志表：执行耗时及延迟字段
+alter table sys_job_log add column if not exists scheduled_time timestamp(0);
+alter table sys_job_log add column if not exists run_start_time timestamp(0);
+alter table sys_job_log add column if not exists run_end_time timestamp(0);
+alter table sys_job_log add column if not exists run_duration int4;
+alter table sys_job_log add column if not exists run_delay int4;
+alter table sys_job_log add column if not exists misfire_count int4 default 0;
+comment on column sys_job_log.scheduled_time is '计划执行时间';
+comment on column sys_job_log.run_start_time is '实际开始执行时间';
+comment on column sys_job_log.run_end_time is '执行结束时间';
+comment on column sys_job_log.run_duration is '执行耗时（毫秒）';
+comment on column sys_job_log.run_delay is '实际开始执行时间较计划执行时间的延迟（毫秒）';
+comment on column sys_job_log.misfire_count is '距上次执行错过执行的次数';
+
+-- 2. 调度日志表：创建时间索引
+create index if not exists idx_sys_job_log_ct on sys_job_log(create_time);
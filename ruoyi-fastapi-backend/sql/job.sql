@@ -0,0 +1,124 @@
+-- 设置客户端字符集
+SET NAMES utf8mb4;
+SET CHARACTER SET utf8mb4;
+SET character_set_client = utf8mb4;
+SET character_set_connection = utf8mb4;
+SET character_set_results = utf8mb4;
+
+-- ============================================
+-- 定时任务模块（已有库的表结构增量变更，PostgreSQL 见 job-pg.sql）
+-- ============================================
+
+-- 1. 调度日志表：执行耗时及延迟字段
+SET @has_scheduled_time := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'scheduled_time'
+);
+SET @ddl_scheduled_time := IF(
+    @has_scheduled_time = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `scheduled_time` datetime COMMENT ''计划执行时间'' AFTER `exception_info`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_scheduled_time;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_run_start_time := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'run_start_time'
+);
+SET @ddl_run_start_time := IF(
+    @has_run_start_time = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `run_start_time` datetime COMMENT ''实际开始执行时间'' AFTER `scheduled_time`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_run_start_time;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_run_end_time := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'run_end_time'
+);
+SET @ddl_run_end_time := IF(
+    @has_run_end_time = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `run_end_time` datetime COMMENT ''执行结束时间'' AFTER `run_start_time`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_run_end_time;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_run_duration := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'run_duration'
+);
+SET @ddl_run_duration := IF(
+    @has_run_duration = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `run_duration` INT(11) COMMENT ''执行耗时（毫秒）'' AFTER `run_end_time`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_run_duration;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_run_delay := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'run_delay'
+);
+SET @ddl_run_delay := IF(
+    @has_run_delay = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `run_delay` INT(11) COMMENT ''实际开始执行时间较计划执行时间的延迟（毫秒）'' AFTER `run_duration`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_run_delay;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @has_misfire_count := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND COLUMN_NAME = 'misfire_count'
+);
+SET @ddl_misfire_count := IF(
+    @has_misfire_count = 0,
+    'ALTER TABLE `sys_job_log` ADD COLUMN `misfire_count` INT(11) DEFAULT 0 COMMENT ''距上次执行错过执行的次数'' AFTER `run_delay`;',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_misfire_count;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- 2. 调度日志表：创建时间索引
+SET @has_idx_sys_job_log_ct := (
+    SELECT COUNT(*)
+    FROM INFORMATION_SCHEMA.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE()
+      AND TABLE_NAME = 'sys_job_log'
+      AND INDEX_NAME = 'idx_sys_job_log_ct'
+);
+SET @ddl_idx_sys_job_log_ct := IF(
+    @has_idx_sys_job_log_ct = 0,
+    'ALTER TABLE `sys_job_log` ADD KEY `idx_sys_job_log_ct` (`create_time`);',
+    'DO 0;'
+);
+PREPARE stmt FROM @ddl_idx_sys_job_log_ct;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
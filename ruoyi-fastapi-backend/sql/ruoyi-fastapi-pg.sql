@@ -50,6 +50,52 @@ insert into sys_dept values(107,  101, '0,100,101',  '运维部门',   5, '年
 insert into sys_dept values(108,  102, '0,100,102',  '市场部门',   1, '年糕', '15888888888', 'niangao@qq.com', '0', '0', 'admin', current_timestamp, '', null);
 insert into sys_dept values(109,  102, '0,100,102',  '财务部门',   2, '年糕', '15888888888', 'niangao@qq.com', '0', '0', 'admin', current_timestamp, '', null);
 
+-- ----------------------------
+-- 部门层级关系表
+-- ----------------------------
+drop table if exists sys_dept_closure;
+create table sys_dept_closure (
+    ancestor_id bigint not null,
+    descendant_id bigint not null,
+    depth int4 not null default 0,
+    primary key (ancestor_id, descendant_id)
+);
+create index idx_sys_dept_closure_d on sys_dept_closure (descendant_id);
+comment on column sys_dept_closure.ancestor_id is '祖先部门id';
+comment on column sys_dept_closure.descendant_id is '后代部门id';
+comment on column sys_dept_closure.depth is '层级距离（0代表自身）';
+comment on table sys_dept_closure is '部门层级关系表';
+
+-- ----------------------------
+-- 初始化-部门层级关系表数据
+-- ----------------------------
+insert into sys_dept_closure values(100, 100, 0);
+insert into sys_dept_closure values(100, 101, 1);
+insert into sys_dept_closure values(100, 102, 1);
+insert into sys_dept_closure values(100, 103, 2);
+insert into sys_dept_closure values(100, 104, 2);
+insert into sys_dept_closure values(100, 105, 2);
+insert into sys_dept_closure values(100, 106, 2);
+insert into sys_dept_closure values(100, 107, 2);
+insert into sys_dept_closure values(100, 108, 2);
+insert into sys_dept_closure values(100, 109, 2);
+insert into sys_dept_closure values(101, 101, 0);
+insert into sys_dept_closure values(101, 103, 1);
+insert into sys_dept_closure values(101, 104, 1);
+insert into sys_dept_closure values(101, 105, 1);
+insert into sys_dept_closure values(101, 106, 1);
+insert into sys_dept_closure values(101, 107, 1);
+insert into sys_dept_closure values(102, 102, 0);
+insert into sys_dept_closure values(102, 108, 1);
+insert into sys_dept_closure values(102, 109, 1);
+insert into sys_dept_closure values(103, 103, 0);
+insert into sys_dept_closure values(104, 104, 0);
+insert into sys_dept_closure values(105, 105, 0);
+insert into sys_dept_closure values(106, 106, 0);
+insert into sys_dept_closure values(107, 107, 0);
+insert into sys_dept_closure values(108, 108, 0);
+insert into sys_dept_closure values(109, 109, 0);
+
 -- ----------------------------
 -- 2、用户信息表
 -- ----------------------------
@@ -797,9 +843,16 @@ create table sys_job_log (
     job_message varchar(500),
     status char(1) default '0',
     exception_info varchar(2000) default '',
+    scheduled_time timestamp(0),
+    run_start_time timestamp(0),
+    run_end_time timestamp(0),
+    run_duration int4,
+    run_delay int4,
+    misfire_count int4 default 0,
     create_time timestamp(0),
     primary key (job_log_id)
 );
+create index idx_sys_job_log_ct on sys_job_log(create_time);
 comment on column sys_job_log.job_log_id is '任务日志ID';
 comment on column sys_job_log.job_name is '任务名称';
 comment on column sys_job_log.job_group is '任务组名';
@@ -811,6 +864,12 @@ comment on column sys_job_log.job_trigger is '任务触发器';
 comment on column sys_job_log.job_message is '日志信息';
 comment on column sys_job_log.status is '执行状态（0正常 1失败）';
 comment on column sys_job_log.exception_info is '异常信息';
+comment on column sys_job_log.scheduled_time is '计划执行时间';
+comment on column sys_job_log.run_start_time is '实际开始执行时间';
+comment on column sys_job_log.run_end_time is '执行结束时间';
+comment on column sys_job_log.run_duration is '执行耗时（毫秒）';
+comment on column sys_job_log.run_delay is '实际开始执行时间较计划执行时间的延迟（毫秒）';
+comment on column sys_job_log.misfire_count is '距上次执行错过执行的次数';
 comment on column sys_job_log.create_time is '创建时间';
 comment on table sys_job_log is '定时任务调度日志表';
 
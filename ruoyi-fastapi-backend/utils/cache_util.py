@@ -0,0 +1,197 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict
+from inspect import isawaitable
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from config.constant import CacheConstant
+from utils.log_util import logger
+
+
+class LocalCache:
+    """
+    进程内LRU缓存，每个条目带有过期时间
+    """
+
+    def __init__(self, max_size: int = 1024, expire_seconds: float = 60):
+        """
+        进程内LRU缓存
+
+        :param max_size: 最大缓存条目数，超出时淘汰最久未使用的条目
+        :param expire_seconds: 默认过期时间（单位：秒）
+        """
+        self.max_size = max_size
+        self.expire_seconds = expire_seconds
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None):
+        """
+        获取缓存值，已过期的条目会被移除
+
+        :param key: 缓存键
+        :param default: 缓存不存在或已过期时的返回值
+        :return: 缓存值
+        """
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expire_at = item
+        if expire_at < time.monotonic():
+            self._data.pop(key, None)
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expire_seconds: Optional[float] = None):
+        """
+        设置缓存值
+
+        :param key: 缓存键
+        :param value: 缓存值
+        :param expire_seconds: 过期时间（单位：秒），为空时使用默认过期时间
+        :return:
+        """
+        expire_at = time.monotonic() + (self.expire_seconds if expire_seconds is None else expire_seconds)
+        self._data[key] = (value, expire_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """
+        删除缓存值
+
+        :param key: 缓存键
+        :return:
+        """
+        self._data.pop(key, None)
+
+    def clear(self):
+        """
+        清空缓存
+
+        :return:
+        """
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return self.get(key, self) is not self
+
+
+class CacheSyncUtil:
+    """
+    本地缓存同步工具类，通过Redis发布订阅在多个worker之间广播本地缓存失效消息
+    """
+
+    redis: Optional[aioredis.Redis] = None
+    instance_id = uuid.uuid4().hex
+    _handlers: Dict[str, List[Callable[[str], Any]]] = {}
+    _listener_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def register(cls, topic: str, handler: Callable[[str], Any]):
+        """
+        注册缓存失效消息处理方法
+
+        :param topic: 缓存主题
+        :param handler: 处理方法，接收消息内容作为参数，可以是同步或异步方法
+        :return:
+        """
+        cls._handlers.setdefault(topic, []).append(handler)
+
+    @classmethod
+    async def publish(cls, topic: str, payload: str = CacheConstant.SYNC_ALL):
+        """
+        发布缓存失效消息，当前进程立即处理，其余worker通过Redis发布订阅处理
+
+        :param topic: 缓存主题
+        :param payload: 消息内容
+        :return:
+        """
+        await cls.__dispatch(topic, payload)
+        if cls.redis is None:
+            return
+        message = json.dumps(dict(source=cls.instance_id, topic=topic, payload=payload))
+        try:
+            await cls.redis.publish(CacheConstant.SYNC_CHANNEL, message)
+        except RedisError as e:
+            logger.error(f'本地缓存失效消息发布失败，详细错误信息：{e}')
+
+    @classmethod
+    async def start(cls, redis: aioredis.Redis):
+        """
+        应用启动时开始监听缓存失效消息
+
+        :param redis: redis对象
+        :return:
+        """
+        cls.redis = redis
+        if cls._listener_task is None:
+            cls._listener_task = asyncio.create_task(cls.__listen())
+        logger.info('本地缓存同步监听启动成功')
+
+    @classmethod
+    async def stop(cls):
+        """
+        应用关闭时停止监听缓存失效消息
+
+        :return:
+        """
+        if cls._listener_task is not None:
+            cls._listener_task.cancel()
+            try:
+                await cls._listener_task
+            except asyncio.CancelledError:
+                pass
+            cls._listener_task = None
+        cls.redis = None
+        logger.info('本地缓存同步监听关闭成功')
+
+    @classmethod
+    async def __listen(cls):
+        """
+        持续监听缓存失效消息，连接异常时自动重连
+
+        :return:
+        """
+        while True:
+            pubsub = cls.redis.pubsub()
+            try:
+                await pubsub.subscribe(CacheConstant.SYNC_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get('type') != 'message':
+                        continue
+                    data = json.loads(message.get('data'))
+                    if data.get('source') == cls.instance_id:
+                        continue
+                    await cls.__dispatch(data.get('topic'), data.get('payload'))
+            except asyncio.CancelledError:
+                await pubsub.aclose()
+                raise
+            except Exception as e:
+                logger.error(f'本地缓存同步监听异常，1秒后重连，详细错误信息：{e}')
+                await pubsub.aclose()
+                await asyncio.sleep(1)
+
+    @classmethod
+    async def __dispatch(cls, topic: str, payload: str):
+        """
+        调用主题对应的缓存失效消息处理方法
+
+        :param topic: 缓存主题
+        :param payload: 消息内容
+        :return:
+        """
+        for handler in cls._handlers.get(topic, []):
+            try:
+                result = handler(payload)
+                if isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.exception(e)
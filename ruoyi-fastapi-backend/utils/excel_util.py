@@ -1,10 +1,15 @@
+import csv
 import io
+import json
 import pandas as pd
+import tempfile
 from openpyxl import Workbook
 from openpyxl.styles import Alignment, PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl.worksheet.datavalidation import DataValidation
-from typing import Dict, List
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterable, AsyncIterator, Callable, Dict, List, Optional
+from config.enums import ExportFormat
 
 
 class ExcelUtil:
@@ -42,6 +47,93 @@ class ExcelUtil:
 
         return binary_data
 
+    @classmethod
+    async def export_stream(
+        cls,
+        data: AsyncIterable[List],
+        mapping_dict: Dict,
+        export_format: ExportFormat = ExportFormat.EXCEL,
+        row_handler: Optional[Callable[[Dict], Dict]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        工具方法：将分批返回的数据逐批转化为对应格式文件的二进制数据流，内存占用与数据总量无关
+
+        :param data: 分批返回的数据列表
+        :param mapping_dict: 映射字典
+        :param export_format: 导出格式
+        :param row_handler: 可选，导出前对每条数据进行转换的方法
+        :return: 导出文件的二进制数据流
+        """
+        header_list = list(mapping_dict.values())
+
+        async def get_row_chunks():
+            async for chunk_data in data:
+                if row_handler:
+                    chunk_data = [row_handler(item) for item in chunk_data]
+                yield cls.__mapping_list(chunk_data, mapping_dict)
+
+        if export_format == ExportFormat.CSV:
+            yield cls.__csv_rows([header_list]).encode('utf-8-sig')
+            async for row_chunk in get_row_chunks():
+                yield cls.__csv_rows([list(row.values()) for row in row_chunk]).encode('utf-8')
+        elif export_format == ExportFormat.NDJSON:
+            async for row_chunk in get_row_chunks():
+                yield ''.join(f'{json.dumps(row, ensure_ascii=False, default=str)}\n' for row in row_chunk).encode(
+                    'utf-8'
+                )
+        else:
+            async for binary_chunk in cls.__excel_stream(get_row_chunks(), header_list):
+                yield binary_chunk
+
+    @classmethod
+    def __csv_rows(cls, rows: List[List]):
+        """
+        工具方法：将数据行转化为csv文本
+
+        :param rows: 数据行列表
+        :return: csv文本
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+
+        return buffer.getvalue()
+
+    @classmethod
+    async def __excel_stream(cls, row_chunks: AsyncIterable[List[Dict]], header_list: List, chunk_size: int = 65536):
+        """
+        工具方法：使用openpyxl只写模式逐批写入excel，超出单个工作表最大行数时自动新建工作表
+
+        :param row_chunks: 分批返回的数据列表
+        :param header_list: 表头列表
+        :param chunk_size: 每次返回的二进制数据大小
+        :return: excel文件的二进制数据流
+        """
+        # excel单个工作表最大行数（含表头）
+        max_sheet_rows = 1048576
+        wb = Workbook(write_only=True)
+        sheet_state = dict(sheet=wb.create_sheet(), rows=1)
+        sheet_state['sheet'].append(header_list)
+
+        def append_rows(rows: List[Dict]):
+            for row in rows:
+                if sheet_state['rows'] >= max_sheet_rows:
+                    sheet_state['sheet'] = wb.create_sheet()
+                    sheet_state['sheet'].append(header_list)
+                    sheet_state['rows'] = 1
+                sheet_state['sheet'].append(list(row.values()))
+                sheet_state['rows'] += 1
+
+        async for row_chunk in row_chunks:
+            await run_in_threadpool(append_rows, row_chunk)
+        with tempfile.TemporaryFile() as excel_file:
+            await run_in_threadpool(wb.save, excel_file)
+            await run_in_threadpool(excel_file.seek, 0)
+            while True:
+                binary_chunk = await run_in_threadpool(excel_file.read, chunk_size)
+                if not binary_chunk:
+                    break
+                yield binary_chunk
+
     @classmethod
     def get_excel_template(cls, header_list: List, selector_header_list: List, option_list: List[Dict]):
         """
@@ -0,0 +1,250 @@
+import fnmatch
+import ipaddress
+import mmap
+import os
+import re
+import struct
+import httpx
+from fastapi import Request
+from typing import Optional, Union
+from config.env import AppConfig, CacheConfig
+from utils.cache_util import LocalCache
+from utils.log_util import logger
+
+
+class IpRegionSearcher:
+    """
+    ip2region xdb格式IP离线库查询器，通过内存映射读取库文件，多个worker进程可共享同一份页缓存
+    """
+
+    HEADER_INFO_LENGTH = 256
+    VECTOR_INDEX_COLS = 256
+    VECTOR_INDEX_SIZE = 8
+    SEGMENT_INDEX_SIZE = 14
+
+    def __init__(self, db_path: str):
+        """
+        ip2region xdb格式IP离线库查询器
+
+        :param db_path: 离线库文件路径
+        """
+        with open(db_path, 'rb') as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def search(self, ip: int):
+        """
+        查询ip对应的区域信息
+
+        :param ip: 整数形式的ipv4地址
+        :return: 区域信息，格式为 国家|区域|省份|城市|ISP，未查询到时返回空字符串
+        """
+        vector_offset = (
+            self.HEADER_INFO_LENGTH
+            + (((ip >> 24) & 0xFF) * self.VECTOR_INDEX_COLS + ((ip >> 16) & 0xFF)) * self.VECTOR_INDEX_SIZE
+        )
+        start_ptr, end_ptr = struct.unpack_from('<II', self._buffer, vector_offset)
+        low, high = 0, (end_ptr - start_ptr) // self.SEGMENT_INDEX_SIZE
+        while low <= high:
+            middle = (low + high) >> 1
+            start_ip, end_ip, data_length, data_ptr = struct.unpack_from(
+                '<IIHI', self._buffer, start_ptr + middle * self.SEGMENT_INDEX_SIZE
+            )
+            if ip < start_ip:
+                high = middle - 1
+            elif ip > end_ip:
+                low = middle + 1
+            else:
+                return self._buffer[data_ptr : data_ptr + data_length].decode('utf-8')
+        return ''
+
+    def close(self):
+        """
+        关闭内存映射
+
+        :return:
+        """
+        self._buffer.close()
+
+
+class IpMatcher:
+    """
+    IP名单匹配器，支持精确IP、CIDR网段（如10.0.0.0/8）及*通配（如192.168.1.*）
+    """
+
+    def __init__(self, rules: Optional[str] = None):
+        """
+        IP名单匹配器
+
+        :param rules: IP名单，多个规则以逗号或分号分隔
+        """
+        self.ips = set()
+        self.networks = []
+        patterns = []
+        for rule in re.split('[,;]', rules or ''):
+            rule = rule.strip()
+            if not rule:
+                continue
+            if '*' in rule:
+                patterns.append(fnmatch.translate(rule))
+                continue
+            try:
+                if '/' in rule:
+                    self.networks.append(ipaddress.ip_network(rule, strict=False))
+                else:
+                    self.ips.add(str(ipaddress.ip_address(rule)))
+            except ValueError:
+                self.ips.add(rule)
+        self.pattern = re.compile('|'.join(patterns)) if patterns else None
+
+    def __bool__(self):
+        return bool(self.ips or self.networks or self.pattern)
+
+    def match(self, ip: Optional[str]):
+        """
+        判断ip是否命中名单
+
+        :param ip: 需要判断的ip，为X-Forwarded-For形式时取第一个ip
+        :return: 是否命中
+        """
+        ip = ip.split(',')[0].strip() if ip else ''
+        if not ip or not self:
+            return False
+        if ip in self.ips or (self.pattern and self.pattern.match(ip)):
+            return True
+        if self.networks:
+            try:
+                ip_address = ipaddress.ip_address(ip)
+            except ValueError:
+                return False
+            return any(ip_address in network for network in self.networks)
+        return False
+
+
+class ClientIpUtil:
+    """
+    客户端ip获取工具类
+    """
+
+    @classmethod
+    def get_client_ip(cls, request: Request):
+        """
+        获取客户端ip，X-Forwarded-For的第一个ip可由客户端任意伪造，因此依次取代理设置的X-Real-IP、
+        X-Forwarded-For中最后一级代理追加的ip及直连的客户端地址
+
+        :param request: Request对象
+        :return: 客户端ip，无法获取时返回空字符串
+        """
+        real_ip = request.headers.get('X-Real-IP', '').strip()
+        if real_ip:
+            return real_ip
+        forwarded_for = request.headers.get('X-Forwarded-For', '')
+        forwarded_ip = forwarded_for.split(',')[-1].strip() if forwarded_for else ''
+        if forwarded_ip:
+            return forwarded_ip
+        return request.client.host if request.client else ''
+
+
+class IpLocationUtil:
+    """
+    IP归属区域查询工具类，支持离线库及在线接口两种查询方式，查询结果缓存在进程内
+    """
+
+    location_cache = LocalCache(
+        max_size=CacheConfig.cache_ip_location_max_size, expire_seconds=CacheConfig.cache_ip_location_expire_seconds
+    )
+    _searcher: Optional[IpRegionSearcher] = None
+    _searcher_loaded = False
+    _http_client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    async def get_ip_location(cls, ip: Optional[str]):
+        """
+        查询ip归属区域
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域
+        """
+        if AppConfig.app_ip_location_query == 'disabled':
+            return '内网IP'
+        # X-Forwarded-For经过多级代理时为逗号分隔的ip列表，第一个为客户端ip
+        ip = ip.split(',')[0].strip() if ip else ''
+        if ip == 'localhost':
+            return '内网IP'
+        try:
+            ip_address = ipaddress.ip_address(ip)
+        except ValueError:
+            return '未知'
+        if ip_address.is_private or ip_address.is_loopback:
+            return '内网IP'
+        location = cls.location_cache.get(ip)
+        if location is None:
+            if AppConfig.app_ip_location_query == 'online':
+                location = await cls.__search_online(ip)
+            else:
+                location = cls.__search_offline(ip_address)
+            if location is not None:
+                cls.location_cache.set(ip, location)
+        return location or '未知'
+
+    @classmethod
+    async def close(cls):
+        """
+        应用关闭时释放离线库及在线查询连接池
+
+        :return:
+        """
+        if cls._http_client:
+            await cls._http_client.aclose()
+            cls._http_client = None
+        if cls._searcher:
+            cls._searcher.close()
+            cls._searcher = None
+        cls._searcher_loaded = False
+
+    @classmethod
+    def __search_offline(cls, ip_address: Union[ipaddress.IPv4Address, ipaddress.IPv6Address]):
+        """
+        通过离线库查询ip归属区域
+
+        :param ip_address: ip地址对象
+        :return: ip归属区域，离线库不可用时返回None
+        """
+        if not cls._searcher_loaded:
+            cls._searcher_loaded = True
+            if os.path.exists(AppConfig.app_ip_location_db_path):
+                cls._searcher = IpRegionSearcher(AppConfig.app_ip_location_db_path)
+            else:
+                logger.warning(f'IP离线库文件{AppConfig.app_ip_location_db_path}不存在，IP归属区域将显示为未知')
+        if cls._searcher is None or ip_address.version != 4:
+            return None
+        region = cls._searcher.search(int(ip_address)).split('|')
+        if len(region) < 4:
+            return '未知'
+        country, _, prov, city = (item if item != '0' else '' for item in region[:4])
+        if prov or city:
+            return f'{prov}-{city}'
+        return country or '未知'
+
+    @classmethod
+    async def __search_online(cls, ip: str):
+        """
+        通过在线接口查询ip归属区域
+
+        :param ip: 需要查询的ip
+        :return: ip归属区域，接口请求失败时返回None，避免缓存临时失败的结果
+        """
+        if cls._http_client is None:
+            cls._http_client = httpx.AsyncClient(timeout=AppConfig.app_ip_location_api_timeout)
+        try:
+            ip_result = await cls._http_client.get(AppConfig.app_ip_location_api_url, params={'ip': ip})
+            if ip_result.status_code != 200:
+                return None
+            data = ip_result.json().get('data') or {}
+            prov = data.get('prov')
+            city = data.get('city')
+            if prov or city:
+                return f'{prov}-{city}'
+            return '未知'
+        except Exception as e:
+            logger.warning(f'IP归属区域在线查询失败，详细错误信息：{e}')
+            return None
@@ -0,0 +1,78 @@
+import uuid
+from redis import asyncio as aioredis
+from typing import Optional
+
+
+# 仅当锁仍由当前持有者持有时才删除锁
+# KEYS: 锁键
+# ARGV: 持有者标识
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# 仅当锁仍由当前持有者持有时才延长锁的过期时间
+# KEYS: 锁键
+# ARGV: 持有者标识, 过期时间（单位：毫秒）
+EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+class RedisLock:
+    """
+    基于Redis的分布式锁，锁的值为持有者标识，释放及续期时校验持有者，避免误操作其他持有者的锁
+    """
+
+    def __init__(self, redis: aioredis.Redis, key: str, expire_seconds: float, token: Optional[str] = None):
+        """
+        基于Redis的分布式锁
+
+        :param redis: redis对象
+        :param key: 锁键
+        :param expire_seconds: 锁的过期时间（单位：秒），持有者异常退出时锁在过期后自动释放
+        :param token: 持有者标识，为空时自动生成
+        """
+        self.redis = redis
+        self.key = key
+        self.expire_seconds = expire_seconds
+        self.token = token or uuid.uuid4().hex
+        self._release_script = redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._extend_script = redis.register_script(EXTEND_LOCK_SCRIPT)
+
+    async def acquire(self):
+        """
+        尝试获取锁，不等待
+
+        :return: 是否获取成功
+        """
+        return bool(await self.redis.set(self.key, self.token, nx=True, px=int(self.expire_seconds * 1000)))
+
+    async def extend(self):
+        """
+        为当前持有的锁续期
+
+        :return: 是否续期成功，锁已过期或已被其他持有者获取时返回False
+        """
+        return bool(await self._extend_script(keys=[self.key], args=[self.token, int(self.expire_seconds * 1000)]))
+
+    async def release(self):
+        """
+        释放当前持有的锁
+
+        :return: 是否释放成功，锁已过期或已被其他持有者获取时返回False
+        """
+        return bool(await self._release_script(keys=[self.key], args=[self.token]))
+
+    async def locked(self):
+        """
+        锁当前是否被任意持有者持有
+
+        :return: 是否被持有
+        """
+        return bool(await self.redis.exists(self.key))
@@ -1,9 +1,19 @@
+import base64
+import json
 import math
+from datetime import date, datetime
+from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel, ConfigDict
 from pydantic.alias_generators import to_camel
-from sqlalchemy import func, select, Select
+from sqlalchemy import and_, func, or_, select, Select, UnaryExpression
+from sqlalchemy.engine.row import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Optional, List
+from sqlalchemy.sql import operators
+from typing import Any, AsyncIterator, List, Optional
+from config.database import AsyncSessionLocal
+from config.env import CacheConfig
+from exceptions.exception import ServiceException
+from utils.cache_util import LocalCache
 from utils.common_util import CamelCaseUtil
 
 
@@ -12,13 +22,14 @@ class PageResponseModel(BaseModel):
     列表分页查询返回模型
     """
 
-    model_config = ConfigDict(alias_generator=to_camel)
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
 
     rows: List = []
     page_num: Optional[int] = None
     page_size: Optional[int] = None
-    total: int
+    total: Optional[int] = None
     has_next: Optional[bool] = None
+    next_cursor: Optional[str] = None
 
 
 class PageUtil:
@@ -26,6 +37,10 @@ class PageUtil:
     分页工具类
     """
 
+    total_cache = LocalCache(
+        max_size=CacheConfig.cache_page_total_max_size, expire_seconds=CacheConfig.cache_page_total_expire_seconds
+    )
+
     @classmethod
     def get_page_obj(cls, data_list: List, page_num: int, page_size: int):
         """
@@ -83,6 +98,186 @@ class PageUtil:
 
         return result
 
+    @classmethod
+    async def stream(cls, query: Select, chunk_size: int = 1000) -> AsyncIterator[List]:
+        """
+        输入查询语句，通过数据库服务端游标分批返回查询结果，内存占用与数据总量无关
+
+        :param query: sqlalchemy查询语句
+        :param chunk_size: 每批数据量
+        :return: 分批返回的数据列表
+        """
+        # 流式响应在请求依赖释放后才开始发送，因此使用独立的数据库会话
+        async with AsyncSessionLocal() as session:
+            query_result = await session.stream(query.execution_options(yield_per=chunk_size))
+            async for partition in query_result.partitions():
+                chunk_data = []
+                for row in partition:
+                    if row and len(row) == 1:
+                        chunk_data.append(row[0])
+                    else:
+                        chunk_data.append(row)
+                yield CamelCaseUtil.transform_result(chunk_data)
+
+    @classmethod
+    async def cursor_paginate(
+        cls,
+        db: AsyncSession,
+        query: Select,
+        cursor: Optional[str],
+        page_size: int,
+        order_columns: List[UnaryExpression],
+    ):
+        """
+        输入查询语句和游标信息，使用游标分页返回分页数据列表结果，翻页耗时与页码深度无关
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句，原有排序条件会被order_columns替换
+        :param cursor: 上一页返回的游标，为空时查询第一页
+        :param page_size: 当前页面数据量
+        :param order_columns: 排序条件列表，例如[desc(SysOperLog.oper_time), desc(SysOperLog.oper_id)]，最后一项需为主键
+        :return: 分页数据对象
+        """
+        total = await cls.get_cached_total(db, query)
+        paged_query = query.order_by(None).order_by(*order_columns)
+        if cursor:
+            paged_query = paged_query.where(cls.__build_cursor_clause(order_columns, cls.decode_cursor(cursor)))
+        query_result = await db.execute(paged_query.limit(page_size + 1))
+        paginated_data = []
+        for row in query_result:
+            if row and len(row) == 1:
+                paginated_data.append(row[0])
+            else:
+                paginated_data.append(row)
+        has_next = len(paginated_data) > page_size
+        paginated_data = paginated_data[:page_size]
+        next_cursor = None
+        if has_next:
+            next_cursor = cls.encode_cursor(
+                [cls.__get_row_value(paginated_data[-1], order_column.element) for order_column in order_columns]
+            )
+        result = PageResponseModel(
+            rows=CamelCaseUtil.transform_result(paginated_data),
+            page_size=page_size,
+            total=total,
+            has_next=has_next,
+            next_cursor=next_cursor,
+        )
+
+        return result
+
+    @classmethod
+    async def get_cached_total(cls, db: AsyncSession, query: Select):
+        """
+        获取查询语句对应的数据总数，相同查询条件的结果在本地缓存中复用
+
+        :param db: orm对象
+        :param query: sqlalchemy查询语句
+        :return: 数据总数
+        """
+        compiled_query = query.order_by(None).compile()
+        cache_key = (str(compiled_query), repr(sorted(compiled_query.params.items())))
+        total = cls.total_cache.get(cache_key)
+        if total is None:
+            total = (await db.execute(select(func.count('*')).select_from(query.order_by(None).subquery()))).scalar()
+            cls.total_cache.set(cache_key, total)
+
+        return total
+
+    @classmethod
+    def encode_cursor(cls, values: List[Any]):
+        """
+        将最后一条数据的排序字段值编码为游标
+
+        :param values: 排序字段值列表
+        :return: 游标
+        """
+        return base64.urlsafe_b64encode(json.dumps(jsonable_encoder(values)).encode('utf-8')).decode('utf-8')
+
+    @classmethod
+    def decode_cursor(cls, cursor: str):
+        """
+        将游标解码为排序字段值列表
+
+        :param cursor: 游标
+        :return: 排序字段值列表
+        """
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')))
+        except ValueError:
+            raise ServiceException(message='分页游标无效')
+        if not isinstance(values, list):
+            raise ServiceException(message='分页游标无效')
+
+        return values
+
+    @classmethod
+    def __build_cursor_clause(cls, order_columns: List[UnaryExpression], values: List[Any]):
+        """
+        根据排序条件和游标值构建查询游标之后数据的条件
+
+        :param order_columns: 排序条件列表
+        :param values: 游标对应的排序字段值列表
+        :return: 查询条件
+        """
+        if len(values) != len(order_columns):
+            raise ServiceException(message='分页游标无效')
+        clause_list = []
+        equal_clause_list = []
+        for order_column, value in zip(order_columns, values):
+            column = order_column.element
+            value = cls.__parse_cursor_value(column, value)
+            if value is None:
+                # 排序字段为空时无法比较大小，仅在该字段同为空的数据中按后续排序字段继续翻页
+                equal_clause_list.append(column.is_(None))
+                continue
+            if order_column.modifier is operators.desc_op:
+                clause_list.append(and_(*equal_clause_list, column < value))
+            else:
+                clause_list.append(and_(*equal_clause_list, column > value))
+            equal_clause_list.append(column == value)
+
+        return or_(*clause_list)
+
+    @classmethod
+    def __parse_cursor_value(cls, column: Any, value: Any):
+        """
+        将游标中的排序字段值转换为字段对应的python类型
+
+        :param column: 排序字段
+        :param value: 游标中的排序字段值
+        :return: 转换后的排序字段值
+        """
+        if value is None:
+            return None
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            return value
+        try:
+            if python_type is datetime:
+                return datetime.fromisoformat(value)
+            if python_type is date:
+                return date.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ServiceException(message='分页游标无效')
+
+        return value
+
+    @classmethod
+    def __get_row_value(cls, row: Any, column: Any):
+        """
+        获取查询结果中排序字段的值
+
+        :param row: 查询结果
+        :param column: 排序字段
+        :return: 排序字段的值
+        """
+        if isinstance(row, Row):
+            return row._mapping[column]
+
+        return getattr(row, column.key)
+
 
 def get_page_obj(data_list: List, page_num: int, page_size: int):
     """
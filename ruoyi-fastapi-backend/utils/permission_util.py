@@ -0,0 +1,79 @@
+from typing import Iterable, Optional, Tuple
+
+
+class PermissionIndex:
+    """
+    权限标识索引，不含通配符的权限标识存入集合，含通配符的权限标识按冒号分段存入前缀树
+
+    通配规则：*匹配任意一段，位于末尾的*匹配剩余的全部段，如system:user:*匹配system:user:list，system:*匹配system:user:list，
+    超级管理员权限标识*:*:*不受段数限制，匹配全部权限标识
+    """
+
+    SEPARATOR = ':'
+    WILDCARD = '*'
+    ALL_PERMISSION = '*:*:*'
+    _END = ''
+
+    def __init__(self, permissions: Optional[Iterable[str]] = None):
+        """
+        权限标识索引
+
+        :param permissions: 用户拥有的权限标识列表
+        """
+        self.exact_permissions = set()
+        self.trie = {}
+        self.is_all_permission = False
+        for permission in permissions or []:
+            if not permission:
+                continue
+            if permission == self.ALL_PERMISSION:
+                self.is_all_permission = True
+                continue
+            if self.WILDCARD not in permission:
+                self.exact_permissions.add(permission)
+                continue
+            node = self.trie
+            for segment in permission.split(self.SEPARATOR):
+                node = node.setdefault(segment, {})
+            node[self._END] = True
+
+    @classmethod
+    def compile_permission(cls, permission: str) -> Tuple[str, Tuple[str, ...]]:
+        """
+        预先将需要校验的权限标识分段
+
+        :param permission: 需要校验的权限标识
+        :return: 权限标识及其分段
+        """
+        return permission, tuple(permission.split(cls.SEPARATOR))
+
+    def has_permission(self, compiled_permission: Tuple[str, Tuple[str, ...]]) -> bool:
+        """
+        判断是否拥有权限标识
+
+        :param compiled_permission: 经compile_permission分段后的权限标识
+        :return: 是否拥有该权限标识
+        """
+        permission, segments = compiled_permission
+        if self.is_all_permission or permission in self.exact_permissions:
+            return True
+        return bool(self.trie) and self.__match(self.trie, segments, 0)
+
+    def __match(self, node: dict, segments: Tuple[str, ...], index: int) -> bool:
+        """
+        在前缀树中匹配权限标识分段，每一段最多只需比较同名分支及通配分支
+
+        :param node: 当前前缀树节点
+        :param segments: 权限标识分段
+        :param index: 当前分段下标
+        :return: 是否匹配
+        """
+        if index == len(segments):
+            return self._END in node
+        wildcard_node = node.get(self.WILDCARD)
+        if wildcard_node is not None:
+            # 位于末尾的通配符匹配剩余的全部段
+            if self._END in wildcard_node or self.__match(wildcard_node, segments, index + 1):
+                return True
+        child_node = node.get(segments[index])
+        return child_node is not None and self.__match(child_node, segments, index + 1)
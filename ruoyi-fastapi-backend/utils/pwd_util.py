@@ -1,4 +1,9 @@
+import asyncio
 import bcrypt
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+from config.env import PasswordConfig
 from utils.log_util import logger
 
 _BCRYPT_MAX_BYTES = 72
@@ -9,6 +14,13 @@ class PwdUtil:
     密码工具类，基于bcrypt原生实现，避免passlib在Python3.13 + bcrypt 4.x上的72字节限制崩溃
     """
 
+    _executor: Optional[ThreadPoolExecutor] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _stats_lock = threading.Lock()
+    _in_flight = 0
+    _running = 0
+    _completed = 0
+
     @classmethod
     def verify_password(cls, plain_password, hashed_password):
         """
@@ -38,6 +50,103 @@ class PwdUtil:
         hashed = bcrypt.hashpw(normalized, bcrypt.gensalt())
         return hashed.decode('utf-8')
 
+    @classmethod
+    async def verify_password_async(cls, plain_password, hashed_password):
+        """
+        工具方法：在密码线程池中校验当前输入的密码与数据库存储的密码是否一致，不阻塞事件循环
+
+        :param plain_password: 当前输入的密码
+        :param hashed_password: 数据库存储的密码($2a$/$2b$格式)
+        :return: 校验结果
+        """
+        if plain_password is None or hashed_password is None:
+            return False
+        return await cls.__run_in_pool(cls.verify_password, plain_password, hashed_password)
+
+    @classmethod
+    async def get_password_hash_async(cls, input_password):
+        """
+        工具方法：在密码线程池中对当前输入的密码进行加密，不阻塞事件循环
+
+        :param input_password: 输入的密码
+        :return: 加密成功的密码
+        """
+        if input_password is None:
+            raise ValueError('密码不能为空')
+        return await cls.__run_in_pool(cls.get_password_hash, input_password)
+
+    @classmethod
+    def get_pool_stats(cls):
+        """
+        工具方法：获取密码线程池运行状态
+
+        :return: 最大线程数、最大排队数、排队中任务数、执行中任务数及已完成任务数
+        """
+        with cls._stats_lock:
+            return dict(
+                max_workers=PasswordConfig.password_hash_max_workers,
+                max_queue_size=PasswordConfig.password_hash_max_queue_size,
+                queued=max(cls._in_flight - cls._running, 0),
+                running=cls._running,
+                completed=cls._completed,
+            )
+
+    @classmethod
+    def close_pool(cls):
+        """
+        工具方法：应用关闭时关闭密码线程池
+
+        :return:
+        """
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        cls._semaphore = None
+
+    @classmethod
+    async def __run_in_pool(cls, func: Callable, *args):
+        """
+        在密码线程池中执行方法，bcrypt计算期间会释放GIL，因此多个线程可以并行计算
+
+        :param func: 需要执行的方法
+        :param args: 方法参数
+        :return: 方法执行结果
+        """
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(
+                max_workers=PasswordConfig.password_hash_max_workers, thread_name_prefix='pwd_util'
+            )
+            # 执行中及排队中的任务总数达到上限时，新任务在事件循环中等待而不是无限堆积在线程池队列中
+            cls._semaphore = asyncio.Semaphore(
+                PasswordConfig.password_hash_max_workers + PasswordConfig.password_hash_max_queue_size
+            )
+        with cls._stats_lock:
+            cls._in_flight += 1
+        try:
+            async with cls._semaphore:
+                return await asyncio.get_running_loop().run_in_executor(cls._executor, cls.__run_tracked, func, *args)
+        finally:
+            with cls._stats_lock:
+                cls._in_flight -= 1
+                cls._completed += 1
+
+    @classmethod
+    def __run_tracked(cls, func: Callable, *args):
+        """
+        在线程中执行方法并记录执行状态
+
+        :param func: 需要执行的方法
+        :param args: 方法参数
+        :return: 方法执行结果
+        """
+        with cls._stats_lock:
+            cls._running += 1
+        try:
+            return func(*args)
+        finally:
+            with cls._stats_lock:
+                cls._running -= 1
+
     @classmethod
     def sanitize_password(cls, password: str) -> str:
         """
@@ -0,0 +1,69 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Mapping, Optional, Sequence
+
+
+class RingBuffer:
+    """
+    定长环形缓冲区，时间戳及每个字段各使用一个array数组按列存储浮点数，写满后覆盖最早的数据，内存占用固定
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int):
+        """
+        定长环形缓冲区
+
+        :param fields: 字段名称列表
+        :param capacity: 最大保存条数
+        """
+        self.fields = tuple(fields)
+        self.capacity = max(capacity, 1)
+        self._timestamps = array('d', [0.0]) * self.capacity
+        self._columns = {field: array('d', [0.0]) * self.capacity for field in self.fields}
+        self._next = 0
+        self._size = 0
+
+    def append(self, timestamp: float, values: Mapping[str, float]):
+        """
+        写入一条数据，缓冲区已满时覆盖最早的一条
+
+        :param timestamp: 时间戳（单位：秒）
+        :param values: 字段名称与数值的映射，缺少的字段记为0
+        :return:
+        """
+        index = self._next
+        self._timestamps[index] = timestamp
+        for field, column in self._columns.items():
+            column[index] = values.get(field, 0.0)
+        self._next = (index + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def window(self, since: Optional[float] = None) -> Dict[str, List[float]]:
+        """
+        按时间先后顺序获取缓冲区中的数据
+
+        :param since: 起始时间戳（单位：秒），为空时获取全部数据
+        :return: 以timestamp及各字段名称为键的按列数据
+        """
+        start = (self._next - self._size) % self.capacity
+        timestamps = self.__ordered(self._timestamps, start)
+        offset = bisect_left(timestamps, since) if since is not None else 0
+        result = {'timestamp': timestamps[offset:]}
+        for field, column in self._columns.items():
+            result[field] = self.__ordered(column, start)[offset:]
+        return result
+
+    def __len__(self):
+        return self._size
+
+    def __ordered(self, column: array, start: int) -> List[float]:
+        """
+        将环形存储的数组按写入顺序展开为列表
+
+        :param column: 按列存储的数组
+        :param start: 最早一条数据的下标
+        :return: 按写入顺序排列的列表
+        """
+        end = start + self._size
+        if end <= self.capacity:
+            return column[start:end].tolist()
+        return column[start:].tolist() + column[: end - self.capacity].tolist()
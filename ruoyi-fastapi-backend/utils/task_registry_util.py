@@ -0,0 +1,82 @@
+import pickle
+from asyncio import iscoroutinefunction
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+
+class TaskInfo(NamedTuple):
+    """
+    已注册的定时任务函数信息
+    """
+
+    invoke_target: str
+    func: Callable
+    is_async: bool
+    picklable: Optional[bool]
+
+
+class TaskRegistryUtil:
+    """
+    定时任务函数注册工具类，定时任务函数通过装饰器在导入时注册，调度时按调用目标字符串直接查找，不再使用eval解析
+    """
+
+    _tasks: Dict[str, TaskInfo] = {}
+
+    @classmethod
+    def register(cls, func: Optional[Callable] = None, *, name: Optional[str] = None):
+        """
+        注册定时任务函数的装饰器，可直接使用@TaskRegistryUtil.register或指定调用目标字符串@TaskRegistryUtil.register(name=...)
+
+        :param func: 定时任务函数
+        :param name: 调用目标字符串，默认为函数所在模块及函数名，如module_task.scheduler_test.job
+        :return: 原函数
+        """
+
+        def decorator(task_func: Callable):
+            invoke_target = name or f'{task_func.__module__}.{task_func.__qualname__}'
+            cls._tasks[invoke_target] = TaskInfo(
+                invoke_target=invoke_target,
+                func=task_func,
+                is_async=iscoroutinefunction(task_func),
+                # 装饰器执行时函数尚未绑定到模块属性，首次查找时再判断能否序列化
+                picklable=None,
+            )
+            return task_func
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    @classmethod
+    def get_task(cls, invoke_target: str) -> Optional[TaskInfo]:
+        """
+        根据调用目标字符串获取已注册的定时任务函数信息
+
+        :param invoke_target: 调用目标字符串
+        :return: 定时任务函数信息，未注册时返回None
+        """
+        task = cls._tasks.get(invoke_target)
+        if task is not None and task.picklable is None:
+            task = cls._tasks[invoke_target] = task._replace(picklable=cls.__is_picklable(task.func))
+        return task
+
+    @classmethod
+    def get_task_list(cls) -> List[TaskInfo]:
+        """
+        获取全部已注册的定时任务函数信息
+
+        :return: 定时任务函数信息列表
+        """
+        return [cls.get_task(invoke_target) for invoke_target in list(cls._tasks)]
+
+    @staticmethod
+    def __is_picklable(func: Callable) -> bool:
+        """
+        判断函数能否被序列化后在进程池中按引用还原为同一函数
+
+        :param func: 定时任务函数
+        :return: 是否可序列化
+        """
+        try:
+            return pickle.loads(pickle.dumps(func)) is func
+        except Exception:
+            return False
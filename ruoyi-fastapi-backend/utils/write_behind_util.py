@@ -0,0 +1,212 @@
+import asyncio
+import os
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Awaitable, Callable, List, Literal, Optional
+from utils.log_util import logger
+
+
+class WriteBehindQueue:
+    """
+    写后队列，先将数据放入进程内队列，再由后台任务按批量大小或时间间隔批量写入
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        name: str,
+        flush_handler: Callable[[List[Any]], Awaitable[Any]],
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1,
+        full_policy: Literal['block', 'drop', 'spill'] = 'spill',
+        spill_path: str = 'logs/spill',
+        dump_item: Optional[Callable[[Any], str]] = None,
+        load_item: Optional[Callable[[str], Any]] = None,
+    ):
+        """
+        写后队列
+
+        :param name: 队列名称，同时作为溢出文件名
+        :param flush_handler: 批量写入方法，接收一批数据作为参数
+        :param max_size: 队列最大长度
+        :param batch_size: 单次批量写入最大条数
+        :param flush_interval: 批量写入最大等待时间（单位：秒）
+        :param full_policy: 队列已满时的处理策略（block阻塞等待 drop丢弃 spill写入本地溢出文件）
+        :param spill_path: 溢出文件目录
+        :param dump_item: 将数据序列化为单行文本的方法，写入溢出文件时使用
+        :param load_item: 将单行文本反序列化为数据的方法，重新写入溢出文件数据时使用
+        """
+        self.name = name
+        self.flush_handler = flush_handler
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.spill_file = os.path.join(spill_path, f'{name}.jsonl')
+        self.dump_item = dump_item
+        self.load_item = load_item
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self):
+        """
+        队列是否已启动
+        """
+        return self._flusher_task is not None
+
+    async def start(self):
+        """
+        启动后台批量写入任务，并重新写入上次遗留的溢出文件数据
+
+        :return:
+        """
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._flusher_task = asyncio.create_task(self.__flush_loop())
+        logger.info(f'写后队列{self.name}启动成功')
+
+    async def stop(self):
+        """
+        停止后台批量写入任务，停止前写入队列中剩余的全部数据
+
+        :return:
+        """
+        if not self.running:
+            return
+        await self._queue.put(self._STOP)
+        await self._flusher_task
+        self._flusher_task = None
+        # 停止标记之后仍可能有数据入队，在此一并写入
+        remaining_items = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not self._STOP:
+                remaining_items.append(item)
+        for index in range(0, len(remaining_items), self.batch_size):
+            await self.__flush(remaining_items[index : index + self.batch_size])
+        self._queue = None
+        logger.info(f'写后队列{self.name}关闭成功')
+
+    async def put(self, item: Any):
+        """
+        将数据放入队列
+
+        :param item: 需要写入的数据
+        :return: 数据是否已被接收（放入队列或写入溢出文件）
+        """
+        if self.full_policy == 'block':
+            await self._queue.put(item)
+            return True
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            if self.full_policy == 'spill' and self.dump_item:
+                return await self.__spill([item])
+            logger.warning(f'写后队列{self.name}已满，丢弃1条数据')
+            return False
+
+    async def __flush_loop(self):
+        """
+        持续从队列中取出数据，达到批量大小或等待超过时间间隔后批量写入
+
+        :return:
+        """
+        await self.__replay_spill()
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._queue.get()
+            if item is self._STOP:
+                return
+            batch = [item]
+            stop_after_flush = False
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is self._STOP:
+                    stop_after_flush = True
+                    break
+                batch.append(item)
+            await self.__flush(batch)
+            if stop_after_flush:
+                return
+
+    async def __flush(self, batch: List[Any]):
+        """
+        批量写入数据，写入失败时按照队列策略写入溢出文件或丢弃
+
+        :param batch: 需要写入的数据列表
+        :return:
+        """
+        try:
+            await self.flush_handler(batch)
+        except Exception as e:
+            logger.exception(e)
+            if self.full_policy == 'spill' and self.dump_item and await self.__spill(batch):
+                logger.error(f'写后队列{self.name}批量写入失败，{len(batch)}条数据已写入溢出文件')
+            else:
+                logger.error(f'写后队列{self.name}批量写入失败，丢弃{len(batch)}条数据')
+
+    async def __spill(self, items: List[Any]):
+        """
+        将数据追加写入溢出文件
+
+        :param items: 需要写入溢出文件的数据列表
+        :return: 是否写入成功
+        """
+        lines = ''.join(f'{self.dump_item(item)}\n' for item in items)
+
+        def write_spill_file():
+            os.makedirs(os.path.dirname(self.spill_file) or '.', exist_ok=True)
+            with open(self.spill_file, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+        try:
+            await run_in_threadpool(write_spill_file)
+            return True
+        except OSError as e:
+            logger.error(f'写后队列{self.name}溢出文件写入失败，丢弃{len(items)}条数据，详细错误信息：{e}')
+            return False
+
+    async def __replay_spill(self):
+        """
+        重新写入溢出文件中的数据
+
+        :return:
+        """
+        if not self.load_item or not os.path.exists(self.spill_file):
+            return
+        # 先重命名再读取，避免与其他worker重复写入，同时不影响新的溢出数据
+        replay_file = f'{self.spill_file}.{os.getpid()}.replay'
+        try:
+            os.replace(self.spill_file, replay_file)
+        except FileNotFoundError:
+            return
+
+        def read_replay_file():
+            with open(replay_file, encoding='utf-8') as f:
+                return [line for line in f.read().splitlines() if line]
+
+        lines = await run_in_threadpool(read_replay_file)
+        items = []
+        for line in lines:
+            try:
+                items.append(self.load_item(line))
+            except Exception as e:
+                logger.error(f'写后队列{self.name}溢出数据解析失败，详细错误信息：{e}')
+        for index in range(0, len(items), self.batch_size):
+            await self.__flush(items[index : index + self.batch_size])
+        os.remove(replay_file)
+        logger.info(f'写后队列{self.name}已重新写入{len(items)}条溢出数据')
@@ -16,11 +16,20 @@ export function listCacheName() {
   });
 }
 
-// 查询缓存键名列表
-export function listCacheKey(cacheName) {
+// 查询缓存名称键数量及内存占用统计
+export function getCacheStats() {
+  return request({
+    url: '/monitor/cache/getStats',
+    method: 'get',
+  });
+}
+
+// 分页查询缓存键名列表
+export function listCacheKey(cacheName, query) {
   return request({
     url: '/monitor/cache/getKeys/' + cacheName,
     method: 'get',
+    params: query,
   });
 }
 
@@ -41,10 +50,11 @@ export function clearCacheName(cacheName) {
 }
 
 // 清理指定键名缓存
-export function clearCacheKey(cacheKey) {
+export function clearCacheKey(cacheKey, cacheName) {
   return request({
     url: '/monitor/cache/clearCacheKey/' + cacheKey,
     method: 'delete',
+    params: { cacheName },
   });
 }
 
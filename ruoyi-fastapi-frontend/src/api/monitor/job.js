@@ -17,6 +17,14 @@ export function getJob(jobId) {
   });
 }
 
+// 查询已注册的定时任务函数列表
+export function listJobTask() {
+  return request({
+    url: '/monitor/job/tasks',
+    method: 'get',
+  });
+}
+
 // 新增定时任务调度
 export function addJob(data) {
   return request({
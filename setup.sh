@@ -32,7 +32,7 @@ apply_sql_updates() {
         rel_path=${sql_file#"$SQL_ROOT/"}
         echo -e "${BLUE}   ↪ ${rel_path}${NC}"
         mysql_exec "$DB_NAME" < "$sql_file"
-    done < <(find "$SQL_ROOT" -maxdepth 1 -type f -name "*.sql" ! -name "ruoyi-fastapi*.sql" | sort)
+    done < <(find "$SQL_ROOT" -maxdepth 1 -type f -name "*.sql" ! -name "ruoyi-fastapi*.sql" ! -name "*-pg.sql" | sort)
 
     if [ "$sql_found" = false ]; then
         echo -e "${YELLOW}ℹ️  未检测到需要执行的增量 SQL 脚本${NC}"